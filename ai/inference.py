@@ -1,15 +1,21 @@
 # ai/inference.py
 import cv2, time, requests
 from ultralytics import YOLO
-from collections import Counter
+import sys, os
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.postprocess import postprocess
+from common import config
+
+CFG = config.get().edge
 MODEL = "runs/detect/train8/weights/best.pt"
-BACKEND_URL = "http://127.0.0.1:8000/detections"  # Backend API
-JUNCTION_ID = "J1"
+VIDEO_PATH = int(CFG.video_path) if CFG.video_path.isdigit() else CFG.video_path   # file, RTSP URL or camera index
+BACKEND_URL = f"{CFG.backend_url}/detections"  # Backend API
+JUNCTION_ID = CFG.junction_id
 
 # Load YOLO model
 model = YOLO(MODEL)
-cap = cv2.VideoCapture("data/sample.mp4")  # Replace with RTSP for live
+cap = cv2.VideoCapture(VIDEO_PATH)
 
 while True:
     ret, frame = cap.read()
@@ -18,30 +24,21 @@ while True:
         break
 
     # Run inference
-    results = model(frame, imgsz=640, conf=0.25)[0]
+    results = model(frame, imgsz=CFG.imgsz, conf=CFG.conf, device=CFG.device)[0]
 
-    detections = []
     class_names = model.names  # {0:'person',1:'bicycle',2:'car',...}
-    vehicle_labels = []
-
-    for box in results.boxes:
-        cls_id = int(box.cls[0])
-        conf = float(box.conf[0])
-        xyxy = [float(x) for x in box.xyxy[0].tolist()]
 
-        detections.append({"cls": cls_id, "conf": conf, "xyxy": xyxy})
-        vehicle_labels.append(class_names[cls_id])
+    # Whole result -> NumPy in one copy; detections + per-class counts from the arrays
+    detections, counts, (cls_ids, confs, boxes_xyxy) = postprocess(results, class_names)
 
-        # Optional: draw boxes for debugging
-        cv2.rectangle(frame, (int(xyxy[0]), int(xyxy[1])),
-                             (int(xyxy[2]), int(xyxy[3])), (0,255,0), 2)
+    # Optional: draw boxes for debugging
+    for cls_id, conf, (x1, y1, x2, y2) in zip(cls_ids.tolist(), confs.tolist(),
+                                              boxes_xyxy.astype(int).tolist()):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
         cv2.putText(frame, f"{class_names[cls_id]} {conf:.2f}",
-                    (int(xyxy[0]), int(xyxy[1]-5)),
+                    (x1, y1-5),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,0), 2)
 
-    # Count vehicles per class
-    counts = dict(Counter(vehicle_labels))
-
     # Create payload
     payload = {
         "junction_id": JUNCTION_ID,
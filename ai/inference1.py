@@ -1,17 +1,23 @@
 import cv2, requests
 from ultralytics import YOLO
+import sys, os
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import config
+
+CFG = config.get().edge
 MODEL = "runs/detect/train7/weights/best.pt"
-BACKEND_URL = "http://127.0.0.1:8000/detections"
-JUNCTION_ID = "J1"
+VIDEO_PATH = int(CFG.video_path) if CFG.video_path.isdigit() else CFG.video_path
+BACKEND_URL = f"{CFG.backend_url}/detections"
+JUNCTION_ID = CFG.junction_id
 
 model = YOLO(MODEL)
 
-cap = cv2.VideoCapture("data/sample.mp4")
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
+cap = cv2.VideoCapture(VIDEO_PATH)
+cap.set(cv2.CAP_PROP_FRAME_WIDTH, CFG.frame_width)
+cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CFG.frame_height)
 
-FRAME_SKIP = 2   # process every 3rd frame
+FRAME_SKIP = CFG.frame_skip   # process every Nth frame
 frame_id = 0
 
 while cap.isOpened():
@@ -26,9 +32,9 @@ while cap.isOpened():
     # Run YOLO inference
     results = model.predict(
         frame,
-        imgsz=640,
-        conf=0.3,       # lowered so you see more boxes
-        device=0,       # use GPU if available
+        imgsz=CFG.imgsz,
+        conf=CFG.conf,
+        device=CFG.device,   # CUDA index or "cpu"
         verbose=False
     )
 
@@ -1,17 +1,24 @@
 import cv2, requests, threading
 from ultralytics import YOLO
+import sys, os
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.postprocess import extract_boxes, build_detections
+from common import config
+
+CFG = config.get().edge
 MODEL = "runs/detect/train15/weights/best.pt"
-BACKEND_URL = "http://127.0.0.1:8000/detections"
-JUNCTION_ID = "J1"
+VIDEO_PATH = int(CFG.video_path) if CFG.video_path.isdigit() else CFG.video_path
+BACKEND_URL = f"{CFG.backend_url}/detections"
+JUNCTION_ID = CFG.junction_id
 
 model = YOLO(MODEL)
 
-cap = cv2.VideoCapture("data/sample2.mp4")
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)   # smaller resolution → faster
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 270)
+cap = cv2.VideoCapture(VIDEO_PATH)
+cap.set(cv2.CAP_PROP_FRAME_WIDTH, CFG.frame_width)   # smaller resolution → faster
+cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CFG.frame_height)
 
-FRAME_SKIP = 3   # process every 4th frame
+FRAME_SKIP = CFG.frame_skip   # process every Nth frame
 frame_id = 0
 
 def send_async(payload):
@@ -33,20 +40,13 @@ while cap.isOpened():
     # Run YOLO inference with smaller imgsz
     results = model.predict(
         frame,
-        imgsz=480,     # smaller than 640 → faster
-        conf=0.25,     # more detections, less strict
-        device=0,      # GPU if available
+        imgsz=CFG.imgsz,     # edge.imgsz: smaller → faster
+        conf=CFG.conf,     # more detections, less strict
+        device=CFG.device,   # CUDA index or "cpu"
         verbose=False
     )
 
-    detections = []
-    for r in results:
-        for box in r.boxes:
-            detections.append({
-                "cls": int(box.cls),
-                "conf": float(box.conf),
-                "xyxy": [float(x) for x in box.xyxy[0]]
-            })
+    detections = build_detections(*extract_boxes(results))
 
     # Draw detections (disable if only backend needed)
     annotated_frame = results[0].plot()
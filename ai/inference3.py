@@ -6,13 +6,17 @@ from collections import Counter
 from ultralytics import YOLO
 from queue import Queue
 import psutil
-import sys
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import config
 
 def startmodel():
-    MODEL_PATH = "ai/runs/detect/train15/weights/best.pt"
-    VIDEO_PATH = "ai/data/sample2.mp4"
-    BACKEND_URL = "http://127.0.0.1:8000/detections"
-    JUNCTION_ID = "J1"
+    CFG = config.get().edge
+    MODEL_PATH = CFG.model_path
+    VIDEO_PATH = int(CFG.video_path) if CFG.video_path.isdigit() else CFG.video_path
+    BACKEND_URL = f"{CFG.backend_url}/detections"
+    JUNCTION_ID = CFG.junction_id
 
 
     print("[INFO] Loading YOLO model...")
@@ -20,14 +24,14 @@ def startmodel():
 
     # Video source
     cap = cv2.VideoCapture(VIDEO_PATH)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 270)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CFG.frame_width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CFG.frame_height)
 
     if not cap.isOpened():
         print("[ERROR] Failed to open video source.")
         sys.exit(1)
 
-    FRAME_SKIP = 2   # process every 2nd frame (reduce load)
+    FRAME_SKIP = CFG.frame_skip   # process every Nth frame (reduce load)
     frame_id = 0
 
     # Queue for backend sending
@@ -63,7 +67,7 @@ def startmodel():
                 continue
 
             start_time = time.time()
-            results = model.predict(frame, imgsz=480, conf=0.25, device=0, verbose=False)
+            results = model.predict(frame, imgsz=CFG.imgsz, conf=CFG.conf, device=CFG.device, verbose=False)
 
             detections = []
             class_names = model.names
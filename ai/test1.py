@@ -1,10 +1,13 @@
 import cv2
 import time
 from datetime import datetime, timedelta
-from collections import defaultdict
 import numpy as np
 from ultralytics import YOLO
 import threading
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.windowstats import WindowedStats
 
 
 class FaceCounter:
@@ -22,7 +25,7 @@ class FaceCounter:
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
         # Counters and timing
-        self.minute_counts = defaultdict(int)
+        self.minute_counts = WindowedStats(minutes=60)  # per-minute max/mean, last hour, fixed memory
         self.current_faces = 0
         self.last_minute_report = datetime.now()
         self.total_detections = 0
@@ -72,10 +75,9 @@ class FaceCounter:
         """Update face counts and check if a minute has passed"""
         self.current_faces = faces_count
         current_time = datetime.now()
-        current_minute = current_time.replace(second=0, microsecond=0)
 
-        # Update minute count with maximum faces seen in this minute
-        self.minute_counts[current_minute] = max(self.minute_counts[current_minute], faces_count)
+        # Fold into this minute's max/mean
+        self.minute_counts.add(faces_count)
 
         # Check if a minute has passed since last report
         if current_time - self.last_minute_report >= timedelta(minutes=1):
@@ -88,13 +90,10 @@ class FaceCounter:
         print("MINUTE-BY-MINUTE FACE COUNT REPORT")
         print("=" * 50)
 
-        # Sort by time and display last 10 minutes
-        sorted_times = sorted(self.minute_counts.keys(), reverse=True)[:10]
-
-        for minute_time in sorted_times:
-            count = self.minute_counts[minute_time]
-            time_str = minute_time.strftime("%H:%M")
-            print(f"{time_str} - Max faces detected: {count}")
+        # Last 10 minutes, newest first
+        for row in self.minute_counts.report(last=10):
+            print(f"{row['time']} - Max faces detected: {row['max']:.0f} "
+                  f"(mean {row['mean']:.1f} over {row['count']} frames)")
 
         print("=" * 50)
 
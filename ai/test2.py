@@ -2,7 +2,15 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 import argparse
+import csv
+import glob
+import json
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
 
 
 class ImagePersonCounter:
@@ -24,35 +32,41 @@ class ImagePersonCounter:
         self.text_color = (255, 255, 255)  # White for text
         self.bg_color = (0, 0, 0)  # Black background for text
 
+    @staticmethod
+    def _persons(result):
+        """Person boxes of one result, filtered on whole tensors instead of box by box"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        cls = boxes.cls.cpu().numpy()
+        conf = boxes.conf.cpu().numpy()
+        xyxy = boxes.xyxy.cpu().numpy().astype(int)
+        # Class 0 is 'person' in COCO dataset; 0.5 confidence threshold
+        keep = np.flatnonzero((cls == 0) & (conf > 0.5))
+        return [{'bbox': tuple(int(v) for v in xyxy[i]), 'confidence': float(conf[i])} for i in keep]
+
     def detect_persons(self, image):
         """Detect persons using YOLOv8"""
         results = self.model(image, verbose=False)
-        persons_detected = 0
         detections = []
-
         for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Class 0 is 'person' in COCO dataset
-                    if int(box.cls) == 0:  # Person class
-                        confidence = float(box.conf)
-                        if confidence > 0.5:  # Confidence threshold
-                            persons_detected += 1
-
-                            # Get bounding box coordinates
-                            x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-                            detections.append({
-                                'bbox': (x1, y1, x2, y2),
-                                'confidence': confidence
-                            })
-
-        return persons_detected, detections
+            detections.extend(self._persons(result))
+        return len(detections), detections
+
+    def detect_persons_batch(self, images):
+        """Detect persons in a list of images with one model call; [(count, detections), ...]"""
+        if not images:
+            return []
+        results = self.model(images, verbose=False)
+        out = []
+        for result in results:
+            detections = self._persons(result)
+            out.append((len(detections), detections))
+        return out
 
-    def draw_detections(self, image, detections):
-        """Draw bounding boxes and labels on the image"""
-        annotated_image = image.copy()
+    def draw_detections(self, image, detections, copy=True):
+        """Draw bounding boxes and labels on the image (in place with copy=False)"""
+        annotated_image = image.copy() if copy else image
 
         for detection in detections:
             x1, y1, x2, y2 = detection['bbox']
@@ -71,9 +85,9 @@ class ImagePersonCounter:
 
         return annotated_image
 
-    def add_count_text(self, image, person_count):
-        """Add person count text to the image"""
-        annotated_image = image.copy()
+    def add_count_text(self, image, person_count, copy=True):
+        """Add person count text to the image (in place with copy=False)"""
+        annotated_image = image.copy() if copy else image
 
         # Add person count at the top
         count_text = f"Persons detected: {person_count}"
@@ -126,7 +140,7 @@ class ImagePersonCounter:
         # Create annotated image
         if show_result or save_result:
             annotated_image = self.draw_detections(image, detections)
-            annotated_image = self.add_count_text(annotated_image, person_count)
+            annotated_image = self.add_count_text(annotated_image, person_count, copy=False)
 
             if show_result:
                 # Display the result
@@ -146,22 +160,134 @@ class ImagePersonCounter:
 
         return person_count
 
+    def process_batch(self, image_paths, batch_size=16, workers=4, results_path=None, annotate_dir=None):
+        """Count persons in many images: decode in a thread pool, infer in batches.
+
+        Decoding runs ahead of the model by at most two batches, so memory stays
+        bounded however many images there are. Returns one row per image, in
+        input order, and writes them to results_path (.csv or .json) when given.
+        Annotated images keep their path relative to the inputs' common
+        directory, so cam01/snapshot.jpg and cam02/snapshot.jpg don't collide.
+        """
+        image_paths = list(image_paths)
+        annotated_path = annotation_paths(image_paths, annotate_dir) if annotate_dir else None
+        rows = []   # (input index, row): unreadable images are reported ahead of their batch
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:   # cv2 releases the GIL while decoding
+            pending = deque()
+            paths = iter(enumerate(image_paths))
+
+            def refill():
+                while len(pending) < 2 * batch_size:
+                    item = next(paths, None)
+                    if item is None:
+                        return
+                    pending.append((item, pool.submit(cv2.imread, item[1])))
+
+            refill()
+            while pending:
+                batch = []
+                while pending and len(batch) < batch_size:
+                    (i, path), future = pending.popleft()
+                    image = future.result()
+                    if image is None:
+                        rows.append((i, {'path': path, 'width': 0, 'height': 0, 'persons': None,
+                                         'max_confidence': None, 'error': 'could not load image'}))
+                    else:
+                        batch.append((i, path, image))
+                refill()   # next batches decode while this one is on the model
+                for (i, path, image), (count, detections) in zip(batch, self.detect_persons_batch([im for _, _, im in batch])):
+                    rows.append((i, {'path': path, 'width': image.shape[1], 'height': image.shape[0],
+                                     'persons': count,
+                                     'max_confidence': round(max((d['confidence'] for d in detections), default=0.0), 3),
+                                     'error': ''}))
+                    if annotate_dir:
+                        annotated = self.draw_detections(image, detections, copy=False)   # freshly decoded, nothing else uses it
+                        self.add_count_text(annotated, count, copy=False)
+                        out = annotated_path[i]
+                        os.makedirs(os.path.dirname(out), exist_ok=True)
+                        cv2.imwrite(out, annotated)
+                print(f"Processed {len(rows)} images", end='\r')
+        rows = [row for _, row in sorted(rows, key=lambda r: r[0])]
+
+        elapsed = time.perf_counter() - started
+        done = sum(1 for r in rows if r['persons'] is not None)
+        print(f"\nProcessed {done} images ({len(rows) - done} unreadable) in {elapsed:.1f}s: "
+              f"{done / elapsed if elapsed > 0 else 0:.1f} images/sec")
+        if results_path:
+            write_results(rows, results_path)
+            print(f"Results written to: {results_path}")
+        return rows
+
+
+def expand_image_paths(spec):
+    """A directory (its images, sorted), a glob pattern, or a single file"""
+    if os.path.isdir(spec):
+        return sorted(os.path.join(spec, f) for f in os.listdir(spec) if f.lower().endswith(IMAGE_EXTS))
+    if glob.has_magic(spec):
+        return sorted(p for p in glob.glob(spec, recursive=True) if p.lower().endswith(IMAGE_EXTS))
+    return [spec]
+
+
+def annotation_paths(image_paths, annotate_dir):
+    """Output path per input: its path relative to the inputs' common directory, under annotate_dir"""
+    dirs = [os.path.dirname(os.path.abspath(p)) for p in image_paths]
+    try:
+        root = os.path.commonpath(dirs) if dirs else ''
+    except ValueError:   # inputs on different drives: no common root, number them instead
+        return [os.path.join(annotate_dir, f"{i:06d}_{os.path.basename(p)}") for i, p in enumerate(image_paths)]
+    return [os.path.join(annotate_dir, os.path.relpath(os.path.abspath(p), root)) for p in image_paths]
+
+
+def write_results(rows, path):
+    """Rows to .json, anything else as CSV"""
+    if path.lower().endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['path', 'width', 'height', 'persons', 'max_confidence', 'error'])
+        writer.writeheader()
+        writer.writerows(rows)
+
 
 def main():
-    parser = argparse.ArgumentParser(description='Count persons in an image using YOLOv8')
-    parser.add_argument('4.png', help='Path to the input image')
+    parser = argparse.ArgumentParser(description='Count persons in an image, a directory or a glob of images using YOLOv8')
+    parser.add_argument('image_path', nargs='?', default='4.png',
+                        help='Input image, directory or glob pattern (quote it), e.g. "snapshots/**/*.jpg"')
     parser.add_argument('--no-show', action='store_true',
                         help='Don\'t display the result image')
     parser.add_argument('--save', action='store_true',
                         help='Save the annotated image')
     parser.add_argument('--output', '-o', type=str,
-                        help='Output path for the annotated image')
+                        help='Output path for the annotated image (batch mode: directory for annotated images)')
+    parser.add_argument('--results', type=str, default='results.csv',
+                        help='Batch mode: results file, .csv or .json')
+    parser.add_argument('--batch-size', type=int, default=16,
+                        help='Batch mode: images per model call')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Batch mode: decode threads')
 
     args = parser.parse_args()
 
     # Create counter instance
     counter = ImagePersonCounter()
 
+    paths = expand_image_paths(args.image_path)
+    if os.path.isdir(args.image_path) or glob.has_magic(args.image_path):
+        if not paths:
+            print(f"Error: no images match '{args.image_path}'")
+            return
+        annotate_dir = None
+        if args.save:
+            annotate_dir = args.output or 'annotated'
+            os.makedirs(annotate_dir, exist_ok=True)
+        rows = counter.process_batch(paths, batch_size=args.batch_size, workers=args.workers,
+                                     results_path=args.results, annotate_dir=annotate_dir)
+        total = sum(r['persons'] or 0 for r in rows)
+        print(f"\nFinal count: {total} person(s) detected across {len(rows)} image(s).")
+        return
+
     try:
         # Process the image
         person_count = counter.process_image(
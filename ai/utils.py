@@ -1,5 +1,9 @@
 # ai/utils.py
 import cv2, numpy as np
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.lanes import points_in_polygon
 
 def image_entropy(gray):
     hist = cv2.calcHist([gray],[0],None,[256],[0,256])
@@ -14,4 +18,8 @@ def bbox_center(bbox):
 def map_to_lane(center, lane_rois):
     # lane_rois: list of polygons
     # return lane_id if point inside ROI polygon
-    pass
+    point = np.asarray([center], dtype=np.float64)
+    for lane_id, roi in enumerate(lane_rois):
+        if points_in_polygon(point, np.asarray(roi, dtype=np.float64))[0]:
+            return lane_id
+    return None
@@ -0,0 +1,207 @@
+# backend/alerts.py
+"""Asynchronous alert dispatcher: dedup, rate limiting, escalation, pluggable transports.
+
+Request handlers call `submit()`, which only takes a dict lookup under a lock
+and a queue put; transports (Twilio SMS, a JSON-lines log, ...) run on worker
+threads. Repeats of the same (junction, issue) inside DEDUP_WINDOW are folded
+into a counter and mentioned in the next message that does go out; repeats
+inside ESCALATE_WINDOW raise the tier, and a tier increase always goes out.
+A token bucket caps the send rate across all alerts. `issue` is free text
+from clients, so per-key state that has outlived both windows is swept
+from submit() (at most once per window) to keep the key table bounded.
+"""
+import json, threading, time
+from collections import deque
+from dataclasses import dataclass, asdict
+from queue import Queue, Full
+from typing import Dict, List, Optional, Tuple
+
+from common import config
+from common.metrics import REGISTRY
+
+_CFG = config.get().alerts
+DEDUP_WINDOW = _CFG.dedup_window               # same (junction, issue) at most once per window per tier
+ESCALATE_WINDOW = _CFG.escalate_window         # occurrences counted for escalation
+ESCALATION_TIERS = tuple(_CFG.escalation_tiers)  # occurrences needed for tier 0 / 1 / 2
+RATE_PER_MIN = _CFG.rate_per_min               # token bucket refill
+RATE_BURST = _CFG.rate_burst
+QUEUE_MAX = 1000
+WORKERS = 2
+ALERT_TRANSPORT = _CFG.transport               # twilio | log | both
+ALERT_LOG_PATH = _CFG.log_path
+
+ALERTS = REGISTRY.counter("smartflow_alerts", "Alerts by outcome", ["outcome"])
+ALERT_QUEUE = REGISTRY.gauge("smartflow_alert_queue_depth", "Alerts waiting for a transport")
+
+
+@dataclass
+class Alert:
+    junction_id: str
+    issue: str
+    message: str
+    tier: int
+    occurrences: int      # within ESCALATE_WINDOW, this one included
+    suppressed: int       # folded duplicates since the last delivered alert
+    ts: float
+
+
+class LogTransport:
+    """Appends alerts as JSON lines; for tests, benchmarks and SMS-less deployments."""
+    name = "log"
+
+    def __init__(self, path: str = ALERT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alert: Alert):
+        line = json.dumps(asdict(alert), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        print("[ALERT]", alert.message)
+
+
+class TwilioTransport:
+    name = "twilio"
+
+    def send(self, alert: Alert):
+        from backend.sms_utils import send_sms, ESCALATION_PHONES
+        body = alert.message
+        if alert.suppressed:
+            body += f" (+{alert.suppressed} repeats)"
+        send_sms(body)
+        if alert.tier >= 1:
+            for phone in ESCALATION_PHONES:
+                send_sms(f"[ESCALATED T{alert.tier}] {body}", to=phone)
+
+
+def make_transports(kind: str = ALERT_TRANSPORT):
+    if kind in ("twilio", "both") and not (_CFG.twilio_sid and _CFG.twilio_auth and _CFG.alert_phone):
+        print("[ALERT] alerts.twilio_sid / twilio_auth / alert_phone not configured, alerts go to the log only")
+        kind = "log"
+    return {"twilio": [TwilioTransport()],
+            "log": [LogTransport()],
+            "both": [LogTransport(), TwilioTransport()]}.get(kind, [LogTransport()])
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int):
+        self.rate, self.burst = rate_per_s, burst
+        self.tokens, self.last = float(burst), time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait_time(self) -> float:
+        """Take a token if one is available (returns 0), else seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class _KeyState:
+    __slots__ = ("hits", "last_sent", "last_tier", "suppressed")
+
+    def __init__(self):
+        self.hits = deque()   # submit times within ESCALATE_WINDOW
+        self.last_sent = 0.0
+        self.last_tier = -1
+        self.suppressed = 0
+
+
+class AlertDispatcher:
+    def __init__(self, transports=None, workers: int = WORKERS,
+                 dedup_window: float = DEDUP_WINDOW, escalate_window: float = ESCALATE_WINDOW,
+                 tiers: Tuple[int, ...] = ESCALATION_TIERS,
+                 rate_per_min: float = RATE_PER_MIN, burst: int = RATE_BURST):
+        self.transports = transports if transports is not None else make_transports()
+        self.workers = workers
+        self.dedup_window, self.escalate_window, self.tiers = dedup_window, escalate_window, tiers
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst)
+        self.queue: Queue = Queue(maxsize=QUEUE_MAX)
+        self._keys: Dict[Tuple[str, str], _KeyState] = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        ALERT_QUEUE.set_function(self.queue.qsize)
+
+    def _tier(self, occurrences: int) -> int:
+        tier = 0
+        for i, need in enumerate(self.tiers):
+            if occurrences >= need:
+                tier = i
+        return tier
+
+    def _sweep(self, now: float):
+        """Forget keys with no hit inside ESCALATE_WINDOW and no send inside either window."""
+        horizon = max(self.dedup_window, self.escalate_window)
+        stale = [key for key, st in self._keys.items()
+                 if now - st.last_sent > horizon and (not st.hits or now - st.hits[-1] > self.escalate_window)]
+        for key in stale:
+            del self._keys[key]
+        self._next_sweep = now + horizon
+
+    def submit(self, junction_id: str, issue: str, message: Optional[str] = None) -> Optional[Alert]:
+        """Never blocks on I/O. Returns the queued Alert, or None if folded/dropped."""
+        now = time.time()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            st = self._keys.get((junction_id, issue))
+            if st is None:
+                st = self._keys[(junction_id, issue)] = _KeyState()
+            while st.hits and now - st.hits[0] > self.escalate_window:
+                st.hits.popleft()
+            st.hits.append(now)
+            tier = self._tier(len(st.hits))
+            if tier <= st.last_tier and now - st.last_sent < self.dedup_window:
+                st.suppressed += 1
+                ALERTS.labels("suppressed").inc()
+                return None
+            alert = Alert(junction_id, issue, message or f"🚨 {issue} at Junction {junction_id}",
+                          tier, len(st.hits), st.suppressed, now)
+            st.last_sent, st.last_tier, st.suppressed = now, tier, 0
+        try:
+            self.queue.put_nowait(alert)
+        except Full:
+            ALERTS.labels("dropped").inc()
+            return None
+        ALERTS.labels("queued").inc()
+        return alert
+
+    def _worker(self):
+        while True:
+            alert = self.queue.get()
+            if alert is None:
+                break
+            delay = self.bucket.wait_time()
+            while delay > 0:
+                time.sleep(delay)
+                delay = self.bucket.wait_time()
+            for t in self.transports:
+                try:
+                    t.send(alert)
+                    ALERTS.labels(f"sent_{t.name}").inc()
+                except Exception as e:
+                    ALERTS.labels(f"failed_{t.name}").inc()
+                    print(f"[ALERT FAILED] {t.name}: {e}")
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            th = threading.Thread(target=self._worker, name=f"alert-worker-{i}", daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def stop(self, timeout: float = 5.0):
+        for _ in self._threads:
+            try:
+                self.queue.put(None, timeout=timeout)
+            except Full:
+                break
+        for th in self._threads:
+            th.join(timeout)
+        self._threads = []
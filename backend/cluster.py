@@ -0,0 +1,75 @@
+# backend/cluster.py
+"""Run N sharded backend workers on this machine (see backend/shard.py).
+
+    python backend/cluster.py [--workers 3] [--base-port 8001] [--storage sqlite]
+
+Starts one uvicorn process per port with backend.workers/self_url set
+through the environment, so any worker can be sent any request and
+forwards it to the junction's owner. Each worker gets its own event log
+and SQLite file under data/cluster/; mongo is shared as usual.
+Ctrl-C stops them all.
+"""
+import argparse, json, os, signal, subprocess, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker_env(workers, url, storage, port):
+    env = dict(os.environ)
+    env["SMARTFLOW_BACKEND_WORKERS"] = json.dumps(workers)
+    env["SMARTFLOW_BACKEND_SELF_URL"] = url
+    if storage:
+        env["SMARTFLOW_BACKEND_STORAGE"] = storage
+    # one SQLite file per worker (also when it is only the fallback); Parquet parts
+    # are named by pid, so the workers can share backend.parquet_dir
+    env["SMARTFLOW_BACKEND_SQLITE_PATH"] = os.path.join("data", "cluster", f"worker-{port}.db")
+    env["SMARTFLOW_BACKEND_EVENTLOG_DIR"] = os.path.join("data", "cluster", f"eventlog-{port}")
+    return env
+
+
+def start(n: int, base_port: int, host: str = "127.0.0.1", storage: str = None):
+    ports = [base_port + i for i in range(n)]
+    workers = [f"http://{host}:{p}" for p in ports]
+    procs = []
+    for port, url in zip(ports, workers):
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", host, "--port", str(port),
+             "--log-level", "warning"],
+            cwd=ROOT, env=worker_env(workers, url, storage, port)))
+    return workers, procs
+
+
+def stop(procs, timeout: float = 10.0):
+    for p in procs:
+        if p.poll() is None:
+            p.send_signal(signal.SIGINT)   # uvicorn runs shutdown hooks on SIGINT
+    end = time.time() + timeout
+    for p in procs:
+        try:
+            p.wait(max(0.1, end - time.time()))
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, default=3)
+    ap.add_argument("--base-port", type=int, default=8001)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--storage", choices=["mongo", "sqlite", "memory"], help="default: config.backend.storage")
+    args = ap.parse_args()
+
+    workers, procs = start(args.workers, args.base_port, args.host, args.storage)
+    print("[CLUSTER] workers:", " ".join(workers))
+    try:
+        while all(p.poll() is None for p in procs):
+            time.sleep(0.5)
+        print("[CLUSTER] a worker exited, stopping the rest")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop(procs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+# backend/eventlog.py
+"""Append-only, segmented on-disk event log between ingest and its consumers.
+
+    data/eventlog/00000000000000000000.log   segment, named by its base offset
+    data/eventlog/00000000000067108934.log
+    data/eventlog/offsets/<consumer>          committed offset per consumer
+
+A record is <length u32><crc32 u32><payload>; its offset is its byte
+position in the whole log (segment base + position), so any offset maps to a
+segment and a seek without an index. `append()` is one write(2) under a lock;
+a flusher thread fsyncs at most every `fsync_interval` and every appender
+that asked for durability waits for that one fsync (group commit), so N
+concurrent requests cost one disk flush, not N.
+
+Readers see only fsynced records and read segments through mmap (no read(2)
+copies, the page cache serves every consumer). Each Consumer runs its own
+thread, hands batches to its handler and then commits its next offset
+atomically, so consumers are at-least-once, independent of each other and
+of ingest, and can be rewound for replay:
+
+    python backend/eventlog.py info  [--dir data/eventlog]
+    python backend/eventlog.py reset storage 0            # replay everything into storage
+
+Segments every consumer has passed are deleted once more than
+`retain_segments` exist. On open, a torn record at the tail (crash during a
+write) is truncated away.
+"""
+import argparse, bisect, glob, mmap, os, struct, sys, threading, time, zlib
+from typing import Callable, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.metrics import EVENTLOG_LAG
+
+SEGMENT_BYTES = 64 << 20
+FSYNC_INTERVAL = 0.005       # seconds an fsync waits for more appends to share it
+RETAIN_SEGMENTS = 8
+CONSUMER_BATCH = 500
+
+_HEADER = struct.Struct("<II")
+
+
+def _segment_name(base: int) -> str:
+    return f"{base:020d}.log"
+
+
+class EventLog:
+    def __init__(self, path: str, segment_bytes: int = SEGMENT_BYTES, fsync_interval: float = FSYNC_INTERVAL,
+                 retain_segments: int = RETAIN_SEGMENTS):
+        self.path, self.segment_bytes = path, segment_bytes
+        self.fsync_interval, self.retain_segments = fsync_interval, retain_segments
+        os.makedirs(os.path.join(path, "offsets"), exist_ok=True)
+        self._lock = threading.Lock()            # appends + segment roll
+        self._synced_cond = threading.Condition()
+        self._dirty = threading.Event()
+        self._stopping = False
+        self._retired: List[int] = []
+        self.bases = sorted(int(os.path.basename(p)[:-4]) for p in glob.glob(os.path.join(path, "*.log")))
+        if not self.bases:
+            self.bases = [0]
+        self._open_active(self.bases[-1])
+        self.synced = self.end                   # readers' high-water mark
+        self.consumers: List["Consumer"] = []
+        self._flusher = threading.Thread(target=self._flush_loop, name="eventlog-fsync", daemon=True)
+        self._flusher.start()
+
+    def _segment_path(self, base):
+        return os.path.join(self.path, _segment_name(base))
+
+    def _open_active(self, base):
+        self._fd = os.open(self._segment_path(base), os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        size = self._recover(self._fd)
+        self._base, self._size = base, size
+        self.end = base + size
+
+    @staticmethod
+    def _recover(fd) -> int:
+        """Length of the valid prefix of a segment; a torn tail is cut off."""
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return 0
+        with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as m:
+            pos = 0
+            while pos + _HEADER.size <= size:
+                length, crc = _HEADER.unpack_from(m, pos)
+                end = pos + _HEADER.size + length
+                if end > size or zlib.crc32(m[pos + _HEADER.size:end]) != crc:
+                    break
+                pos = end
+        if pos != size:
+            print(f"[EVENTLOG] truncating torn tail: {size - pos} bytes")
+            os.ftruncate(fd, pos)
+        return pos
+
+    # --- writers ---
+    def append(self, payload: bytes, durable: bool = True) -> int:
+        """Offset of the new record; with durable=True returns once it is fsynced."""
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._size and self._size + len(record) > self.segment_bytes:
+                self._roll()
+            offset = self.end
+            os.write(self._fd, record)
+            self._size += len(record)
+            self.end += len(record)
+        self._dirty.set()
+        if durable:
+            with self._synced_cond:
+                while self.synced <= offset and not self._stopping:
+                    self._synced_cond.wait(1.0)
+        return offset
+
+    def _roll(self):
+        os.fsync(self._fd)
+        self._retired.append(self._fd)   # the flusher may still be fsyncing it; it closes it after
+        self.bases.append(self.end)
+        self._open_active(self.end)
+        self._trim()
+
+    def _flush_loop(self):
+        while not self._stopping:
+            self._dirty.wait()
+            time.sleep(self.fsync_interval)   # linger: let concurrent appends share this fsync
+            self._dirty.clear()
+            with self._lock:
+                fd, end = self._fd, self.end
+            os.fsync(fd)   # outside the lock: appends continue during the flush
+            with self._lock:
+                retired, self._retired = self._retired, []
+            for old in retired:
+                os.close(old)
+            with self._synced_cond:
+                self.synced = max(self.synced, end)
+                self._synced_cond.notify_all()
+
+    def wait_for(self, offset: int, timeout: float) -> bool:
+        """Block until a record at `offset` is readable (or timeout)."""
+        with self._synced_cond:
+            if self.synced <= offset:
+                self._synced_cond.wait(timeout)
+            return self.synced > offset
+
+    def _trim(self):
+        committed = min((c.offset for c in self.consumers), default=self.end)
+        while len(self.bases) > self.retain_segments and self.bases[1] <= committed:
+            base = self.bases.pop(0)
+            os.remove(self._segment_path(base))
+
+    def close(self):
+        for c in list(self.consumers):
+            c.stop()
+        self._stopping = True
+        self._dirty.set()
+        self._flusher.join(timeout=5)
+        with self._lock:
+            os.fsync(self._fd)
+            for fd in self._retired + [self._fd]:
+                os.close(fd)
+            self._retired = []
+        with self._synced_cond:
+            self.synced = self.end
+            self._synced_cond.notify_all()
+
+    # --- readers ---
+    def reader(self, offset: int = 0) -> "LogReader":
+        return LogReader(self, offset)
+
+    def consumer(self, name: str, handler: Callable[[List[Tuple[int, bytes]]], None],
+                 batch: int = CONSUMER_BATCH) -> "Consumer":
+        c = Consumer(self, name, handler, batch)
+        self.consumers.append(c)
+        return c
+
+
+class LogReader:
+    """Sequential mmap reader from an offset; only returns fsynced records."""
+
+    def __init__(self, log: EventLog, offset: int = 0):
+        self.log = log
+        self.offset = max(offset, log.bases[0])   # older segments were trimmed
+        self._base = None
+        self._map = None
+        self._mapped = 0
+
+    def _remap(self, base):
+        self.close()
+        with open(self.log._segment_path(base), "rb") as f:
+            size = os.fstat(f.fileno()).st_size   # >= the synced part the caller needs
+            self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._base, self._mapped = base, size
+
+    def read(self, max_records: int = CONSUMER_BATCH) -> List[Tuple[int, bytes]]:
+        out = []
+        while len(out) < max_records:
+            synced = self.log.synced
+            if self.offset >= synced:
+                break
+            bases = list(self.log.bases)   # snapshot: the writer appends/trims concurrently
+            i = bisect.bisect_right(bases, self.offset) - 1
+            base = bases[i]
+            limit = (bases[i + 1] if i + 1 < len(bases) else synced) - base
+            if base != self._base or self._mapped < limit:
+                self._remap(base)
+            pos = self.offset - base
+            length, _ = _HEADER.unpack_from(self._map, pos)
+            start = pos + _HEADER.size
+            out.append((self.offset, self._map[start:start + length]))
+            self.offset = base + start + length   # a rolled segment ends exactly at the next base
+        return out
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._base, self._mapped = None, 0
+
+
+class Consumer:
+    """Tails the log on its own thread: handler(batch) then commit the next offset."""
+
+    def __init__(self, log: EventLog, name: str, handler, batch: int = CONSUMER_BATCH):
+        self.log, self.name, self.handler, self.batch = log, name, handler, batch
+        self._offset_path = os.path.join(log.path, "offsets", name)
+        self.offset = read_offset(log.path, name)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _commit(self, offset):
+        tmp = self._offset_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._offset_path)
+        self.offset = offset
+
+    def _run(self):
+        reader = self.log.reader(self.offset)
+        while not self._stop.is_set():
+            batch = reader.read(self.batch)
+            if not batch:
+                EVENTLOG_LAG.labels(self.name).set(0)
+                self.log.wait_for(reader.offset, 0.5)
+                continue
+            try:
+                self.handler(batch)
+            except Exception as e:   # keep the offset: the batch is retried
+                print(f"[EVENTLOG] consumer {self.name} failed, retrying: {e}")
+                reader.close()
+                reader = self.log.reader(self.offset)
+                self._stop.wait(1.0)
+                continue
+            self._commit(reader.offset)
+            EVENTLOG_LAG.labels(self.name).set(self.log.synced - reader.offset)
+        reader.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"eventlog-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Finish the batch in hand and commit; the rest is picked up after restart."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def read_offset(path: str, name: str) -> int:
+    try:
+        with open(os.path.join(path, "offsets", name)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("command", choices=["info", "reset"])
+    ap.add_argument("consumer", nargs="?")
+    ap.add_argument("offset", nargs="?", type=int, default=0)
+    ap.add_argument("--dir", default="data/eventlog")
+    args = ap.parse_args()
+
+    if args.command == "reset":
+        if not args.consumer:
+            ap.error("reset needs a consumer name")
+        os.makedirs(os.path.join(args.dir, "offsets"), exist_ok=True)
+        with open(os.path.join(args.dir, "offsets", args.consumer), "w") as f:
+            f.write(str(args.offset))
+        print(f"{args.consumer} -> {args.offset} (takes effect when the backend restarts)")
+        return
+    segments = sorted(glob.glob(os.path.join(args.dir, "*.log")))
+    end = 0
+    for p in segments:
+        size = os.path.getsize(p)
+        end = int(os.path.basename(p)[:-4]) + size
+        print(f"{os.path.basename(p)}  {size / 1e6:8.1f} MB")
+    print(f"end offset {end}")
+    for p in sorted(glob.glob(os.path.join(args.dir, "offsets", "*"))):
+        name = os.path.basename(p)
+        if not name.endswith(".tmp"):
+            off = read_offset(args.dir, name)
+            print(f"consumer {name:<12} offset {off:<14} lag {(end - off) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
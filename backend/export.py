@@ -0,0 +1,220 @@
+# backend/export.py
+"""Columnar detection history: Parquet partitions written from the ingest path.
+
+Every detection box becomes one row (ts, cls, conf, x1, y1, x2, y2) under a
+hive-style partition per junction and UTC day:
+
+    data/parquet/junction_id=J1/date=2026-10-18/part-<ms>-<pid>.parquet
+
+ParquetExporter.add() only appends to per-partition column lists; a
+background thread writes a new part file every flush_interval seconds or
+flush_rows rows, so ingest never waits on Parquet encoding. `compact()`
+merges the parts of finished days into one file (run it daily):
+
+    python backend/export.py compact [--root data/parquet]
+
+query_batches() reads through pyarrow.dataset, so junction/day filters prune
+whole directories and class/time filters are checked against row-group
+statistics before any data is decoded; GET /export streams the result as
+Arrow IPC. Frames without boxes produce no rows.
+"""
+import argparse, glob, os, threading, time
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:   # optional: without it the backend runs with /export disabled
+    pa = ds = pq = None
+
+PARQUET_DIR = "data/parquet"
+FLUSH_ROWS = 20000          # buffered boxes before an early flush
+FLUSH_INTERVAL = 60.0       # seconds; also the most an export can lag ingest
+COMPRESSION = "zstd"
+COLUMNS = ["ts", "cls", "conf", "x1", "y1", "x2", "y2"]
+
+
+def schema():
+    return pa.schema([("ts", pa.timestamp("us")), ("cls", pa.int16()), ("conf", pa.float32()),
+                      ("x1", pa.float32()), ("y1", pa.float32()), ("x2", pa.float32()), ("y2", pa.float32())])
+
+
+def partition_schema():
+    return pa.schema([("junction_id", pa.string()), ("date", pa.string())])
+
+
+class _Buffer:
+    __slots__ = ("ts", "cls", "conf", "xyxy")
+
+    def __init__(self):
+        self.ts, self.cls, self.conf, self.xyxy = [], [], [], []
+
+
+class ParquetExporter:
+    def __init__(self, root: str = PARQUET_DIR, flush_rows: int = FLUSH_ROWS,
+                 flush_interval: float = FLUSH_INTERVAL):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed")
+        self.root, self.flush_rows, self.flush_interval = root, flush_rows, flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffers = defaultdict(_Buffer)   # (junction_id, date) -> columns
+        self._rows = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._seq = 0
+        os.makedirs(root, exist_ok=True)
+
+    def add(self, junction_id: str, ts: float, detections: List[dict]):
+        """Queue one payload's boxes (dicts with cls/conf/xyxy)."""
+        if not detections:
+            return
+        day = datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d")
+        with self._lock:
+            buf = self._buffers[(junction_id, day)]
+            buf.ts.extend([ts] * len(detections))
+            for d in detections:
+                buf.cls.append(d["cls"])
+                buf.conf.append(d["conf"])
+                buf.xyxy.append(d["xyxy"][:4])
+            self._rows += len(detections)
+            full = self._rows >= self.flush_rows
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every buffered partition as a new part file; returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                buffers, self._buffers = self._buffers, defaultdict(_Buffer)
+                self._rows = 0
+            written = 0
+            for (jid, day), buf in buffers.items():
+                self._write(jid, day, buf)
+                written += len(buf.ts)
+            return written
+
+    def _write(self, junction_id, day, buf):
+        ts = (np.asarray(buf.ts, np.float64) * 1e6).astype(np.int64)
+        order = np.argsort(ts, kind="stable")   # sorted ts -> tight row-group min/max for time filters
+        xyxy = np.asarray(buf.xyxy, np.float32).reshape(-1, 4)[order]
+        table = pa.Table.from_arrays(
+            [pa.array(ts[order], pa.timestamp("us")),
+             pa.array(np.asarray(buf.cls, np.int16)[order]),
+             pa.array(np.asarray(buf.conf, np.float32)[order]),
+             *(pa.array(xyxy[:, i]) for i in range(4))], schema=schema())
+        part_dir = os.path.join(self.root, f"junction_id={junction_id}", f"date={day}")
+        os.makedirs(part_dir, exist_ok=True)
+        self._seq += 1
+        path = os.path.join(part_dir, f"part-{int(time.time() * 1000)}-{os.getpid()}-{self._seq}.parquet")
+        pq.write_table(table, path + ".tmp", compression=COMPRESSION)
+        os.replace(path + ".tmp", path)   # readers glob *.parquet, never a half-written file
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print("[EXPORT] parquet flush failed:", e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="parquet-export", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        self.flush()
+
+
+def _filter(start: Optional[datetime], end: Optional[datetime], junctions: Optional[Iterable[str]],
+            classes: Optional[Iterable[int]]):
+    expr = None
+
+    def both(e):
+        return e if expr is None else expr & e
+
+    if junctions:
+        expr = both(ds.field("junction_id").isin(list(junctions)))
+    # the date partition prunes whole days, the ts bound the rows inside them
+    if start is not None:
+        expr = both((ds.field("date") >= start.strftime("%Y-%m-%d"))
+                    & (ds.field("ts") >= pa.scalar(start, pa.timestamp("us"))))
+    if end is not None:
+        expr = both((ds.field("date") <= end.strftime("%Y-%m-%d"))
+                    & (ds.field("ts") < pa.scalar(end, pa.timestamp("us"))))
+    if classes:
+        expr = both(ds.field("cls").isin([int(c) for c in classes]))
+    return expr
+
+
+def dataset(root: str = PARQUET_DIR):
+    # explicit file list: skips the .tmp files of a flush in progress
+    files = glob.glob(os.path.join(root, "junction_id=*", "date=*", "*.parquet"))
+    full = pa.schema(list(schema()) + list(partition_schema()))
+    return ds.dataset(files, schema=full, format="parquet", partition_base_dir=root,
+                      partitioning=ds.partitioning(partition_schema(), flavor="hive"))
+
+
+def query_batches(root: str = PARQUET_DIR, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  junctions: Optional[Iterable[str]] = None, classes: Optional[Iterable[int]] = None,
+                  columns: Optional[List[str]] = None, batch_size: int = 65536):
+    """(arrow schema, iterator of RecordBatches) for boxes with start <= ts < end."""
+    data = dataset(root)
+    cols = (columns or COLUMNS) + ["junction_id"]
+    scanner = data.scanner(columns=cols, filter=_filter(start, end, junctions, classes), batch_size=batch_size)
+    return scanner.projected_schema, scanner.to_batches()
+
+
+def arrow_stream(schema_, batches) -> Iterable[bytes]:
+    """Arrow IPC stream bytes: the schema message, one message per batch, then the end marker."""
+    yield schema_.serialize().to_pybytes()
+    for batch in batches:
+        if batch.num_rows:
+            yield batch.serialize().to_pybytes()
+    yield b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def compact(root: str = PARQUET_DIR, before: Optional[str] = None) -> int:
+    """Merge the part files of each day before `before` (default: today, UTC); returns days merged."""
+    before = before or datetime.utcnow().strftime("%Y-%m-%d")
+    merged = 0
+    for part_dir in sorted(glob.glob(os.path.join(root, "junction_id=*", "date=*"))):
+        day = os.path.basename(part_dir).split("=", 1)[1]
+        parts = sorted(glob.glob(os.path.join(part_dir, "*.parquet")))   # incl. an earlier day file
+        if day >= before or len(parts) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(p, schema=schema()) for p in parts]).sort_by("ts")
+        path = os.path.join(part_dir, f"day-{day}.parquet")
+        pq.write_table(table, path + ".tmp", compression=COMPRESSION)
+        os.replace(path + ".tmp", path)
+        for p in parts:
+            if p != path:
+                os.remove(p)
+        merged += 1
+    return merged
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("command", choices=["compact"])
+    ap.add_argument("--root", default=PARQUET_DIR)
+    ap.add_argument("--before", help="merge days before this YYYY-MM-DD (default: today, UTC)")
+    args = ap.parse_args()
+    print(f"[EXPORT] compacted {compact(args.root, args.before)} day partitions")
+
+
+if __name__ == "__main__":
+    main()
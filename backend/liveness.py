@@ -0,0 +1,147 @@
+# backend/liveness.py
+"""Junction liveness tracked from heartbeats, independent of who is reading /status.
+
+Each heartbeat pushes the junction's next deadline onto a min-heap (O(log n));
+a background thread sleeps until the earliest deadline and walks the junction
+OK -> DEGRADED -> OFFLINE. Superseded heap entries are skipped lazily by a
+per-junction generation number. Every state change is published exactly once
+to the subscribers (alerts, the /liveness/events feed); /status reads the
+in-memory table and never touches the database.
+"""
+import heapq, threading, time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+DEGRADED_AFTER = 15.0   # seconds without a heartbeat
+OFFLINE_AFTER = 45.0
+EVENTS_KEPT = 500
+
+OK, DEGRADED, OFFLINE = "OK", "DEGRADED", "OFFLINE"
+
+
+class _Junction:
+    __slots__ = ("state", "last_seen", "last_mono", "metrics", "gen")
+
+    def __init__(self):
+        self.state: Optional[str] = None   # None until the first heartbeat
+        self.last_seen: Optional[datetime] = None
+        self.last_mono = 0.0
+        self.metrics: dict = {}
+        self.gen = 0
+
+
+class LivenessMonitor:
+    def __init__(self, degraded_after: float = DEGRADED_AFTER, offline_after: float = OFFLINE_AFTER):
+        self.degraded_after, self.offline_after = degraded_after, offline_after
+        self._junctions: Dict[str, _Junction] = {}
+        self._heap: List[tuple] = []   # (deadline_monotonic, gen, junction_id)
+        self._cond = threading.Condition()
+        self._subscribers: List[Callable[[dict], None]] = []
+        self.events = deque(maxlen=EVENTS_KEPT)
+        self._thread = None
+        self._stopping = False
+
+    def subscribe(self, fn: Callable[[dict], None]):
+        """fn(event) for every transition; called on the monitor thread, keep it cheap."""
+        self._subscribers.append(fn)
+
+    # --- writers ---
+    def beat(self, junction_id: str, metrics: dict):
+        now = time.monotonic()
+        with self._cond:
+            j = self._junctions.get(junction_id)
+            if j is None:
+                j = self._junctions[junction_id] = _Junction()
+            j.last_seen, j.last_mono, j.metrics = datetime.utcnow(), now, metrics
+            j.gen += 1
+            heapq.heappush(self._heap, (now + self.degraded_after, j.gen, junction_id))
+            event = self._transition(junction_id, j, OK) if j.state != OK else None
+            if self._heap[0][2] == junction_id:
+                self._cond.notify()
+        if event:
+            self._publish(event)
+
+    def seed(self, junction_id: str, last_seen: datetime, metrics: dict):
+        """Restore state from storage at startup without publishing transitions."""
+        age = max(0.0, (datetime.utcnow() - last_seen).total_seconds())
+        now = time.monotonic()
+        with self._cond:
+            j = self._junctions.setdefault(junction_id, _Junction())
+            j.last_seen, j.last_mono, j.metrics = last_seen, now - age, metrics
+            j.gen += 1
+            if age < self.degraded_after:
+                j.state = OK
+                heapq.heappush(self._heap, (j.last_mono + self.degraded_after, j.gen, junction_id))
+            elif age < self.offline_after:
+                j.state = DEGRADED
+                heapq.heappush(self._heap, (j.last_mono + self.offline_after, j.gen, junction_id))
+            else:
+                j.state = OFFLINE
+            self._cond.notify()
+
+    def _transition(self, junction_id, j, new_state):
+        event = {"junction_id": junction_id, "from": j.state, "to": new_state,
+                 "ts": datetime.utcnow().isoformat(),
+                 "last_seen": j.last_seen.isoformat() if j.last_seen else None}
+        j.state = new_state
+        self.events.append(event)
+        return event
+
+    def _publish(self, event):
+        for fn in self._subscribers:
+            try:
+                fn(event)
+            except Exception as e:
+                print("[LIVENESS] subscriber failed:", e)
+
+    # --- background thread ---
+    def _run(self):
+        while True:
+            events = []
+            with self._cond:
+                if self._stopping:
+                    return
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    _, gen, jid = heapq.heappop(self._heap)
+                    j = self._junctions[jid]
+                    if gen != j.gen:
+                        continue   # a newer heartbeat superseded this deadline
+                    if j.state == OK:
+                        events.append(self._transition(jid, j, DEGRADED))
+                        heapq.heappush(self._heap, (j.last_mono + self.offline_after, gen, jid))
+                    elif j.state == DEGRADED:
+                        events.append(self._transition(jid, j, OFFLINE))
+                if not events:
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+            for e in events:
+                self._publish(e)
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="liveness", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    # --- readers ---
+    def status(self, junction_id: str) -> dict:
+        with self._cond:
+            j = self._junctions.get(junction_id)
+            if j is None or j.state is None:
+                return {"junction_id": junction_id, "status": OFFLINE, "last_seen": None, "metrics": {}}
+            return {"junction_id": junction_id, "status": j.state,
+                    "last_seen": j.last_seen.isoformat(), "metrics": dict(j.metrics)}
+
+    def all_states(self) -> Dict[str, str]:
+        with self._cond:
+            return {jid: j.state for jid, j in self._junctions.items()}
@@ -0,0 +1,43 @@
+# backend/metrics.py
+"""Backend metric definitions and the pymongo command listener that times Mongo ops."""
+from pymongo import monitoring
+from common.metrics import REGISTRY
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "smartflow_http_request_seconds", "HTTP request latency by route", ["method", "route"])
+REQUESTS = REGISTRY.counter(
+    "smartflow_http_requests", "HTTP requests by route and status", ["method", "route", "status"])
+MONGO_LATENCY = REGISTRY.histogram(
+    "smartflow_mongo_op_seconds", "Mongo command latency", ["command", "collection"])
+MONGO_FAILURES = REGISTRY.counter(
+    "smartflow_mongo_op_failures", "Failed Mongo commands", ["command", "collection"])
+INGESTED = REGISTRY.counter(
+    "smartflow_detections_ingested", "Detection payloads ingested per junction", ["junction_id"])
+INGESTED_BOXES = REGISTRY.counter(
+    "smartflow_detection_boxes_ingested", "Detection boxes ingested per junction", ["junction_id"])
+FORWARDED = REGISTRY.counter(
+    "smartflow_shard_forwarded", "Requests forwarded to the owning worker", ["owner", "status"])
+EVENTLOG_LAG = REGISTRY.gauge(
+    "smartflow_eventlog_consumer_lag_bytes", "Event log bytes not yet processed per consumer", ["consumer"])
+WRITE_BUFFER_DEPTH = REGISTRY.gauge(
+    "smartflow_write_buffer_depth", "Writes accepted but not yet acknowledged by storage")
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every command on the client it is registered with."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        coll = event.command.get(event.command_name)
+        self._pending[event.request_id] = coll if isinstance(coll, str) else ""
+
+    def succeeded(self, event):
+        coll = self._pending.pop(event.request_id, "")
+        MONGO_LATENCY.labels(event.command_name, coll).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        coll = self._pending.pop(event.request_id, "")
+        MONGO_LATENCY.labels(event.command_name, coll).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(event.command_name, coll).inc()
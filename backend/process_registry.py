@@ -0,0 +1,53 @@
+# backend/process_registry.py
+"""In-memory table of edge process states, fed by supervisor reports.
+
+Edge supervisors POST lifecycle events (started / alive / exited / restarted /
+critical) to /process_status; reads are a dict lookup. An entry that has not
+been reported for `stale_after` seconds is served with status "stale", since
+the supervisor (or the whole junction) has stopped talking to us.
+"""
+import threading, time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+STALE_AFTER = 30.0   # 3 missed supervisor reports at the 10 s default interval
+
+
+class ProcessRegistry:
+    def __init__(self, stale_after: float = STALE_AFTER):
+        self.stale_after = stale_after
+        self._by_junction: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def report(self, junction_id: str, process: str, status: str, pid: Optional[int] = None,
+               event: Optional[str] = None, ts: Optional[datetime] = None, **extra) -> dict:
+        rec = {"process": process, "status": status, "pid": pid, "event": event,
+               "ts": ts or datetime.utcnow(), "seen": time.time()}
+        rec.update(extra)
+        with self._lock:
+            self._by_junction.setdefault(junction_id, {})[process] = rec
+        return rec
+
+    def load(self, docs):
+        """Warm the table from persisted rows (e.g. processes_col) at startup."""
+        for d in docs:
+            ts = d.get("ts") if isinstance(d.get("ts"), datetime) else None
+            rec = self.report(d.get("junction_id", "unknown"), d.get("process", "unknown"),
+                              d.get("status", "unknown"), pid=d.get("pid"), event=d.get("event"), ts=ts)
+            # age the entry by its stored timestamp so old rows come back stale
+            if ts is not None:
+                rec["seen"] = time.time() - (datetime.utcnow() - ts).total_seconds()
+
+    def snapshot(self, junction_id: str) -> List[dict]:
+        now = time.time()
+        with self._lock:
+            procs = list(self._by_junction.get(junction_id, {}).values())
+        out = []
+        for rec in procs:
+            age = now - rec["seen"]
+            stale = age > self.stale_after
+            item = {k: v for k, v in rec.items() if k != "seen"}
+            item.update(status="stale" if stale else rec["status"], last_status=rec["status"],
+                        stale=stale, age_s=round(age, 1))
+            out.append(item)
+        return out
@@ -0,0 +1,125 @@
+# backend/shard.py
+"""Junction sharding across backend workers.
+
+Everything stateful in backend/main.py is keyed by junction: the liveness
+deadlines, the process registry, the /latest cache of the SQLite store, the
+Parquet buffers and the alert dedup windows. With several workers each
+junction is owned by exactly one of them, picked by consistent hashing of
+the junction id over config.backend.workers; a worker that receives a
+request for a junction it doesn't own forwards it to the owner unchanged
+and relays the answer. Adding a worker moves only ~1/N of the junctions.
+
+    backend.workers   ["http://10.0.0.5:8000", "http://10.0.0.6:8000", ...]
+    backend.self_url  this worker's entry in that list
+
+An empty `workers` list is single-node mode: nothing is hashed or forwarded.
+If the owner is unreachable the request fails with 503 rather than being
+handled elsewhere, so no second worker starts tracking (and alerting on) a
+junction it doesn't own; the edge sender retries. backend/cluster.py runs a
+local cluster for testing.
+"""
+import bisect, hashlib, json, re
+from urllib.parse import quote
+from typing import List, Optional
+
+VNODES = 64                 # points per worker on the ring; evens out the split
+FORWARD_TIMEOUT = 5.0
+FORWARDED_HEADER = "x-smartflow-forwarded"
+
+# routes whose junction is in the path, and routes whose JSON body names it
+_PATH_JUNCTION = re.compile(r"^/(?:latest|history|status|process_status|alerts|clips)/([^/]+)$")
+_BODY_ROUTES = {"/detections", "/heartbeat", "/compute_timing", "/process_status", "/alert", "/clips"}
+# a regex over the raw body instead of json.loads: the owner parses it anyway
+_BODY_JUNCTION = re.compile(rb'"(?:junction_id|junction)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, nodes: List[str], vnodes: int = VNODES):
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._keys = [h for h, _ in points]
+        self._owners = [n for _, n in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[i]
+
+
+class ShardRouter:
+    """Decides per request whether this worker serves it or which peer does."""
+
+    def __init__(self, workers: List[str], self_url: str):
+        self.workers = [w.rstrip("/") for w in workers]
+        self.self_url = self_url.rstrip("/")
+        if self.workers and self.self_url not in self.workers:
+            raise ValueError(f"backend.self_url {self_url!r} is not one of backend.workers")
+        self.ring = HashRing(self.workers)
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.workers) > 1
+
+    def owns(self, junction_id: str) -> bool:
+        return not self.enabled or self.ring.owner(junction_id) == self.self_url
+
+    @staticmethod
+    def junction_of(path: str, body: bytes) -> Optional[str]:
+        m = _PATH_JUNCTION.match(path)
+        if m:
+            return m.group(1)
+        if path in _BODY_ROUTES and body:
+            m = _BODY_JUNCTION.search(body)
+            if m:
+                return m.group(1).decode()
+        return None
+
+    def needs_body(self, method: str, path: str) -> bool:
+        return self.enabled and method == "POST" and path in _BODY_ROUTES
+
+    def route(self, path: str, body: bytes = b"") -> Optional[str]:
+        """Owner URL when the request belongs to another worker, else None (serve here)."""
+        if not self.enabled:
+            return None
+        jid = self.junction_of(path, body)
+        if jid is None:
+            return None
+        owner = self.ring.owner(jid)
+        return None if owner == self.self_url else owner
+
+    async def forward(self, owner: str, method: str, path: str, query: str, headers, body: bytes):
+        """(status, content-type, content) from the owner; 503 if it can't be reached."""
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=FORWARD_TIMEOUT)
+        fwd = {k: v for k, v in headers.items() if k.lower() in ("content-type", "accept")}
+        fwd[FORWARDED_HEADER] = self.self_url
+        url = f"{owner}{quote(path)}" + (f"?{query}" if query else "")
+        try:
+            r = await self._client.request(method, url, content=body, headers=fwd)
+        except Exception as e:
+            print(f"[SHARD] {method} {path} -> {owner} failed: {e}")
+            return 503, "application/json", b'{"detail": "owner worker unreachable"}'
+        return r.status_code, r.headers.get("content-type", "application/json"), r.content
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def gather(self, path: str, method: str = "GET") -> List[dict]:
+        """`method` `path` on every other worker (cluster-wide views); unreachable peers are skipped."""
+        out = []
+        for w in self.workers:
+            if w == self.self_url:
+                continue
+            status, _, content = await self.forward(w, method, path, "", {}, b"")
+            if status == 200:
+                out.append(json.loads(content))
+        return out
@@ -1,21 +1,33 @@
 from twilio.rest import Client
+from common import config
 
-# --- Twilio Config ---
-TWILIO_SID = "USd74d3ab8f40e686a6a55813da93d3584"
-TWILIO_AUTH = "AC3193a9187b53c7b58716e5c848696a17:e487db6481163283c50893afac464f3f"
-TWILIO_PHONE = "+16067555896"    # Twilio trial number
-ALERT_PHONE = "+918409323793"   # Your verified number
+# --- Twilio Config (config.alerts; set SMARTFLOW_ALERTS_TWILIO_AUTH etc. in production) ---
+_CFG = config.get().alerts
+TWILIO_SID = _CFG.twilio_sid
+TWILIO_AUTH = _CFG.twilio_auth
+TWILIO_PHONE = _CFG.twilio_phone        # Twilio trial number
+ALERT_PHONE = _CFG.alert_phone          # Your verified number
+ESCALATION_PHONES = _CFG.escalation_phones   # extra numbers for tier >= 1 alerts (see backend/alerts.py)
 
-client_sms = Client(TWILIO_SID, TWILIO_AUTH)
+_client_sms = None
+
+def _client():
+    """Created on first send so importing this module never touches Twilio"""
+    global _client_sms
+    if _client_sms is None:
+        if not (TWILIO_SID and TWILIO_AUTH):
+            raise RuntimeError("Twilio credentials not configured (alerts.twilio_sid / alerts.twilio_auth)")
+        _client_sms = Client(TWILIO_SID, TWILIO_AUTH)
+    return _client_sms
+
+def send_sms(message: str, to: str = ALERT_PHONE):
+    """Send one SMS; raises on failure (the alert dispatcher counts and logs it)"""
+    _client().messages.create(body=message, from_=TWILIO_PHONE, to=to)
+    print("[SMS SENT]", message)
 
 def send_alert_sms(message: str):
     """Send SMS alert using Twilio"""
     try:
-        client_sms.messages.create(
-            body=message,
-            from_=TWILIO_PHONE,
-            to=ALERT_PHONE
-        )
-        print("[SMS SENT]", message)
+        send_sms(message)
     except Exception as e:
         print("[SMS FAILED]", e)
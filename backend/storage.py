@@ -0,0 +1,463 @@
+# backend/storage.py
+"""Storage engines behind the backend routes.
+
+    MongoStore    the original deployment: one Mongo collection per record kind
+    SQLiteStore   embedded file, WAL mode; writes are queued and committed in
+                  batches by one writer thread
+    MemoryStore   plain dicts/deques, nothing persisted (tests, benchmarks)
+
+All three take and return the same plain dicts, with `ts` as a naive UTC
+datetime, so the routes never see which one is in use. `open_store(cfg)`
+picks the engine from config.backend.storage and falls back to
+`storage_fallback` when Mongo can't be reached, so a backend without a
+Mongo server still serves every route instead of answering 500.
+
+WRITE_BUFFER_DEPTH counts writes accepted but not yet committed: around the
+insert call for Mongo, from enqueue to commit for SQLite.
+"""
+import json, os, queue, sqlite3, threading, time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.metrics import WRITE_BUFFER_DEPTH
+
+SQLITE_BATCH = 500            # rows per transaction at most
+SQLITE_FLUSH_INTERVAL = 0.05  # seconds a write may wait for more rows to batch with
+SQLITE_QUEUE_MAX = 20000      # pending writes before inserts block (backpressure)
+MEMORY_KEEP = 100000          # records kept per junction and kind by MemoryStore
+HEARTBEAT_SEED_DAYS = 7       # Mongo: heartbeats scanned when the latest-per-junction collection is empty
+
+
+def _epoch(ts: datetime) -> float:
+    return (ts - datetime(1970, 1, 1)).total_seconds()
+
+
+def _from_epoch(ts: float) -> datetime:
+    return datetime.utcfromtimestamp(ts)
+
+
+class Store(ABC):
+    """Interface shared by the engines; `name` shows up in logs and /.
+
+    Every method but close() is abstract, so an engine that misses one
+    fails when it is constructed, not on the first request that needs it.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def insert_detection(self, doc: dict): ...
+
+    @abstractmethod
+    def latest_detection(self, junction_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def detection_history(self, junction_id: str, since: Optional[datetime], limit: int) -> List[dict]:
+        """[{ts, counts}] oldest first: the newest `limit` points after `since`."""
+
+    @abstractmethod
+    def insert_heartbeat(self, doc: dict): ...
+
+    @abstractmethod
+    def latest_heartbeats(self) -> Iterable[dict]:
+        """Newest heartbeat of every junction (liveness seeding at startup)."""
+
+    @abstractmethod
+    def insert_timing(self, doc: dict): ...
+
+    @abstractmethod
+    def upsert_process(self, junction_id: str, process: str, fields: dict): ...
+
+    @abstractmethod
+    def processes(self) -> Iterable[dict]: ...
+
+    @abstractmethod
+    def insert_alert(self, doc: dict): ...
+
+    @abstractmethod
+    def recent_alerts(self, junction_id: str, limit: int = 20) -> List[dict]: ...
+
+    @abstractmethod
+    def insert_clip(self, doc: dict): ...
+
+    @abstractmethod
+    def recent_clips(self, junction_id: str, limit: int = 20) -> List[dict]: ...
+
+    def close(self):
+        pass
+
+
+class MongoStore(Store):
+    name = "mongo"
+
+    def __init__(self, uri: str, db_name: str, timeout_ms: int = 2000):
+        from pymongo import MongoClient
+        from backend.metrics import MongoCommandTimer
+        self.client = MongoClient(uri, serverSelectionTimeoutMS=timeout_ms,
+                                  event_listeners=[MongoCommandTimer()])
+        self.client.server_info()   # raises ServerSelectionTimeoutError when unreachable
+        db = self.client[db_name]
+        self.detections, self.timings, self.heartbeats = db["detections"], db["timings"], db["heartbeats"]
+        self.alerts, self.procs, self.clips = db["alerts"], db["processes"], db["clips"]
+        self.last_heartbeats = db["last_heartbeats"]   # one doc per junction, upserted per heartbeat
+        # same (junction_id, ts) indexes as the SQLite schema; a no-op when they exist
+        for col in (self.detections, self.heartbeats, self.alerts, self.clips):
+            col.create_index([("junction_id", 1), ("ts", -1)])
+
+    def _insert(self, col, doc):
+        WRITE_BUFFER_DEPTH.inc()
+        try:
+            col.insert_one(doc)
+        finally:
+            WRITE_BUFFER_DEPTH.dec()
+
+    def insert_detection(self, doc):
+        self._insert(self.detections, doc)
+
+    def latest_detection(self, junction_id):
+        return self.detections.find_one({"junction_id": junction_id}, sort=[("_id", -1)])
+
+    def detection_history(self, junction_id, since, limit):
+        query: Dict[str, Any] = {"junction_id": junction_id}
+        if since is not None:
+            query["ts"] = {"$gt": since}
+        docs = list(self.detections.find(query, {"_id": 0, "ts": 1, "counts": 1})
+                    .sort("ts", -1).limit(limit))
+        docs.reverse()
+        return docs
+
+    def insert_heartbeat(self, doc):
+        self._insert(self.heartbeats, doc)
+        latest = {k: v for k, v in doc.items() if k != "_id"}
+        self.last_heartbeats.replace_one({"junction_id": doc.get("junction_id")}, latest, upsert=True)
+
+    def latest_heartbeats(self):
+        rows = list(self.last_heartbeats.find({}, {"_id": 0}))
+        if rows:
+            return rows
+        # first start with last_heartbeats: recent history only, walked along the (junction_id, ts) index
+        since = datetime.utcnow() - timedelta(days=HEARTBEAT_SEED_DAYS)
+        rows = self.heartbeats.aggregate([{"$match": {"ts": {"$gte": since}}},
+                                          {"$sort": {"junction_id": 1, "ts": -1}},
+                                          {"$group": {"_id": "$junction_id", "hb": {"$first": "$$ROOT"}}}],
+                                         allowDiskUse=True)
+        return [row["hb"] for row in rows]
+
+    def insert_timing(self, doc):
+        self._insert(self.timings, doc)
+
+    def upsert_process(self, junction_id, process, fields):
+        self.procs.update_one({"junction_id": junction_id, "process": process},
+                              {"$set": fields}, upsert=True)
+
+    def processes(self):
+        return self.procs.find({})
+
+    def insert_alert(self, doc):
+        self._insert(self.alerts, doc)
+
+    def recent_alerts(self, junction_id, limit=20):
+        return list(self.alerts.find({"junction_id": junction_id}).sort("ts", -1).limit(limit))
+
+    def insert_clip(self, doc):
+        self._insert(self.clips, doc)
+
+    def recent_clips(self, junction_id, limit=20):
+        return list(self.clips.find({"junction_id": junction_id}, {"_id": 0}).sort("ts", -1).limit(limit))
+
+    def close(self):
+        self.client.close()
+
+
+class MemoryStore(Store):
+    name = "memory"
+
+    def __init__(self, keep: int = MEMORY_KEEP):
+        self._lock = threading.Lock()
+        new = lambda: defaultdict(lambda: deque(maxlen=keep))
+        self._detections, self._heartbeats, self._timings, self._alerts = new(), new(), new(), new()
+        self._clips = new()
+        self._procs: Dict[tuple, dict] = {}
+
+    def _append(self, table, doc):
+        with self._lock:
+            table[doc.get("junction_id")].append(dict(doc))
+
+    def insert_detection(self, doc):
+        self._append(self._detections, doc)
+
+    def latest_detection(self, junction_id):
+        rows = self._detections.get(junction_id)
+        return dict(rows[-1]) if rows else None
+
+    def detection_history(self, junction_id, since, limit):
+        with self._lock:
+            rows = list(self._detections.get(junction_id, ()))
+        points = [{"ts": d["ts"], "counts": d.get("counts", {})} for d in rows
+                  if since is None or d["ts"] > since]
+        points.sort(key=lambda d: d["ts"])
+        return points[-limit:]
+
+    def insert_heartbeat(self, doc):
+        self._append(self._heartbeats, doc)
+
+    def latest_heartbeats(self):
+        with self._lock:
+            return [max(rows, key=lambda d: d["ts"]) for rows in self._heartbeats.values() if rows]
+
+    def insert_timing(self, doc):
+        self._append(self._timings, doc)
+
+    def upsert_process(self, junction_id, process, fields):
+        with self._lock:
+            self._procs.setdefault((junction_id, process),
+                                   {"junction_id": junction_id, "process": process}).update(fields)
+
+    def processes(self):
+        with self._lock:
+            return [dict(d) for d in self._procs.values()]
+
+    def insert_alert(self, doc):
+        self._append(self._alerts, doc)
+
+    def recent_alerts(self, junction_id, limit=20):
+        with self._lock:
+            rows = list(self._alerts.get(junction_id, ()))
+        return sorted(rows, key=lambda d: d["ts"], reverse=True)[:limit]
+
+    def insert_clip(self, doc):
+        self._append(self._clips, doc)
+
+    def recent_clips(self, junction_id, limit=20):
+        with self._lock:
+            rows = list(self._clips.get(junction_id, ()))
+        return sorted(rows, key=lambda d: d["ts"], reverse=True)[:limit]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (id INTEGER PRIMARY KEY, junction_id TEXT, ts REAL,
+                                       counts TEXT, detections TEXT, queues TEXT);
+CREATE INDEX IF NOT EXISTS detections_jt ON detections (junction_id, ts);
+CREATE TABLE IF NOT EXISTS heartbeats (id INTEGER PRIMARY KEY, junction_id TEXT, ts REAL, doc TEXT);
+CREATE INDEX IF NOT EXISTS heartbeats_jt ON heartbeats (junction_id, ts);
+CREATE TABLE IF NOT EXISTS timings (id INTEGER PRIMARY KEY, junction_id TEXT, ts REAL, doc TEXT);
+CREATE TABLE IF NOT EXISTS alerts (id INTEGER PRIMARY KEY, junction_id TEXT, ts REAL, doc TEXT);
+CREATE INDEX IF NOT EXISTS alerts_jt ON alerts (junction_id, ts);
+CREATE TABLE IF NOT EXISTS clips (id INTEGER PRIMARY KEY, junction_id TEXT, ts REAL, doc TEXT);
+CREATE INDEX IF NOT EXISTS clips_jt ON clips (junction_id, ts);
+CREATE TABLE IF NOT EXISTS processes (junction_id TEXT, process TEXT, doc TEXT,
+                                      PRIMARY KEY (junction_id, process));
+"""
+
+
+def _doc_row(doc):
+    """(junction_id, ts epoch, json of the remaining fields) for the generic tables."""
+    rest = {k: v for k, v in doc.items() if k not in ("ts", "_id")}
+    return doc.get("junction_id"), _epoch(doc["ts"]), json.dumps(rest, default=str)
+
+
+def _row_doc(ts, doc):
+    d = json.loads(doc)
+    d["ts"] = _from_epoch(ts)
+    return d
+
+
+class SQLiteStore(Store):
+    """One writer thread commits queued rows in batches; readers use their own connections.
+
+    WAL lets reads run while a batch commits. A write is visible to readers
+    once its batch commits (within SQLITE_FLUSH_INTERVAL); the newest
+    detection per junction is also kept in memory so /latest is current
+    immediately.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, batch: int = SQLITE_BATCH, flush_interval: float = SQLITE_FLUSH_INTERVAL):
+        self.path, self.batch, self.flush_interval = path, batch, flush_interval
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        if "queues" not in {row[1] for row in conn.execute("PRAGMA table_info(detections)")}:
+            conn.execute("ALTER TABLE detections ADD COLUMN queues TEXT")   # files from before per-approach queues
+        conn.close()
+        self._local = threading.local()
+        self._latest: Dict[str, dict] = {}
+        self._queue: "queue.Queue" = queue.Queue(SQLITE_QUEUE_MAX)
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoints; a crash loses at most the last batch
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # --- writes ---
+    def _put(self, sql, params):
+        WRITE_BUFFER_DEPTH.inc()
+        self._queue.put((sql, params))
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                break
+        conn.close()
+
+    def _commit(self, conn, batch):
+        # consecutive rows for the same statement go through one executemany
+        try:
+            with conn:
+                i = 0
+                while i < len(batch):
+                    sql = batch[i][0]
+                    j = i
+                    while j < len(batch) and batch[j][0] == sql:
+                        j += 1
+                    conn.executemany(sql, [params for _, params in batch[i:j]])
+                    i = j
+        except sqlite3.Error as e:
+            print(f"[DB ERROR] sqlite batch of {len(batch)} rows failed: {e}")
+        finally:
+            WRITE_BUFFER_DEPTH.dec(len(batch))
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until everything queued so far is committed."""
+        end = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < end:
+            time.sleep(0.005)
+
+    def insert_detection(self, doc):
+        self._latest[doc["junction_id"]] = dict(doc)
+        queues = doc.get("queues")
+        self._put("INSERT INTO detections (junction_id, ts, counts, detections, queues) VALUES (?, ?, ?, ?, ?)",
+                  (doc["junction_id"], _epoch(doc["ts"]), json.dumps(doc.get("counts", {})),
+                   json.dumps(doc.get("detections", [])), json.dumps(queues) if queues else None))
+
+    def insert_heartbeat(self, doc):
+        self._put("INSERT INTO heartbeats (junction_id, ts, doc) VALUES (?, ?, ?)", _doc_row(doc))
+
+    def insert_timing(self, doc):
+        self._put("INSERT INTO timings (junction_id, ts, doc) VALUES (?, ?, ?)", _doc_row(doc))
+
+    def insert_alert(self, doc):
+        self._put("INSERT INTO alerts (junction_id, ts, doc) VALUES (?, ?, ?)", _doc_row(doc))
+
+    def insert_clip(self, doc):
+        self._put("INSERT INTO clips (junction_id, ts, doc) VALUES (?, ?, ?)", _doc_row(doc))
+
+    def upsert_process(self, junction_id, process, fields):
+        # json_patch merges like Mongo's $set: fields absent from this report keep their old value
+        self._put("INSERT INTO processes (junction_id, process, doc) VALUES (?, ?, ?) "
+                  "ON CONFLICT (junction_id, process) DO UPDATE SET doc = json_patch(doc, excluded.doc)",
+                  (junction_id, process, json.dumps(
+                      {k: (_epoch(v) if isinstance(v, datetime) else v) for k, v in fields.items()})))
+
+    # --- reads ---
+    def latest_detection(self, junction_id):
+        doc = self._latest.get(junction_id)
+        if doc is not None:
+            return doc
+        row = self._reader().execute(
+            "SELECT ts, counts, queues FROM detections WHERE junction_id = ? ORDER BY id DESC LIMIT 1",
+            (junction_id,)).fetchone()
+        if row is None:
+            return None
+        doc = {"junction_id": junction_id, "ts": _from_epoch(row[0]), "counts": json.loads(row[1])}
+        if row[2]:
+            doc["queues"] = json.loads(row[2])
+        return doc
+
+    def detection_history(self, junction_id, since, limit):
+        sql = "SELECT ts, counts FROM detections WHERE junction_id = ?"
+        params: list = [junction_id]
+        if since is not None:
+            sql += " AND ts > ?"
+            params.append(_epoch(since))
+        rows = self._reader().execute(sql + " ORDER BY ts DESC LIMIT ?", (*params, limit)).fetchall()
+        return [{"ts": _from_epoch(ts), "counts": json.loads(c)} for ts, c in reversed(rows)]
+
+    def latest_heartbeats(self):
+        rows = self._reader().execute(
+            "SELECT ts, doc FROM heartbeats h WHERE id = (SELECT id FROM heartbeats "
+            "WHERE junction_id = h.junction_id ORDER BY ts DESC LIMIT 1)").fetchall()
+        return [_row_doc(ts, doc) for ts, doc in rows]
+
+    def processes(self):
+        out = []
+        for jid, proc, doc in self._reader().execute("SELECT junction_id, process, doc FROM processes"):
+            d = json.loads(doc)
+            if isinstance(d.get("ts"), (int, float)):
+                d["ts"] = _from_epoch(d["ts"])
+            out.append({"junction_id": jid, "process": proc, **d})
+        return out
+
+    def recent_alerts(self, junction_id, limit=20):
+        rows = self._reader().execute(
+            "SELECT ts, doc FROM alerts WHERE junction_id = ? ORDER BY ts DESC LIMIT ?",
+            (junction_id, limit)).fetchall()
+        return [_row_doc(ts, doc) for ts, doc in rows]
+
+    def recent_clips(self, junction_id, limit=20):
+        rows = self._reader().execute(
+            "SELECT ts, doc FROM clips WHERE junction_id = ? ORDER BY ts DESC LIMIT ?",
+            (junction_id, limit)).fetchall()
+        return [_row_doc(ts, doc) for ts, doc in rows]
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+
+
+def _open(kind, cfg):
+    if kind == "mongo":
+        return MongoStore(cfg.mongo_uri, cfg.db_name)
+    if kind == "sqlite":
+        return SQLiteStore(cfg.sqlite_path)
+    if kind == "memory":
+        return MemoryStore()
+    raise ValueError(f"unknown storage engine {kind!r} (mongo | sqlite | memory)")
+
+
+def open_store(cfg) -> Store:
+    """The engine named by cfg.storage, or cfg.storage_fallback if that one can't be opened."""
+    try:
+        store = _open(cfg.storage, cfg)
+    except ValueError:
+        raise
+    except Exception as e:
+        if not cfg.storage_fallback or cfg.storage_fallback == cfg.storage:
+            raise
+        print(f"[DB ERROR] Could not open {cfg.storage} storage ❌ {e}")
+        print(f"[DB] Falling back to {cfg.storage_fallback} storage")
+        store = _open(cfg.storage_fallback, cfg)
+    print(f"[DB] Using {store.name} storage ✅")
+    return store
@@ -0,0 +1,88 @@
+# bench/annotate_pool_bench.py
+"""Annotation + JPEG + payload throughput: inline vs edge/annotate.py process pool.
+
+    python bench/annotate_pool_bench.py [--workers 1 2 4] [--frames 300] [--boxes 60]
+
+Inference is simulated with a fixed busy-wait per frame (--infer-ms) so the
+numbers show how much of the per-frame budget the pool takes off the
+inference core. Only meaningful with at least workers + 1 CPUs.
+"""
+import argparse, os, sys, time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edge.annotate import AnnotatePool, draw_detections, encode_jpeg, serialise_payload, split_cpus
+
+NAMES = {0: "bike", 1: "car", 2: "bus", 3: "truck", 4: "van", 5: "bicycle", 6: "rickshaw"}
+
+
+def make_frames(n, boxes, shape, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n):
+        xy = rng.uniform(0, min(shape[:2]) - 80, (boxes, 2)).astype(np.float32)
+        frames.append((rng.integers(0, 255, shape, dtype=np.uint8),
+                       rng.integers(0, len(NAMES), boxes),
+                       rng.uniform(0.25, 1.0, boxes).astype(np.float32),
+                       np.hstack([xy, xy + rng.uniform(10, 80, (boxes, 2)).astype(np.float32)])))
+    return frames
+
+
+def busy(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+def run_inline(frames, infer_ms):
+    t0 = time.perf_counter()
+    for i, (img, cls, conf, xyxy) in enumerate(frames):
+        busy(infer_ms)
+        out = img.copy()   # results.plot() draws on a copy too
+        draw_detections(out, cls, conf, xyxy, NAMES, [(f"FPS: {i}", (10, 30), 1, (0, 255, 0))])
+        serialise_payload("J1", time.time(), cls, conf, xyxy, {"car": len(cls)})
+        encode_jpeg(out)
+    return len(frames) / (time.perf_counter() - t0)
+
+
+def run_pool(frames, infer_ms, workers):
+    delivered = []
+    infer_cpus, pool_cpus = split_cpus(workers)
+    pool = AnnotatePool(workers, NAMES, on_ready=lambda n, img, p, j: delivered.append(n), cpus=pool_cpus)
+    img, cls, conf, xyxy = frames[0]
+    pool.submit(0, img, cls, conf, xyxy, {}, [], "J1", 0.0)   # start workers outside the timing
+    pool.poll(block=True)
+    delivered.clear()
+    t0 = time.perf_counter()
+    for i, (img, cls, conf, xyxy) in enumerate(frames, 1):
+        busy(infer_ms)
+        pool.submit(i, img, cls, conf, xyxy, {"car": len(cls)},
+                    [(f"FPS: {i}", (10, 30), 1, (0, 255, 0))], "J1", time.time())
+        pool.poll()
+    pool.close()
+    fps = len(frames) / (time.perf_counter() - t0)
+    assert delivered == list(range(1, len(frames) + 1)), "frames delivered out of order"
+    return fps
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--boxes", type=int, default=60)
+    ap.add_argument("--infer-ms", type=float, default=15.0)
+    ap.add_argument("--size", type=int, nargs=2, default=[1280, 720], metavar=("W", "H"))
+    args = ap.parse_args()
+
+    frames = make_frames(args.frames, args.boxes, (args.size[1], args.size[0], 3))
+    print(f"{os.cpu_count()} cpus, {args.frames} frames {args.size[0]}x{args.size[1]}, "
+          f"{args.boxes} boxes, simulated inference {args.infer_ms} ms")
+    base = run_inline(frames, args.infer_ms)
+    print(f"{'inline':>10} {base:8.1f} fps")
+    for w in args.workers:
+        fps = run_pool(frames, args.infer_ms, w)
+        print(f"{f'{w} workers':>10} {fps:8.1f} fps  {fps / base:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# bench/dashboard_refresh.py
+"""Server CPU per dashboard refresh: old matplotlib pie vs Vega-Lite rows.
+
+    python bench/dashboard_refresh.py [--refreshes 200]
+
+"before" reproduces what the old app did every 5 s (new figure, pie, PNG
+encode for st.pyplot, figure never closed). "after" is the chart work the
+new app does: build the row lists and serialise them the way Streamlit ships
+a DataFrame to the browser (Arrow IPC).
+"""
+import argparse, io, json, os, sys, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.charts import (COMPOSITION_SPEC, APPROACH_SPEC, HISTORY_SPEC,
+                              composition_rows, approach_rows, new_history,
+                              append_history, history_rows)
+
+COUNTS = {"car": 14, "bike": 9, "bus": 2, "truck": 3, "rickshaw": 4}
+
+
+def refresh_before(plt):
+    fig, ax = plt.subplots()
+    ax.pie(list(COUNTS.values()), labels=list(COUNTS.keys()),
+           autopct="%1.1f%%", startangle=90)
+    ax.axis("equal")
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")   # st.pyplot encodes the figure as PNG
+
+
+def _ship(rows, spec):
+    import pandas as pd
+    import pyarrow as pa
+    table = pa.Table.from_pandas(pd.DataFrame(rows))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as w:
+        w.write_table(table)
+    json.dumps(spec)
+
+
+def refresh_after(history, i):
+    approaches = {ap: COUNTS for ap in ("N", "S", "E", "W")}
+    append_history(history, [{"ts": f"2026-01-01T00:{i // 12 % 60:02d}:{i * 5 % 60:02d}",
+                               "counts": COUNTS}])
+    _ship(composition_rows(COUNTS), COMPOSITION_SPEC)
+    _ship(approach_rows(approaches), APPROACH_SPEC)
+    _ship(history_rows(history), HISTORY_SPEC)
+
+
+def cpu_per_call(fn, n):
+    t0 = time.process_time()
+    for i in range(n):
+        fn(i)
+    return (time.process_time() - t0) / n * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--refreshes", type=int, default=200)
+    args = ap.parse_args()
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    plt.rcParams["figure.max_open_warning"] = 0   # the leak is what we measure
+
+    history = new_history()
+    before = cpu_per_call(lambda i: refresh_before(plt), args.refreshes)
+    leaked = len(plt.get_fignums())
+    after = cpu_per_call(lambda i: refresh_after(history, i), args.refreshes)
+
+    print(f"refreshes          : {args.refreshes}")
+    print(f"before (matplotlib): {before:8.2f} ms CPU/refresh, {leaked} figures left open")
+    print(f"after  (vega-lite) : {after:8.2f} ms CPU/refresh (3 charts, {len(history)} history points)")
+    print(f"speedup            : {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
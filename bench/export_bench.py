@@ -0,0 +1,75 @@
+# bench/export_bench.py
+"""Detection history size and query time: BSON documents vs backend/export.py Parquet.
+
+    python bench/export_bench.py [--days 2] [--junctions 2] [--interval 5] [--boxes 15]
+
+Builds the same synthetic history both ways, then answers "class-2 boxes at
+J1 over a quarter of the range" from each: decoding every BSON document of the junction and
+filtering in Python (what pulling documents through the API amounts to), and
+a filtered pyarrow.dataset scan over the partitions.
+"""
+import argparse, os, shutil, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bson
+from backend.export import ParquetExporter, query_batches
+from bench.micro import sample_payload
+
+
+def run(days: float = 2, junctions: int = 2, interval: float = 5.0, boxes: int = 15) -> dict:
+    root = tempfile.mkdtemp(prefix="smartflow-export-")
+    try:
+        t0 = datetime(2026, 1, 1).timestamp()
+        n = int(days * 86400 / interval)
+        exporter = ParquetExporter(root, flush_rows=10 ** 9)
+        docs = []
+        for j in range(junctions):
+            for i in range(n):
+                p = sample_payload(f"J{j + 1}", boxes, seed=j * n + i)   # fresh boxes: no free compression
+                ts = t0 + i * interval
+                docs.append(bson.encode({"junction_id": p["junction_id"], "ts": datetime.utcfromtimestamp(ts),
+                                         "detections": p["detections"], "counts": p["counts"]}))
+                exporter.add(p["junction_id"], ts, p["detections"])
+        exporter.flush()
+        parquet_bytes = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs)
+        bson_bytes = sum(len(d) for d in docs)
+
+        span = timedelta(days=days)
+        start = datetime.utcfromtimestamp(t0) + span / 4
+        end = start + span / 4
+        t = time.perf_counter()
+        hits = 0
+        for raw in docs:
+            doc = bson.decode(raw)
+            if doc["junction_id"] == "J1" and start <= doc["ts"] < end:
+                hits += sum(1 for d in doc["detections"] if d["cls"] == 2)
+        bson_s = time.perf_counter() - t
+
+        t = time.perf_counter()
+        _, batches = query_batches(root, start, end, ["J1"], [2])
+        rows = sum(b.num_rows for b in batches)
+        parquet_s = time.perf_counter() - t
+        assert rows == hits, (rows, hits)
+        return {"bson_mb": bson_bytes / 1e6, "parquet_mb": parquet_bytes / 1e6,
+                "bson_query_ms": bson_s * 1000, "parquet_query_ms": parquet_s * 1000, "rows": rows}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--days", type=float, default=2)
+    ap.add_argument("--junctions", type=int, default=2)
+    ap.add_argument("--interval", type=float, default=5.0, help="seconds between payloads")
+    ap.add_argument("--boxes", type=int, default=15)
+    args = ap.parse_args()
+    r = run(args.days, args.junctions, args.interval, args.boxes)
+    print(f"size   bson {r['bson_mb']:8.1f} MB   parquet {r['parquet_mb']:8.1f} MB   "
+          f"{r['bson_mb'] / r['parquet_mb']:5.1f}x smaller")
+    print(f"query  bson {r['bson_query_ms']:8.1f} ms   parquet {r['parquet_query_ms']:8.1f} ms   "
+          f"{r['bson_query_ms'] / r['parquet_query_ms']:5.1f}x faster  ({r['rows']} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench/inference_bench.py
+"""YOLO inference throughput on the repo's sample images and synthetic frames.
+
+    python bench/inference_bench.py [--weights best.pt] [--imgsz 480] [--device cpu] [--runs 20]
+
+Uses edge.model_path from config when that file exists, otherwise a randomly
+initialised yolov8n (no download), so it always runs offline; compare
+numbers only between runs with the same weights. Loading goes through
+edge/model_cache.py, i.e. the same exported model and warm-up as the edge.
+"""
+import argparse, os, sys, time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES = [os.path.join(ROOT, "ai", "test.png"), os.path.join(ROOT, "ai", "4.png")]
+SYNTHETIC = {"synthetic_720p": (720, 1280), "synthetic_edge": (270, 480)}
+
+
+def inputs():
+    import cv2
+    frames = {}
+    for path in IMAGES:
+        img = cv2.imread(path)
+        if img is not None:
+            frames[os.path.splitext(os.path.basename(path))[0]] = img
+    rng = np.random.default_rng(0)
+    for name, (h, w) in SYNTHETIC.items():
+        frames[name] = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+    return frames
+
+
+def load(weights, imgsz, device, fmt):
+    if weights and os.path.exists(weights):
+        from edge.model_cache import load_model
+        return load_model(weights, imgsz, device, fmt)[0], os.path.basename(weights)
+    from ultralytics import YOLO
+    from edge.model_cache import warm_up
+    model = YOLO("yolov8n.yaml", task="detect")   # architecture only, random weights
+    warm_up(model, imgsz, device)
+    return model, "yolov8n-random"
+
+
+def run(weights: str = None, imgsz: int = 480, device="cpu", runs: int = 20, fmt: str = "none") -> dict:
+    weights = weights or os.path.join(ROOT, config.get().edge.model_path)
+    model, label = load(weights, imgsz, device, fmt)
+    res = {}
+    for name, frame in inputs().items():
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            model.predict(frame, imgsz=imgsz, device=device, verbose=False)
+        res[f"infer_{name}_fps"] = runs / (time.perf_counter() - t0)
+    res["weights"] = label
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--weights", help="default: edge.model_path from config")
+    ap.add_argument("--imgsz", type=int, default=480)
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--format", default="none", help="export format, see edge/model_cache.py")
+    args = ap.parse_args()
+    device = int(args.device) if args.device.isdigit() else args.device
+    res = run(args.weights, args.imgsz, device, args.runs, args.format)
+    print(f"weights {res.pop('weights')}, imgsz {args.imgsz}, device {args.device}")
+    for name, fps in res.items():
+        print(f"{name:<34} {fps:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# bench/load_gen.py
+"""Synthetic edge load: N junctions POSTing DetectionPayloads to the backend.
+
+    python bench/load_gen.py [--junctions 20] [--seconds 10] [--concurrency 4] [--storage sqlite]
+    python bench/load_gen.py --url http://127.0.0.1:8000     # a running server
+
+Without --url the FastAPI app is driven in-process through TestClient on the
+--storage engine (backend/storage.py; sqlite goes to a temp file), so no
+Mongo or network is needed and the numbers cover validation, routing,
+middleware and the storage write path. Each junction sends a detections
+payload per tick and a heartbeat every --heartbeat-every ticks, round-robin
+across the worker threads.
+"""
+import argparse, os, sys, tempfile, threading, time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.micro import sample_payload
+
+
+def _in_process_app(storage, eventlog):
+    os.environ.setdefault("SMARTFLOW_BACKEND_STORAGE", "memory")   # skip the Mongo connect on import
+    import backend.main as m
+    from backend.eventlog import EventLog
+    from backend.export import ParquetExporter
+    from backend.storage import MemoryStore, SQLiteStore
+    tmp = tempfile.mkdtemp(prefix="smartflow-bench-")
+    m.store.close()
+    if storage == "sqlite":
+        m.store = SQLiteStore(os.path.join(tmp, "bench.db"))
+    else:
+        m.store = MemoryStore()
+    # keep the event log and Parquet sides of ingest in the numbers, but out of the repo
+    m.exporter = ParquetExporter(os.path.join(tmp, "parquet"))
+    m.exporter.start()
+    if eventlog:
+        m.eventlog = EventLog(os.path.join(tmp, "eventlog"))
+        m.start_eventlog_consumers()
+    else:
+        m.eventlog = None
+    return m.app, m.store
+
+
+def _heartbeat(junction_id):
+    return {"junction_id": junction_id, "ts": time.time(), "cpu": 35.0, "mem": 40.0,
+            "fps": 12.0, "avg_conf": 0.6, "queue_depth": 0, "capture_fps": 25.0}
+
+
+def run(junctions: int = 20, seconds: float = 10.0, concurrency: int = 4, boxes: int = 30,
+        heartbeat_every: int = 10, url: str = None, storage: str = "memory", eventlog: bool = True) -> dict:
+    store = None
+    if url:
+        import requests
+        make_client = lambda: requests.Session()
+        base = url.rstrip("/")
+    else:
+        from fastapi.testclient import TestClient
+        app, store = _in_process_app(storage, eventlog)
+        make_client = lambda: TestClient(app)   # no `with`: startup hooks (monitor threads) stay off
+        base = ""
+
+    # pre-build the payloads so the generator itself costs nothing per request
+    payloads = [sample_payload(f"J{j + 1}", boxes, seed=j) for j in range(junctions)]
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop = time.perf_counter() + seconds
+
+    def worker(w):
+        client = make_client()
+        lat = latencies[w]
+        tick = 0
+        while time.perf_counter() < stop:
+            for j in range(w, junctions, concurrency):
+                body = payloads[j]
+                body["ts"] = time.time()
+                t0 = time.perf_counter()
+                r = client.post(f"{base}/detections", json=body)
+                lat.append(time.perf_counter() - t0)
+                if r.status_code != 200:
+                    errors[w] += 1
+                if heartbeat_every and tick % heartbeat_every == 0:
+                    client.post(f"{base}/heartbeat", json=_heartbeat(body["junction_id"]))
+            tick += 1
+
+    threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if store is not None and hasattr(store, "flush"):
+        store.flush()   # batched engines: count the time to commit, not just to enqueue
+    elapsed = time.perf_counter() - t0
+
+    lat = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (0.0, 0.0, 0.0)
+    return {"detections_rps": len(lat) / elapsed, "latency_p50_ms": float(p50),
+            "latency_p95_ms": float(p95), "latency_p99_ms": float(p99),
+            "errors": sum(errors), "requests": len(lat)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--junctions", type=int, default=20)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--boxes", type=int, default=30, help="detections per payload")
+    ap.add_argument("--heartbeat-every", type=int, default=10, help="ticks between heartbeats (0 = none)")
+    ap.add_argument("--url", help="target a running backend instead of the in-process app")
+    ap.add_argument("--storage", choices=["memory", "sqlite"], default="memory",
+                    help="engine for the in-process app")
+    ap.add_argument("--no-eventlog", action="store_true", help="write through to storage, as without backend.eventlog_dir")
+    args = ap.parse_args()
+    res = run(args.junctions, args.seconds, args.concurrency, args.boxes, args.heartbeat_every,
+              args.url, args.storage, not args.no_eventlog)
+    print(f"{res['requests']} requests, {res['errors']} errors: {res['detections_rps']:.0f} req/s  "
+          f"p50 {res['latency_p50_ms']:.2f} ms  p95 {res['latency_p95_ms']:.2f} ms  "
+          f"p99 {res['latency_p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
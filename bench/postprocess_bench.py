@@ -0,0 +1,105 @@
+# bench/postprocess_bench.py
+"""Per-frame post-processing cost: per-box tensor access vs common/postprocess.py.
+
+    python bench/postprocess_bench.py [--boxes 50 100 200] [--frames 300]
+
+Uses real ultralytics Results/Boxes when ultralytics is installed, otherwise
+a stand-in with the same per-box indexing over torch tensors.
+"""
+import argparse, os, sys, time
+from collections import Counter
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.postprocess import postprocess
+
+NAMES = {0: "bike", 1: "car", 2: "bus", 3: "truck", 4: "van", 5: "bicycle", 6: "rickshaw"}
+
+
+class _Boxes:
+    """Same access pattern as ultralytics Boxes: iterating yields 1-row Boxes."""
+
+    def __init__(self, data):
+        self.data = data if data.ndim == 2 else data[None, :]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        return _Boxes(self.data[i])
+
+    xyxy = property(lambda self: self.data[:, :4])
+    conf = property(lambda self: self.data[:, -2])
+    cls = property(lambda self: self.data[:, -1])
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def make_result(n, rng, backend):
+    xy = rng.uniform(0, 400, (n, 2))
+    data = np.hstack([xy, xy + rng.uniform(10, 80, (n, 2)),
+                      rng.uniform(0.25, 1.0, (n, 1)),
+                      rng.integers(0, len(NAMES), (n, 1))]).astype(np.float32)
+    if backend == "ultralytics":
+        import torch
+        from ultralytics.engine.results import Results
+        r = Results(np.zeros((480, 480, 3), np.uint8), path="", names=NAMES,
+                    boxes=torch.from_numpy(data))
+        return r
+    import torch
+    return _Result(_Boxes(torch.from_numpy(data)))
+
+
+def per_box(results, names):
+    """The loop edge/inference3.py used before."""
+    detections, labels = [], []
+    for r in results:
+        for box in r.boxes:
+            cls_id = int(box.cls)
+            conf = float(box.conf)
+            xyxy = [float(x) for x in box.xyxy[0]]
+            detections.append({"cls": cls_id, "conf": conf, "xyxy": xyxy})
+            labels.append(names[cls_id])
+    return detections, dict(Counter(labels))
+
+
+def timeit(fn, frames):
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - t0) / frames * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--boxes", type=int, nargs="+", default=[50, 100, 200])
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--backend", choices=["ultralytics", "torch"], default=None)
+    args = ap.parse_args()
+
+    backend = args.backend
+    if backend is None:
+        try:
+            import ultralytics  # noqa: F401
+            backend = "ultralytics"
+        except ImportError:
+            backend = "torch"
+
+    rng = np.random.default_rng(0)
+    print(f"backend: {backend}, {args.frames} frames per size")
+    print(f"{'boxes':>6} {'per-box ms':>11} {'vectorised ms':>14} {'speedup':>8}")
+    for n in args.boxes:
+        results = [make_result(n, rng, backend)]
+        old_det, old_counts = per_box(results, NAMES)
+        new_det, new_counts, _ = postprocess(results, NAMES)
+        assert old_counts == new_counts and old_det == new_det
+        old = timeit(lambda: per_box(results, NAMES), args.frames)
+        new = timeit(lambda: postprocess(results, NAMES), args.frames)
+        print(f"{n:>6} {old:>11.3f} {new:>14.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# bench/run.py
+"""Offline benchmark suite with a JSON history for spotting regressions.
+
+    python bench/run.py                       # every suite
+    python bench/run.py --only micro load --quick
+    python bench/run.py --no-save             # compare, but don't record
+
+Every run appends one record ({ts, rev, host, python, results}) to
+bench/history.jsonl and prints each metric against the previous record from
+the same host and --quick setting. Metrics ending in _us/_ms are
+lower-is-better, _rps/_fps higher-is-better; a change worse than --threshold
+percent is flagged and makes the exit status 1, so the suite can gate CI.
+"""
+import argparse, json, os, platform, socket, subprocess, sys, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY = os.path.join(ROOT, "bench", "history.jsonl")
+THRESHOLD = 10.0   # percent
+LOWER_BETTER = ("_us", "_ms")
+HIGHER_BETTER = ("_rps", "_fps")
+
+
+def suites(quick):
+    from bench import micro, load_gen, inference_bench, export_bench, tiling_bench
+    return {
+        "micro": lambda: micro.run(repeat=300 if quick else 2000),
+        "load": lambda: load_gen.run(seconds=2 if quick else 10),
+        "load_sqlite": lambda: load_gen.run(seconds=2 if quick else 10, storage="sqlite"),
+        "inference": lambda: inference_bench.run(runs=3 if quick else 20),
+        "export": lambda: export_bench.run(days=0.25 if quick else 2),
+        "tiling": lambda: tiling_bench.run(frames=5 if quick else 30),
+    }
+
+
+def git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous(path, host, quick):
+    """Last record from this host and run length; other machines aren't comparable."""
+    last = None
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("host") == host and rec.get("quick", False) == quick:
+                    last = rec
+    return last
+
+
+def compare(results, prev, threshold=THRESHOLD):
+    """[(suite.metric, value, pct_change or None, regressed)]"""
+    rows = []
+    for suite, metrics in results.items():
+        before = (prev or {}).get("results", {}).get(suite, {})
+        for name, value in metrics.items():
+            if not isinstance(value, (int, float)):
+                continue
+            old = before.get(name)
+            pct = (value - old) / old * 100 if isinstance(old, (int, float)) and old else None
+            worse = None
+            if pct is not None and name.endswith(LOWER_BETTER):
+                worse = pct
+            elif pct is not None and name.endswith(HIGHER_BETTER):
+                worse = -pct
+            rows.append((f"{suite}.{name}", value, pct, worse is not None and worse > threshold))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", nargs="+", choices=["micro", "load", "load_sqlite", "inference", "export", "tiling"])
+    ap.add_argument("--quick", action="store_true", help="short runs (noisier)")
+    ap.add_argument("--history", default=HISTORY)
+    ap.add_argument("--threshold", type=float, default=THRESHOLD, help="regression threshold, percent")
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args()
+
+    results = {}
+    for name, fn in suites(args.quick).items():
+        if args.only and name not in args.only:
+            continue
+        print(f"[BENCH] {name}...")
+        t0 = time.perf_counter()
+        results[name] = fn()
+        print(f"[BENCH] {name} done in {time.perf_counter() - t0:.1f}s")
+
+    host = socket.gethostname()
+    record = {"ts": time.time(), "rev": git_rev(), "host": host,
+              "python": platform.python_version(), "quick": args.quick, "results": results}
+    prev = previous(args.history, host, args.quick)
+    rows = compare(results, prev, args.threshold)
+
+    print(f"\nvs {prev['rev'] if prev else 'no previous run'}")
+    for name, value, pct, regressed in rows:
+        change = f"{pct:+7.1f}%" if pct is not None else "       "
+        print(f"{name:<44} {value:12.2f} {change}{'  REGRESSION' if regressed else ''}")
+
+    if not args.no_save:
+        with open(args.history, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+    sys.exit(1 if any(r[3] for r in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench/tiling_bench.py
+"""Recall vs ms/frame: far-field tiles (edge/tiling.py) against a larger imgsz.
+
+    python bench/tiling_bench.py [--source clip.mp4|dir|glob] [--frames 30] [--tile 240] [--ref-imgsz 1280]
+
+Every candidate sees the frame at the edge size (edge.frame_width x
+frame_height, what the camera process publishes). The reference is the same
+model on the source frame at --ref-imgsz, boxes scaled down; a reference box
+counts as found when a candidate box of its class overlaps it at IoU >= 0.5.
+`far_recall` only counts reference boxes centred in the tile region, which
+is where the misses are. Weights as in bench/inference_bench.py; with the
+random fallback the recall numbers are meaningless, the ms are not.
+"""
+import argparse, glob, os, sys, time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import config
+from common.postprocess import extract_boxes
+from edge.tiling import TiledPredictor
+from bench.inference_bench import ROOT, IMAGES, load
+
+MATCH_IOU = 0.5
+
+
+def source_frames(source, limit):
+    import cv2
+    if source is None:
+        paths = IMAGES
+    elif os.path.isdir(source):
+        paths = sorted(os.path.join(source, f) for f in os.listdir(source))
+    elif glob.has_magic(source):
+        paths = sorted(glob.glob(source))
+    else:
+        cap = cv2.VideoCapture(source)
+        frames = []
+        while len(frames) < limit:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+    frames = [cv2.imread(p) for p in paths[:limit]]
+    return [f for f in frames if f is not None]
+
+
+def found(ref, cand) -> np.ndarray:
+    """bool per reference box: some candidate box of the same class at IoU >= MATCH_IOU."""
+    (rc, _, rb), (cc, _, cb) = ref, cand
+    if not len(rc) or not len(cc):
+        return np.zeros(len(rc), dtype=bool)
+    lt = np.maximum(rb[:, None, :2], cb[None, :, :2])
+    rb_ = np.minimum(rb[:, None, 2:], cb[None, :, 2:])
+    inter = np.prod(np.clip(rb_ - lt, 0, None), axis=2)
+    area_r = np.prod(rb[:, 2:] - rb[:, :2], axis=1)
+    area_c = np.prod(cb[:, 2:] - cb[:, :2], axis=1)
+    iou = inter / np.maximum(area_r[:, None] + area_c[None, :] - inter, 1e-6)
+    return ((iou >= MATCH_IOU) & (rc[:, None] == cc[None, :])).any(axis=1)
+
+
+def run(weights: str = None, source: str = None, frames: int = 30, imgsz: int = 480, sizes=(640, 960),
+        tile: int = 240, overlap: float = 0.25, ref_imgsz: int = 1280, conf: float = 0.25, device="cpu") -> dict:
+    import cv2
+    edge = config.get().edge
+    weights = weights or os.path.join(ROOT, edge.model_path)
+    model, label = load(weights, imgsz, device, "none")
+    region = edge.tile_region
+    w, h = edge.frame_width, edge.frame_height
+
+    samples = []
+    for src in source_frames(source, frames):
+        ref = extract_boxes(model.predict(src, imgsz=ref_imgsz, conf=conf, device=device, verbose=False))
+        sx, sy = w / src.shape[1], h / src.shape[0]
+        ref = (ref[0], ref[1], ref[2] * np.array([sx, sy, sx, sy], dtype=np.float32))
+        cx, cy = (ref[2][:, 0] + ref[2][:, 2]) / 2 / w, (ref[2][:, 1] + ref[2][:, 3]) / 2 / h
+        far = (cx >= region[0]) & (cx < region[2]) & (cy >= region[1]) & (cy < region[3])
+        samples.append((cv2.resize(src, (w, h), interpolation=cv2.INTER_AREA), ref, far))
+
+    tiler = TiledPredictor(model, tile, overlap, region)
+    candidates = {f"full_{s}": (lambda f, s=s: extract_boxes(
+        model.predict(f, imgsz=s, conf=conf, device=device, verbose=False))) for s in (imgsz,) + tuple(sizes)}
+    candidates[f"tiled_{imgsz}"] = lambda f: tiler(f, imgsz, conf, device)
+
+    res = {"weights": label, "frames": len(samples), "reference_boxes": int(sum(len(r[0]) for _, r, _ in samples)),
+           "tiles": len(tiler.windows((h, w)))}
+    for name, predict in candidates.items():
+        predict(samples[0][0])   # warm-up at this size
+        hits = far_hits = total = far_total = 0
+        elapsed = 0.0
+        for frame, ref, far in samples:
+            t0 = time.perf_counter()
+            cand = predict(frame)
+            elapsed += time.perf_counter() - t0
+            ok = found(ref, cand)
+            hits, total = hits + int(ok.sum()), total + len(ok)
+            far_hits, far_total = far_hits + int(ok[far].sum()), far_total + int(far.sum())
+        res[f"{name}_ms"] = elapsed / len(samples) * 1000
+        res[f"{name}_recall"] = hits / total if total else None
+        res[f"{name}_far_recall"] = far_hits / far_total if far_total else None
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--weights", help="default: edge.model_path from config")
+    ap.add_argument("--source", help="video file, image directory or glob (default: the repo's sample images)")
+    ap.add_argument("--frames", type=int, default=30)
+    ap.add_argument("--imgsz", type=int, default=480)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[640, 960], help="larger full-frame imgsz to compare")
+    ap.add_argument("--tile", type=int, default=240, help="tile edge in edge-frame pixels")
+    ap.add_argument("--overlap", type=float, default=0.25)
+    ap.add_argument("--ref-imgsz", type=int, default=1280)
+    ap.add_argument("--device", default="cpu")
+    args = ap.parse_args()
+    device = int(args.device) if args.device.isdigit() else args.device
+    res = run(args.weights, args.source, args.frames, args.imgsz, tuple(args.sizes), args.tile, args.overlap,
+              args.ref_imgsz, device=device)
+    print(f"weights {res.pop('weights')}, {res.pop('frames')} frames, {res.pop('reference_boxes')} reference boxes, "
+          f"{res.pop('tiles')} tiles/frame")
+    print(f"{'':<14} {'ms/frame':>9} {'recall':>8} {'far recall':>11}")
+    fmt = lambda v: f"{v:.3f}" if v is not None else "-"
+    for name in [k[:-3] for k in res if k.endswith("_ms")]:
+        print(f"{name:<14} {res[name + '_ms']:9.1f} {fmt(res[name + '_recall']):>8} {fmt(res[name + '_far_recall']):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# common/config.py
+"""Typed SmartFlow configuration: defaults < JSON file < environment.
+
+    SMARTFLOW_CONFIG=/etc/smartflow.json   file to read (default: config.json at the repo root)
+    SMARTFLOW_EDGE_FRAME_SKIP=3            override one field: SMARTFLOW_<SECTION>_<FIELD>
+
+The file only needs the keys that differ from the defaults below, grouped by
+section ({"edge": {"conf": 0.3}}, see config.example.json); `python
+common/config.py` prints the effective config. Every component reads `get()`.
+
+Credentials (`secret()` fields: backend.mongo_uri, the alerts.twilio_* keys
+and phone numbers, the debug tokens) have no usable default; set them in config.json (not
+committed) or the environment, e.g. SMARTFLOW_ALERTS_TWILIO_AUTH. They are
+printed as "***". Env names from before this module still work:
+SMARTFLOW_ALERT_TRANSPORT, SMARTFLOW_ALERT_LOG, SMARTFLOW_EXPORT_FORMAT.
+
+Fields declared with `live(...)` are tunables: start_reloader() polls the
+file's mtime and swaps them in while the process runs (read them through
+get() at the point of use, not into a module constant). Any other field that
+changes in the file is reported and needs a restart to apply.
+"""
+import json, os, sys, threading, time, typing
+from dataclasses import dataclass, field, fields, replace
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.getenv("SMARTFLOW_CONFIG", os.path.join(ROOT, "config.json"))
+ENV_PREFIX = "SMARTFLOW_"
+RELOAD_INTERVAL = 2.0   # seconds between mtime checks
+REDACTED = "***"
+# generic name -> the name an earlier version documented; the generic one wins if both are set
+ENV_ALIASES = {
+    "SMARTFLOW_ALERTS_TRANSPORT": "SMARTFLOW_ALERT_TRANSPORT",
+    "SMARTFLOW_ALERTS_LOG_PATH": "SMARTFLOW_ALERT_LOG",
+    "SMARTFLOW_EDGE_EXPORT_FORMAT": "SMARTFLOW_EXPORT_FORMAT",
+}
+
+
+def live(default=None, factory=None):
+    """A field that may change while running (hot-reloaded)."""
+    if factory is not None:
+        return field(default_factory=factory, metadata={"live": True})
+    return field(default=default, metadata={"live": True})
+
+
+def secret(default: str = ""):
+    """A credential: empty unless configured, never printed."""
+    return field(default=default, metadata={"secret": True})
+
+
+@dataclass(frozen=True)
+class EdgeConfig:
+    junction_id: str = "J1"
+    backend_url: str = "http://127.0.0.1:8000"
+    model_path: str = "ai/runs/detect/train15/weights/best.pt"
+    video_path: str = "data/sample2.mp4"      # file, RTSP URL or camera index
+    frame_width: int = 480
+    frame_height: int = 270
+    imgsz: int = 480
+    imgsz_sizes: List[int] = field(default_factory=list)   # pre-warmed sizes for edge/governor.py ([] = fixed imgsz)
+    target_fps: float = live(8.0)             # processed frames/s the governor budgets for
+    sparse_objects: float = live(0.5)         # fewer objects/frame than this: smaller imgsz is enough
+    tile_size: int = 0                        # far-field tiles in frame px, see edge/tiling.py (0 = off)
+    tile_overlap: float = 0.25
+    tile_region: List[float] = field(default_factory=lambda: [0.0, 0.0, 1.0, 0.5])   # x0, y0, x1, y1 of the frame
+    lanes: List[dict] = field(default_factory=list)   # lane ROIs for queue/occupancy, see common/lanes.py
+    queue_gap_m: float = 8.0                  # a gap longer than this ends a queue
+    device: str = "0"                         # CUDA index or "cpu"
+    export_format: str = "auto"               # see edge/model_cache.py
+    conf: float = live(0.25)
+    frame_skip: int = live(2)                 # process every Nth frame
+    metrics_port: int = 9101
+    debug_token: str = secret()               # /debug/*, /preview.jpg and /clip on the metrics port ("" = off)
+    send_queue_max: int = 64
+    annotate_workers: int = 0                 # see edge/annotate.py
+    heartbeat_interval: float = 10.0
+    clip_seconds: float = 10.0                # pre-event footage kept in RAM, see edge/clips.py (0 = off)
+    clip_post_seconds: float = 5.0
+    clip_fps: float = 5.0
+    clip_budget_mb: int = 32
+    clip_dir: str = "clips"
+    clip_trigger_count: int = live(0)         # auto clip when a frame has this many objects (0 = off)
+
+
+@dataclass(frozen=True)
+class BackendConfig:
+    storage: str = "mongo"                    # mongo | sqlite | memory, see backend/storage.py
+    storage_fallback: str = "sqlite"          # used when `storage` can't be opened ("" = fail)
+    mongo_uri: str = secret("mongodb://localhost:27017/")   # with credentials: set in config.json / env
+    db_name: str = "autoroute"
+    sqlite_path: str = "data/smartflow.db"
+    eventlog_dir: str = "data/eventlog"       # ingest log, see backend/eventlog.py ("" = write through)
+    eventlog_segment_mb: int = 64
+    eventlog_fsync_ms: float = 5.0            # group-commit window
+    parquet_dir: str = "data/parquet"         # columnar history for /export ("" = off)
+    parquet_flush_interval: float = 60.0
+    workers: List[str] = field(default_factory=list)   # all backend workers' URLs, see backend/shard.py
+    self_url: str = ""                        # this worker's entry in `workers`
+    degraded_after: float = 15.0              # seconds without a heartbeat
+    offline_after: float = 45.0
+    process_stale_after: float = 30.0
+    debug_token: str = secret()               # /debug/* routes ("" = off)
+
+
+@dataclass(frozen=True)
+class TimingConfig:
+    weights: Dict[str, float] = live(factory=lambda: {
+        "bike": 0.5, "car": 1.0, "bus": 2.5, "truck": 3.0, "pedestrian": 1.0})
+    min_green: float = live(5.0)
+    max_green: float = live(60.0)
+    base_cycle: float = live(30.0)
+    k: float = live(30.0)
+    max_capacity_per_approach: float = live(30.0)
+    queue_weight: float = live(1.0)           # demand of one queued vehicle length vs one visible car
+    vehicle_spacing_m: float = live(7.5)      # queue metres per queued vehicle
+    yellow_time: float = live(3.0)
+    all_red: float = live(1.0)
+
+
+@dataclass(frozen=True)
+class AlertConfig:
+    transport: str = "twilio"                 # twilio | log | both
+    log_path: str = "alerts.log"
+    dedup_window: float = 300.0
+    escalate_window: float = 900.0
+    escalation_tiers: List[int] = field(default_factory=lambda: [1, 3, 10])
+    rate_per_min: float = 6.0
+    rate_burst: int = 3
+    twilio_sid: str = secret()                # empty: the twilio transport falls back to the log
+    twilio_auth: str = secret()
+    twilio_phone: str = secret()
+    alert_phone: str = secret()
+    escalation_phones: List[str] = field(default_factory=list, metadata={"secret": True})
+
+
+@dataclass(frozen=True)
+class WatchdogConfig:
+    max_restarts: int = 5
+    backoff_start: float = 0.1
+    backoff_max: float = 30.0
+    stable_after: float = 60.0
+    report_interval: float = 10.0
+    ready_timeout: float = 120.0
+    hung_after: float = 20.0
+    pin_cpus: bool = True                     # give inference its own cores, see edge/watchdog.py
+
+
+@dataclass(frozen=True)
+class DashboardConfig:
+    backend_url: str = "http://127.0.0.1:8000"
+    junction_id: str = "J1"
+    refresh_ms: int = live(5000)
+
+
+@dataclass(frozen=True)
+class Config:
+    edge: EdgeConfig = field(default_factory=EdgeConfig)
+    backend: BackendConfig = field(default_factory=BackendConfig)
+    timing: TimingConfig = field(default_factory=TimingConfig)
+    alerts: AlertConfig = field(default_factory=AlertConfig)
+    watchdog: WatchdogConfig = field(default_factory=WatchdogConfig)
+    dashboard: DashboardConfig = field(default_factory=DashboardConfig)
+
+
+def _coerce(value, tp, where):
+    """File values are JSON already; env values arrive as strings."""
+    origin = typing.get_origin(tp)
+    if isinstance(value, str) and (origin in (list, dict) or tp is bool):
+        value = json.loads(value) if tp is not bool else value.lower() in ("1", "true", "yes", "on")
+    try:
+        if origin is list:
+            (item,) = typing.get_args(tp)
+            return [item(v) for v in value]
+        if origin is dict:
+            key, item = typing.get_args(tp)
+            return {key(k): item(v) for k, v in value.items()}
+        if tp is bool:
+            return bool(value)
+        return tp(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"config {where}: expected {tp}, got {value!r}") from e
+
+
+def _section(cls, name, data: dict):
+    hints = typing.get_type_hints(cls)
+    known = {f.name for f in fields(cls)}
+    for key in data.keys() - known:
+        print(f"[CONFIG] unknown key {name}.{key} ignored")
+    kwargs = {}
+    for f in fields(cls):
+        key = f"{ENV_PREFIX}{name}_{f.name}".upper()
+        env = os.getenv(key)
+        if env is None and key in ENV_ALIASES:
+            env = os.getenv(ENV_ALIASES[key])
+        if env is not None:
+            kwargs[f.name] = _coerce(env, hints[f.name], f"{ENV_PREFIX}{name}_{f.name}".upper())
+        elif f.name in data:
+            kwargs[f.name] = _coerce(data[f.name], hints[f.name], f"{name}.{f.name}")
+    return cls(**kwargs)
+
+
+def load(path: str = CONFIG_PATH) -> Config:
+    data = {}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    hints = typing.get_type_hints(Config)
+    for key in data.keys() - hints.keys():
+        print(f"[CONFIG] unknown section {key} ignored")
+    return Config(**{name: _section(cls, name, data.get(name, {})) for name, cls in hints.items()})
+
+
+_current = None
+_mtime = None
+_lock = threading.Lock()
+_subscribers: List[Callable[[Config, Config], None]] = []
+_reloader = None
+
+
+def _stat(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get() -> Config:
+    """The current config; a plain attribute read after the first call."""
+    global _current, _mtime
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _mtime = _stat(CONFIG_PATH)
+                _current = load(CONFIG_PATH)
+    return _current
+
+
+def subscribe(fn: Callable[[Config, Config], None]):
+    """fn(old, new) after each reload that changed a live field (reloader thread)."""
+    _subscribers.append(fn)
+
+
+def _shown(f, value):
+    return REDACTED if f.metadata.get("secret") and value else value
+
+
+def redacted(cfg: Config) -> dict:
+    """asdict() with every configured secret replaced by REDACTED."""
+    return {sec.name: {f.name: _shown(f, getattr(getattr(cfg, sec.name), f.name))
+                       for f in fields(getattr(cfg, sec.name))}
+            for sec in fields(Config)}
+
+
+def _merge_live(old: Config, new: Config) -> Config:
+    """Live fields from `new`, everything else kept from `old`."""
+    sections = {}
+    for sec in fields(Config):
+        cur, nxt = getattr(old, sec.name), getattr(new, sec.name)
+        changes = {}
+        for f in fields(cur):
+            before, after = getattr(cur, f.name), getattr(nxt, f.name)
+            if before == after:
+                continue
+            if f.metadata.get("live"):
+                changes[f.name] = after
+                print(f"[CONFIG] {sec.name}.{f.name}: {_shown(f, before)!r} -> {_shown(f, after)!r}")
+            else:
+                print(f"[CONFIG] {sec.name}.{f.name} changed; restart to apply")
+        sections[sec.name] = replace(cur, **changes) if changes else cur
+    return Config(**sections)
+
+
+def reload() -> bool:
+    """Re-read the file if its mtime moved; True if a live value changed."""
+    global _current, _mtime
+    old = get()
+    mtime = _stat(CONFIG_PATH)
+    if mtime == _mtime:
+        return False
+    _mtime = mtime
+    try:
+        new = _merge_live(old, load(CONFIG_PATH))
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"[CONFIG] reload failed, keeping current values: {e}")
+        return False
+    if new == old:
+        return False
+    _current = new   # one reference swap; readers see the old or the new object, never a mix
+    for fn in _subscribers:
+        try:
+            fn(old, new)
+        except Exception as e:
+            print("[CONFIG] subscriber failed:", e)
+    return True
+
+
+def start_reloader(interval: float = RELOAD_INTERVAL):
+    """Poll the config file in a daemon thread; idempotent."""
+    global _reloader
+    if _reloader is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            reload()
+
+    _reloader = threading.Thread(target=run, name="config-reload", daemon=True)
+    _reloader.start()
+
+
+if __name__ == "__main__":
+    json.dump(redacted(get()), sys.stdout, indent=2)
+    print()
@@ -0,0 +1,126 @@
+# common/lanes.py
+"""Per-approach queue length and occupancy from lane ROIs and box geometry.
+
+A lane is configured in normalised frame coordinates (edge.lanes):
+
+    {"approach": "north",
+     "polygon": [[0.42, 0.98], [0.55, 0.98], [0.51, 0.35], [0.47, 0.35]],
+     "axis": [[0.49, 0.95], [0.49, 0.60], [0.49, 0.36]],   # stop line outwards
+     "marks_m": [0, 15, 60]}                                # metres at the axis points
+
+`marks_m` makes the pixel -> metre mapping piecewise linear along the axis,
+which absorbs most of the camera perspective; it defaults to [0, length_m]
+at the two ends. A box belongs to the lane whose polygon holds its
+bottom-centre (ground contact); its footprint along the lane runs from the
+bottom-centre to the box centre, projected onto the axis.
+
+Per lane, footprints are sorted from the stop line: the queue is the run of
+vehicles starting within `gap_m` of the stop line with no gap over `gap_m`
+between them, and its length is where the last one ends. Occupancy is the
+length of the union of footprints over the lane length. Per approach the
+queue is the longest of its lanes and occupancy is length-weighted. Every
+step is array work over all boxes; only the (few) lanes are looped.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+QUEUE_GAP_M = 8.0
+NON_VEHICLES = ("pedestrian", "person")
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """bool[N]: even-odd rule, every point against every edge at once."""
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+    x, y = points[:, 0:1], points[:, 1:2]                   # (N, 1) against (E,) edges
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(crosses & (x < x_at), axis=1) % 2 == 1
+
+
+def assign_lanes(points: np.ndarray, polygons: List[np.ndarray]) -> np.ndarray:
+    """int[N] index of the first polygon holding each point, -1 for none."""
+    lane = np.full(len(points), -1, dtype=np.int64)
+    for i, polygon in enumerate(polygons):
+        inside = (lane < 0) & points_in_polygon(points, polygon)
+        lane[inside] = i
+    return lane
+
+
+class Lane:
+    def __init__(self, spec: dict):
+        self.approach = str(spec["approach"])
+        self.polygon = np.asarray(spec["polygon"], dtype=np.float64)
+        self.axis = np.asarray(spec["axis"], dtype=np.float64)
+        if len(self.polygon) < 3 or len(self.axis) < 2:
+            raise ValueError(f"lane {self.approach}: need a polygon of 3+ points and an axis of 2+")
+        marks = spec.get("marks_m")
+        if marks is None:
+            marks = np.linspace(0.0, float(spec.get("length_m", 50.0)), len(self.axis))
+        self.marks = np.asarray(marks, dtype=np.float64)
+        if len(self.marks) != len(self.axis):
+            raise ValueError(f"lane {self.approach}: marks_m needs one value per axis point")
+        self.length_m = float(self.marks[-1])
+
+    def metres(self, points: np.ndarray) -> np.ndarray:
+        """Distance from the stop line of each point's projection onto the axis."""
+        a, b = self.axis[:-1], self.axis[1:]                 # (S, 2) segments
+        d = b - a
+        rel = points[:, None, :] - a[None, :, :]             # (N, S, 2)
+        t = np.clip((rel * d).sum(axis=2) / np.maximum((d * d).sum(axis=1), 1e-12), 0.0, 1.0)
+        dist = ((rel - t[:, :, None] * d) ** 2).sum(axis=2)
+        seg = dist.argmin(axis=1)
+        rows = np.arange(len(points))
+        return self.marks[seg] + t[rows, seg] * (self.marks[seg + 1] - self.marks[seg])
+
+
+def lane_queue(near: np.ndarray, far: np.ndarray, length_m: float, gap_m: float = QUEUE_GAP_M):
+    """(queue metres, occupied metres) for footprints [near, far] along one lane."""
+    if len(near) == 0:
+        return 0.0, 0.0
+    order = np.argsort(near)
+    near = np.clip(near[order], 0.0, length_m)
+    reach = np.maximum.accumulate(np.clip(far[order], 0.0, length_m))   # furthest point covered so far
+    gaps = near[1:] - reach[:-1]
+    occupied = float(reach[-1] - near[0] - np.clip(gaps, 0.0, None).sum())
+    if near[0] > gap_m:
+        return 0.0, occupied                                 # nobody waiting at the stop line
+    breaks = np.flatnonzero(gaps > gap_m)
+    last = breaks[0] if len(breaks) else len(near) - 1
+    return float(reach[last]), occupied
+
+
+class QueueEstimator:
+    """{approach: {"queue_m", "occupancy", "vehicles"}} for one frame's boxes."""
+
+    def __init__(self, lanes: List[dict], names: dict, gap_m: float = QUEUE_GAP_M):
+        self.lanes = [Lane(spec) for spec in lanes]
+        self.gap_m = gap_m
+        self.vehicle = np.array([names[i] not in NON_VEHICLES for i in sorted(names)], dtype=bool)
+        self.approaches = sorted({lane.approach for lane in self.lanes})
+
+    def __call__(self, cls: np.ndarray, xyxy: np.ndarray, frame_shape) -> Dict[str, Dict[str, float]]:
+        h, w = frame_shape[:2]
+        keep = self.vehicle[np.clip(cls, 0, len(self.vehicle) - 1)] if len(cls) else np.zeros(0, dtype=bool)
+        boxes = xyxy[keep].astype(np.float64) / np.array([w, h, w, h])
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        bottom = np.stack([cx, boxes[:, 3]], axis=1)
+        centre = np.stack([cx, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+        lane_of = assign_lanes(bottom, [lane.polygon for lane in self.lanes])
+
+        acc = {a: [0.0, 0.0, 0.0, 0] for a in self.approaches}   # queue, occupied, length, vehicles
+        for i, lane in enumerate(self.lanes):
+            mine = lane_of == i
+            a, b = lane.metres(bottom[mine]), lane.metres(centre[mine])
+            queue, occupied = lane_queue(np.minimum(a, b), np.maximum(a, b), lane.length_m, self.gap_m)
+            s = acc[lane.approach]
+            s[0] = max(s[0], queue)
+            s[1] += occupied
+            s[2] += lane.length_m
+            s[3] += int(mine.sum())
+        return {a: {"queue_m": round(q, 1), "occupancy": round(occ / length, 3) if length else 0.0, "vehicles": n}
+                for a, (q, occ, length, n) in acc.items()}
@@ -0,0 +1,287 @@
+# common/metrics.py
+"""Minimal Prometheus-compatible metrics shared by backend and edge.
+
+Hot-path updates take no locks: every thread writes into its own cell
+(threading.local) and the scrape sums the cells. A scrape may see one thread's
+update slightly late, but no increment is ever lost.
+"""
+import bisect, hmac, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TOKEN_HEADER = "X-SmartFlow-Token"   # debug routes: the configured debug_token, or ?token=
+
+
+class _Sharded:
+    """Per-thread cells; `_cell()` is the only call on the hot path."""
+
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._cells = []
+
+    def _cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0.0] * self._size
+            self._cells.append(cell)   # list.append is atomic under the GIL
+            return cell
+
+    def _sum(self):
+        total = [0.0] * self._size
+        for cell in list(self._cells):
+            for i, v in enumerate(cell):
+                total[i] += v
+        return total
+
+
+class _CounterChild(_Sharded):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount=1.0):
+        self._cell()[0] += amount
+
+    def value(self):
+        return self._sum()[0]
+
+
+class _GaugeChild(_Sharded):
+    """Use either set()/set_function() or inc()/dec() on a gauge, not both."""
+
+    def __init__(self):
+        super().__init__(1)
+        self._value = 0.0
+        self._fn = None
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, fn):
+        self._fn = fn
+
+    def inc(self, amount=1.0):
+        self._cell()[0] += amount
+
+    def dec(self, amount=1.0):
+        self._cell()[0] -= amount
+
+    def value(self):
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float("nan")
+        return self._value + self._sum()[0]
+
+
+class _HistogramChild(_Sharded):
+    # cell layout: one slot per bucket, +Inf, sum
+    def __init__(self, buckets):
+        super().__init__(len(buckets) + 2)
+        self._buckets = buckets
+
+    def observe(self, value):
+        cell = self._cell()
+        cell[bisect.bisect_left(self._buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_h", "_t0")
+
+    def __init__(self, h):
+        self._h = h
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._h.observe(time.perf_counter() - self._t0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, doc, labelnames=(), **kw):
+        self.name, self.doc, self.labelnames, self._kw = name, doc, tuple(labelnames), kw
+        self._children = {}
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, *values, **kv):
+        key = tuple(str(kv[n]) for n in self.labelnames) if kv else tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _label_str(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}_total{self._label_str(key)} {_fmt(child.value())}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, fn):
+        self._default.set_function(fn)
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default.dec(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{self._label_str(key)} {_fmt(child.value())}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def _new_child(self):
+        return _HistogramChild(self._kw.get("buckets", LATENCY_BUCKETS))
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            totals = child._sum()
+            acc = 0.0
+            for bound, n in zip(child._buckets, totals):
+                acc += n
+                yield f"{self.name}_bucket{self._label_str(key, [('le', _fmt(bound))])} {_fmt(acc)}"
+            acc += totals[len(child._buckets)]
+            yield f"{self.name}_bucket{self._label_str(key, [('le', '+Inf')])} {_fmt(acc)}"
+            yield f"{self.name}_sum{self._label_str(key)} {_fmt(totals[-1])}"
+            yield f"{self.name}_count{self._label_str(key)} {_fmt(acc)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, cls, name, doc, labelnames=(), **kw):
+        if name in self._metrics:
+            return self._metrics[name]
+        m = self._metrics[name] = cls(name, doc, labelnames, **kw)
+        return m
+
+    def counter(self, name, doc, labelnames=()):
+        return self._add(Counter, name, doc, labelnames)
+
+    def gauge(self, name, doc, labelnames=()):
+        return self._add(Gauge, name, doc, labelnames)
+
+    def histogram(self, name, doc, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram, name, doc, labelnames, buckets=tuple(buckets))
+
+    def render(self) -> str:
+        lines = []
+        for m in list(self._metrics.values()):
+            name = m.name + "_total" if m.kind == "counter" else m.name
+            lines.append(f"# HELP {name} {m.doc}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            lines.extend(m.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def token_ok(given, expected: str) -> bool:
+    """Constant-time check; an empty `expected` (not configured) lets nothing through."""
+    return bool(expected) and given is not None and hmac.compare_digest(str(given).encode(), expected.encode())
+
+
+def start_http_server(port, registry=REGISTRY, routes=None, host="0.0.0.0", token=None):
+    """Serve /metrics (plus optional extra GET routes) from a daemon thread.
+
+    `routes` maps a path to fn(query: dict) -> (content_type, body: bytes).
+    With `token` set (not None) every extra route answers 403 unless the
+    request carries it in TOKEN_HEADER or ?token=; "" turns them all off.
+    /metrics stays open for the scraper.
+    """
+    table = {"/metrics": lambda q: (CONTENT_TYPE, registry.render().encode())}
+    table.update(routes or {})
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            fn = table.get(url.path)
+            if fn is None:
+                self.send_error(404)
+                return
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if token is not None and url.path != "/metrics" \
+                    and not token_ok(self.headers.get(TOKEN_HEADER) or query.pop("token", None), token):
+                self.send_error(403, "debug routes need the debug token" if token else "debug routes are off")
+                return
+            try:
+                ctype, body = fn(query)
+            except Exception as e:
+                self.send_error(500, str(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _fmt(v):
+    v = float(v)
+    if v != v:
+        return "NaN"
+    if v in (float("inf"), float("-inf")):
+        return "+Inf" if v > 0 else "-Inf"
+    if v.is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(v)
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,56 @@
+# common/postprocess.py
+"""Vectorised YOLO post-processing shared by edge/ and ai/ inference scripts.
+
+`box.cls` / `box.conf` / `box.xyxy` on every box is three tensor->Python
+conversions (and, on GPU, three device syncs) per detection. Here the whole
+`boxes.data` block comes over in one copy and everything else is NumPy.
+"""
+import numpy as np
+
+_EMPTY_CLS = np.zeros(0, dtype=np.int64)
+_EMPTY_CONF = np.zeros(0, dtype=np.float32)
+_EMPTY_XYXY = np.zeros((0, 4), dtype=np.float32)
+
+
+def extract_boxes(results):
+    """Stack every box of one Results (or a list of them) into contiguous arrays.
+
+    Returns (cls int64[N], conf float32[N], xyxy float32[N, 4]).
+    """
+    if not isinstance(results, (list, tuple)):
+        results = [results]
+    blocks = []
+    for r in results:
+        boxes = r.boxes
+        if boxes is None or len(boxes) == 0:
+            continue
+        data = boxes.data
+        if hasattr(data, "cpu"):   # torch tensor: one device->host copy
+            data = data.cpu().numpy()
+        blocks.append(data)
+    if not blocks:
+        return _EMPTY_CLS, _EMPTY_CONF, _EMPTY_XYXY
+    data = np.ascontiguousarray(np.concatenate(blocks) if len(blocks) > 1 else blocks[0],
+                                dtype=np.float32)
+    # rows are [x1, y1, x2, y2, (track_id,) conf, cls]
+    return data[:, -1].astype(np.int64), np.ascontiguousarray(data[:, -2]), np.ascontiguousarray(data[:, :4])
+
+
+def count_classes(cls, names):
+    """{class_name: count} for the classes present, via one bincount."""
+    if len(cls) == 0:
+        return {}
+    bins = np.bincount(cls, minlength=len(names))
+    return {names[int(i)]: int(bins[i]) for i in np.flatnonzero(bins)}
+
+
+def build_detections(cls, conf, xyxy):
+    """Payload detections list; tolist() converts each array in a single C pass."""
+    return [{"cls": c, "conf": f, "xyxy": b}
+            for c, f, b in zip(cls.tolist(), conf.tolist(), xyxy.tolist())]
+
+
+def postprocess(results, names):
+    """(detections, counts, (cls, conf, xyxy)) for one frame's results."""
+    cls, conf, xyxy = extract_boxes(results)
+    return build_detections(cls, conf, xyxy), count_classes(cls, names), (cls, conf, xyxy)
@@ -0,0 +1,112 @@
+# common/profiler.py
+"""On-demand sampling profiler and per-frame span ring buffer.
+
+A capture samples every thread's stack for N seconds and writes collapsed
+stacks ("thread;outer;...;inner count"), which flamegraph.pl, speedscope or
+inferno render directly:
+
+    flamegraph.pl profiles/profile-<ts>.folded > flame.svg
+
+Nothing runs until a capture is requested (signal or HTTP), so the idle cost
+is zero. Spans are cheap enough to record on every frame; the ring keeps the
+most recent ones and exports them in Chrome trace-event format
+(chrome://tracing or ui.perfetto.dev).
+"""
+import collections, json, os, signal, sys, threading, time
+
+PROFILE_DIR = "profiles"
+DEFAULT_SECONDS = 10.0
+SAMPLE_INTERVAL = 0.005   # 200 Hz
+SPAN_CAPACITY = 4096
+
+_capture_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = SAMPLE_INTERVAL) -> collections.Counter:
+    """Sample all other threads for `seconds`; returns collapsed stack -> hits."""
+    me = threading.get_ident()
+    stacks = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            parts = []
+            while frame is not None:
+                parts.append(_frame_label(frame))
+                frame = frame.f_back
+            parts.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(parts))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def write_collapsed(stacks, path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for stack, hits in stacks.most_common():
+            f.write(f"{stack} {hits}\n")
+    return path
+
+
+def start_capture(seconds: float = DEFAULT_SECONDS, out_dir: str = PROFILE_DIR):
+    """Capture in a background thread; returns the output path, or None if one is running."""
+    if not _capture_lock.acquire(blocking=False):
+        return None
+    path = os.path.join(out_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+
+    def run():
+        try:
+            stacks = sample_stacks(seconds)
+            write_collapsed(stacks, path)
+            print(f"[PROFILE] wrote {path} ({sum(stacks.values())} samples)")
+        finally:
+            _capture_lock.release()
+
+    threading.Thread(target=run, name="profiler", daemon=True).start()
+    return path
+
+
+def install_signal_toggle(sig=getattr(signal, "SIGUSR1", None), seconds: float = DEFAULT_SECONDS):
+    """`kill -USR1 <pid>` starts a capture. Must be called from the main thread."""
+    if sig is None:   # no SIGUSR1 on Windows
+        return False
+    signal.signal(sig, lambda signum, frame: start_capture(seconds))
+    return True
+
+
+class SpanRing:
+    """Fixed-size ring of (frame_id, name, start, end) timing spans."""
+
+    def __init__(self, capacity: int = SPAN_CAPACITY):
+        self._spans = collections.deque(maxlen=capacity)   # append is atomic, O(1)
+
+    def add(self, frame_id, name, start, end):
+        self._spans.append((frame_id, name, start, end))
+
+    def snapshot(self):
+        return list(self._spans)
+
+    def summary(self):
+        """Mean/max milliseconds per span name over the ring."""
+        acc = {}
+        for _, name, start, end in self.snapshot():
+            ms = (end - start) * 1000
+            n, total, peak = acc.get(name, (0, 0.0, 0.0))
+            acc[name] = (n + 1, total + ms, max(peak, ms))
+        return {name: {"count": n, "mean_ms": round(total / n, 3), "max_ms": round(peak, 3)}
+                for name, (n, total, peak) in acc.items()}
+
+    def to_trace_json(self) -> str:
+        """Chrome trace-event format; one track per span name."""
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "pid": pid, "tid": name,
+                   "ts": start * 1e6, "dur": (end - start) * 1e6, "args": {"frame": frame_id}}
+                  for frame_id, name, start, end in self.snapshot()]
+        return json.dumps({"traceEvents": events})
@@ -0,0 +1,60 @@
+# common/windowstats.py
+"""Fixed-memory per-bucket statistics over a sliding time window.
+
+    window = WindowedStats(minutes=60)
+    window.add(count)              # O(1): one slot update
+    window.report()                # newest first, O(minutes)
+
+One slot per bucket (a minute by default) in preallocated lists, indexed by
+bucket number modulo the window; a slot whose bucket number is stale is
+reset when it is reused, so a process can run for weeks at the same
+footprint. Quiet minutes simply have no slot and are left out of reports.
+Single writer; readers get a consistent-enough snapshot without a lock.
+"""
+import time
+from datetime import datetime
+from typing import List, Optional
+
+WINDOW_MINUTES = 60
+
+
+class WindowedStats:
+    def __init__(self, minutes: int = WINDOW_MINUTES, bucket_seconds: float = 60.0):
+        self.size, self.bucket_seconds = minutes, bucket_seconds
+        self._bucket = [-1] * minutes      # bucket number each slot currently holds
+        self._count = [0] * minutes
+        self._sum = [0.0] * minutes
+        self._max = [0.0] * minutes
+
+    def add(self, value: float, ts: Optional[float] = None):
+        b = int((time.time() if ts is None else ts) // self.bucket_seconds)
+        i = b % self.size
+        if self._bucket[i] != b:
+            if b < self._bucket[i]:
+                return   # older than the window
+            self._bucket[i], self._count[i], self._sum[i], self._max[i] = b, 1, value, value
+            return
+        self._count[i] += 1
+        self._sum[i] += value
+        if value > self._max[i]:
+            self._max[i] = value
+
+    def buckets(self, now: Optional[float] = None, last: Optional[int] = None) -> List[dict]:
+        """{"start", "count", "mean", "max"} per bucket inside the window, newest first (at most `last`)."""
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        out = []
+        for b in range(current, current - self.size, -1):   # backwards from now: newest first, no sort
+            i = b % self.size
+            if self._bucket[i] == b and self._count[i]:
+                out.append({"start": b * self.bucket_seconds, "count": self._count[i],
+                            "mean": self._sum[i] / self._count[i], "max": self._max[i]})
+                if last is not None and len(out) >= last:
+                    break
+        return out
+
+    def report(self, last: Optional[int] = None, now: Optional[float] = None) -> List[dict]:
+        """buckets() with a local "HH:MM" label, limited to the `last` newest."""
+        rows = self.buckets(now, last)
+        for r in rows:
+            r["time"] = datetime.fromtimestamp(r["start"]).strftime("%H:%M")
+        return rows
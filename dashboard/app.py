@@ -2,17 +2,25 @@
 import streamlit as st
 import requests
 import pandas as pd
-import matplotlib.pyplot as plt
 from streamlit_autorefresh import st_autorefresh
+import sys, os
 
-BACKEND = "http://127.0.0.1:8000"
-JUNCTION = "J1"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.charts import (COMPOSITION_SPEC, APPROACH_SPEC, HISTORY_SPEC, HISTORY_POINTS,
+                              composition_rows, approach_rows, new_history,
+                              append_history, history_rows)
+from common import config
+
+config.reload()   # every rerun: picks up config.json edits with one stat()
+CFG = config.get().dashboard
+BACKEND = CFG.backend_url
+JUNCTION = CFG.junction_id
 
 st.set_page_config(page_title="AutoRoute Dashboard", layout="wide")
 st.title("🚦 SmartFlow — Smart Traffic Dashboard")
 
-# --- Auto-refresh every 5 seconds ---
-st_autorefresh(interval=5000, key="refresh")
+# --- Auto-refresh (dashboard.refresh_ms, 5 s by default) ---
+st_autorefresh(interval=CFG.refresh_ms, key="refresh")
 
 # --- Helper functions ---
 def get_latest_counts():
@@ -21,6 +29,15 @@ def get_latest_counts():
     except Exception as e:
         return {"error": str(e)}
 
+def get_history(since=None):
+    params = {"limit": HISTORY_POINTS}
+    if since:
+        params["since"] = since
+    try:
+        return requests.get(f"{BACKEND}/history/{JUNCTION}", params=params, timeout=1).json()
+    except Exception as e:
+        return {"error": str(e)}
+
 def get_status():
     try:
         return requests.get(f"{BACKEND}/status/{JUNCTION}", timeout=1).json()
@@ -39,14 +56,18 @@ def get_processes():
     except Exception as e:
         return {"error": str(e)}
 
-def compute_timing(counts):
+def compute_timing(approaches):
     try:
-        req = {"junction_id": JUNCTION,
-               "approaches": {"N": counts or {}, "S": counts or {}, "E": counts or {}, "W": counts or {}}}
+        req = {"junction_id": JUNCTION, "approaches": approaches}
         return requests.post(f"{BACKEND}/compute_timing", json=req, timeout=2).json()
     except Exception as e:
         return {"error": str(e)}
 
+# history lives in the session; each refresh only pulls points newer than the cursor
+if "history" not in st.session_state:
+    st.session_state.history = new_history()
+    st.session_state.history_cursor = None
+
 # --- Layout ---
 col1, col2, col3 = st.columns([2, 1, 2])
 
@@ -55,19 +76,32 @@ with col1:
     st.subheader("📊 Live Detection Counts")
     latest = get_latest_counts()
     counts = latest.get("counts", {}) if isinstance(latest, dict) else {}
+    approaches = {"N": counts or {}, "S": counts or {}, "E": counts or {}, "W": counts or {}}
     if counts:
         df = pd.DataFrame(list(counts.items()), columns=["Class", "Count"])
         st.table(df)
 
+        # Vega-Lite charts are drawn in the browser; the server only ships a few rows
         st.subheader("🚘 Traffic Composition")
-        fig, ax = plt.subplots()
-        ax.pie(df["Count"].values, labels=df["Class"].values,
-               autopct="%1.1f%%", startangle=90)
-        ax.axis("equal")
-        st.pyplot(fig)
+        st.vega_lite_chart(pd.DataFrame(composition_rows(counts)), COMPOSITION_SPEC,
+                           use_container_width=True)
+
+        st.subheader("🛣️ Per-Approach Counts")
+        st.vega_lite_chart(pd.DataFrame(approach_rows(approaches)), APPROACH_SPEC,
+                           use_container_width=True)
     else:
         st.info("No detection data yet")
 
+    st.subheader("📈 Count History")
+    hist = get_history(st.session_state.history_cursor)
+    if isinstance(hist, dict) and hist.get("points"):
+        st.session_state.history_cursor = append_history(st.session_state.history, hist["points"])
+    if st.session_state.history:
+        st.vega_lite_chart(pd.DataFrame(history_rows(st.session_state.history)), HISTORY_SPEC,
+                           use_container_width=True)
+    else:
+        st.info("No history yet")
+
 # --- Signal Health ---
 with col2:
     st.subheader("🩺 Signal Health")
@@ -88,13 +122,17 @@ with col2:
             st.metric("Memory (%)", metrics.get("mem", "—"))
             st.metric("FPS", metrics.get("fps", "—"))
             st.metric("Avg Confidence", metrics.get("avg_conf", "—"))
+            st.metric("Send Queue", metrics.get("queue_depth", "—"))
+            latency = metrics.get("latency_ms") or {}
+            if latency:
+                st.caption(" | ".join(f"{k}: {v} ms" for k, v in latency.items()))
             st.caption(f"Last seen: {status.get('last_seen')}")
     else:
         st.error("Status not available")
 
     st.markdown("---")
     st.subheader("⏱️ Signal Timings (computed)")
-    timing = compute_timing(counts)
+    timing = compute_timing(approaches)
     if isinstance(timing, dict) and "phases" in timing:
         st.write(f"Cycle Length: {timing.get('cycle_length', '?')}s")
         for lane, phase in timing["phases"].items():
@@ -108,8 +146,9 @@ with col3:
     procs = get_processes()
     if isinstance(procs, dict) and "processes" in procs:
         for p in procs["processes"]:
-            status_icon = "🟢 Running" if p.get("status") == "running" else "🔴 Stopped"
-            st.write(f"- **{p.get('process')}** : {status_icon} (last: {p.get('ts')})")
+            status_icon = {"running": "🟢 Running", "stale": "🟡 No report"}.get(p.get("status"), "🔴 Stopped")
+            pid = f"pid {p['pid']}, " if p.get("pid") else ""
+            st.write(f"- **{p.get('process')}** : {status_icon} ({pid}last: {p.get('ts')})")
     else:
         st.info("No process status available")
 
@@ -122,4 +161,4 @@ with col3:
     else:
         st.info("No alerts yet")
 
-st.caption("Auto-refresh every 5 seconds")
+st.caption(f"Auto-refresh every {CFG.refresh_ms / 1000:g} seconds")
@@ -0,0 +1,63 @@
+# dashboard/charts.py
+"""Vega-Lite specs + row builders for the dashboard charts.
+
+The browser renders these specs, so a refresh on the Streamlit server only
+costs building a few small row lists (no matplotlib figures, no PNG encoding).
+"""
+from collections import deque
+from typing import Dict, List, Optional
+
+HISTORY_POINTS = 120   # samples kept per session (~10 min at 5 s refresh)
+
+COMPOSITION_SPEC = {
+    "mark": {"type": "arc", "innerRadius": 40},
+    "encoding": {
+        "theta": {"field": "Count", "type": "quantitative"},
+        "color": {"field": "Class", "type": "nominal"},
+        "tooltip": [{"field": "Class"}, {"field": "Count"}],
+    },
+}
+
+APPROACH_SPEC = {
+    "mark": "bar",
+    "encoding": {
+        "x": {"field": "Approach", "type": "nominal"},
+        "y": {"field": "Count", "type": "quantitative", "aggregate": "sum"},
+        "color": {"field": "Class", "type": "nominal"},
+        "tooltip": [{"field": "Approach"}, {"field": "Class"}, {"field": "Count"}],
+    },
+}
+
+HISTORY_SPEC = {
+    "mark": {"type": "line", "interpolate": "monotone"},
+    "encoding": {
+        "x": {"field": "ts", "type": "temporal", "title": None},
+        "y": {"field": "Count", "type": "quantitative"},
+        "color": {"field": "Class", "type": "nominal"},
+    },
+}
+
+
+def composition_rows(counts: Dict[str, int]) -> List[dict]:
+    return [{"Class": cls, "Count": cnt} for cls, cnt in counts.items() if cnt]
+
+
+def approach_rows(approaches: Dict[str, Dict[str, int]]) -> List[dict]:
+    return [{"Approach": ap, "Class": cls, "Count": cnt}
+            for ap, counts in approaches.items() for cls, cnt in counts.items()]
+
+
+def new_history() -> deque:
+    return deque(maxlen=HISTORY_POINTS)
+
+
+def append_history(history: deque, points: List[dict]) -> Optional[str]:
+    """Append backend /history points; return the cursor for the next `since=`."""
+    for p in points:
+        history.append((p["ts"], p.get("counts", {})))
+    return history[-1][0] if history else None
+
+
+def history_rows(history: deque) -> List[dict]:
+    return [{"ts": ts, "Class": cls, "Count": cnt}
+            for ts, counts in history for cls, cnt in counts.items()]
@@ -0,0 +1,203 @@
+# edge/annotate.py
+"""Annotation, JPEG encoding and payload serialisation off the inference core.
+
+On CPU-only boxes `results[0].plot()`, the overlay text and json.dumps of the
+payload share a core (and the GIL) with inference. AnnotatePool moves them to
+worker processes:
+
+  * the frame is copied once into a slot of a shared-memory slab; workers
+    draw on that slot in place, so the annotated image comes back without
+    pickling any pixels;
+  * only the box arrays (a few KB) travel through the task queue;
+  * results are handed back strictly in submission order.
+
+Workers are started with "spawn" (the parent may hold CUDA/torch state).
+Spawn re-imports the parent's main module as __mp_main__, so each worker also
+runs edge/inference3.py's module-level imports (only the light edge/common
+modules); torch, ultralytics and cv2 stay out because that script only
+imports them inside startmodel(), behind its __main__ guard. cv2 is imported
+where it is used here too, so importing this module stays cheap.
+`split_cpus()` gives inference its own cores and the workers the rest.
+
+The slab is sized for one frame shape; a frame of another shape (camera
+reopened at a new resolution) drains the pool and starts a new one.
+"""
+import json, os, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from common.postprocess import build_detections
+
+JPEG_QUALITY = 80
+SLOTS_PER_WORKER = 3        # in-flight frames per worker before submit() waits
+RESULT_TIMEOUT = 5.0        # a frame not annotated by then is given up on
+
+# BGR, one per class id (cycled)
+PALETTE = [(56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+           (10, 249, 72), (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0)]
+
+
+def draw_detections(img, cls, conf, xyxy, names, overlays=()):
+    """Boxes + labels like Results.plot(), then (text, (x, y), scale, colour) overlays, in place."""
+    import cv2
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    for c, p, (x1, y1, x2, y2) in zip(cls.tolist(), conf.tolist(), xyxy.astype(np.int32).tolist()):
+        color = PALETTE[c % len(PALETTE)]
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        label = f"{names.get(c, c)} {p:.2f}"
+        (tw, th), _ = cv2.getTextSize(label, font, 0.5, 1)
+        y_top = max(y1 - th - 4, 0)
+        cv2.rectangle(img, (x1, y_top), (x1 + tw, y_top + th + 4), color, -1)
+        cv2.putText(img, label, (x1, y_top + th + 1), font, 0.5, (255, 255, 255), 1)
+    for text, org, scale, color in overlays:
+        cv2.putText(img, text, org, font, scale, color, 2)
+    return img
+
+
+def encode_jpeg(img, quality: int = JPEG_QUALITY) -> bytes:
+    import cv2
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes() if ok else b""
+
+
+def serialise_payload(junction_id, ts, cls, conf, xyxy, counts, extra=None) -> bytes:
+    payload = {"junction_id": junction_id, "ts": ts,
+               "detections": build_detections(cls, conf, xyxy),
+               "counts": counts}
+    if extra:
+        payload.update(extra)   # e.g. "queues" from common/lanes.py
+    return json.dumps(payload).encode()
+
+
+def split_cpus(workers: int):
+    """(inference cpus, worker cpus) out of this process's allowed cpus."""
+    if not hasattr(os, "sched_getaffinity"):
+        return None, None
+    cpus = sorted(os.sched_getaffinity(0))
+    if workers <= 0 or len(cpus) <= workers:
+        return None, None   # not enough cores to dedicate any
+    return set(cpus[:-workers]), set(cpus[-workers:])
+
+
+# --- worker process side ---
+_slab = None
+_views = None
+_names = None
+
+
+def _init_worker(shm_name, shape, slots, names, cpus):
+    global _slab, _views, _names
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    # spawned workers share the parent's resource tracker, so no unregister here:
+    # the parent owns the slab and unlinks it in close()
+    _slab = shared_memory.SharedMemory(name=shm_name)
+    _views = [np.ndarray(shape, np.uint8, _slab.buf, i * int(np.prod(shape))) for i in range(slots)]
+    _names = names
+    import cv2   # pay the import at pool start, not on the first frame
+
+
+def _annotate(slot, cls, conf, xyxy, overlays, junction_id, ts, counts, jpeg, extra=None):
+    draw_detections(_views[slot], cls, conf, xyxy, _names, overlays)
+    payload = serialise_payload(junction_id, ts, cls, conf, xyxy, counts, extra)
+    return payload, (encode_jpeg(_views[slot]) if jpeg else None)
+
+
+# --- parent side ---
+class AnnotatePool:
+    """Process pool that calls on_ready(frame_no, annotated, payload, jpeg) in submission order.
+
+    `annotated` is a view of the shared slot, valid only during the callback;
+    callbacks run on the thread calling submit()/poll() (needed for imshow).
+    A slot whose frame timed out is reused only once its worker has finished
+    with it, so a late worker never draws over the next frame.
+    """
+
+    def __init__(self, workers: int, names: dict, on_ready, cpus=None, jpeg: bool = True):
+        self.workers, self.names, self.on_ready = workers, dict(names), on_ready
+        self.cpus, self.jpeg = cpus, jpeg
+        self.slots = workers * SLOTS_PER_WORKER
+        self._slab = None
+        self._pool = None
+        self._free = deque(range(self.slots))
+        self._inflight = deque()   # (frame_no, slot, future) in submission order
+
+    def _start(self, shape):
+        self.shape = tuple(shape)
+        self._free = deque(range(self.slots))
+        size = int(np.prod(shape))
+        self._slab = shared_memory.SharedMemory(create=True, size=size * self.slots)
+        self._views = [np.ndarray(self.shape, np.uint8, self._slab.buf, i * size) for i in range(self.slots)]
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"),
+                                         initializer=_init_worker,
+                                         initargs=(self._slab.name, self.shape, self.slots,
+                                                   self.names, self.cpus))
+
+    def submit(self, frame_no, frame, cls, conf, xyxy, counts, overlays, junction_id, ts, extra=None):
+        """Queue one frame; waits for the oldest in-flight frame if every slot is busy.
+
+        False if no slot came free within RESULT_TIMEOUT (workers stuck); the frame is dropped.
+        """
+        if self._pool is not None and tuple(frame.shape) != self.shape:
+            print(f"[ANNOTATE] frame shape {self.shape} -> {tuple(frame.shape)}, restarting the pool")
+            self.close()
+        if self._pool is None:
+            self._start(frame.shape)
+        deadline = time.monotonic() + RESULT_TIMEOUT
+        while not self._free:
+            if self._inflight:
+                self.poll(block=True)
+            elif time.monotonic() > deadline:
+                print(f"[ANNOTATE] frame {frame_no} dropped: every slot is held by a timed-out worker")
+                return False
+            else:
+                time.sleep(0.005)   # slots of timed-out frames come back via their done-callback
+        slot = self._free.popleft()
+        np.copyto(self._views[slot], frame)
+        fut = self._pool.submit(_annotate, slot, cls, conf, xyxy, overlays,
+                                junction_id, ts, counts, self.jpeg, extra)
+        self._inflight.append((frame_no, slot, fut))
+        return True
+
+    def poll(self, block: bool = False) -> int:
+        """Deliver finished frames in order; block=True waits for at least the oldest one."""
+        delivered = 0
+        while self._inflight:
+            frame_no, slot, fut = self._inflight[0]
+            if not fut.done() and not (block and delivered == 0):
+                break
+            self._inflight.popleft()
+            delivered += 1
+            try:
+                payload, jpeg = fut.result(timeout=RESULT_TIMEOUT)
+                self.on_ready(frame_no, self._views[slot], payload, jpeg)
+            except BrokenProcessPool:
+                raise
+            except Exception as e:   # includes TimeoutError
+                print(f"[ANNOTATE] frame {frame_no} lost: {e!r}")
+            finally:
+                if fut.done():
+                    self._free.append(slot)
+                else:   # the worker may still be drawing into it
+                    fut.add_done_callback(lambda _, slot=slot: self._free.append(slot))
+        return delivered
+
+    def close(self):
+        if self._pool is not None:
+            try:
+                while self._inflight:
+                    self.poll(block=True)
+            except BrokenProcessPool:
+                pass
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._slab is not None:
+            self._views = []
+            self._slab.close()
+            self._slab.unlink()
+            self._slab = None
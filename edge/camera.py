@@ -0,0 +1,53 @@
+# edge/camera.py
+"""Camera process: owns the video source and publishes frames on the frame bus.
+
+Runs under the watchdog next to inference3.py. Keeping capture in its own
+process means an inference crash or restart never drops the RTSP session.
+"""
+import time, signal
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edge.capture import FrameCapture
+from edge.framebus import FrameBusWriter
+from common import config
+
+CFG = config.get().edge
+JUNCTION_ID = CFG.junction_id
+# file, RTSP URL or camera index ("0" -> device 0)
+VIDEO_PATH = int(CFG.video_path) if CFG.video_path.isdigit() else CFG.video_path
+FRAME_SIZE = (CFG.frame_width, CFG.frame_height)   # what inference consumes; resized once here
+HEALTH_EVERY = 1.0                # seconds between fps/reconnect updates on the bus
+
+
+def run():
+    cap = FrameCapture(VIDEO_PATH, width=FRAME_SIZE[0], height=FRAME_SIZE[1]).start()
+    bus = None
+    seq, next_health = 0, 0.0
+    signal.signal(signal.SIGTERM, lambda *a: sys.exit(0))   # unlink the bus on watchdog stop
+    print(f"[CAMERA] publishing {VIDEO_PATH} for Junction {JUNCTION_ID}")
+    try:
+        while True:
+            new_seq, frame = cap.read(seq)
+            if frame is None:
+                if bus is not None:
+                    bus.update(connected=False, reconnects=cap.reconnects, fps=0.0)
+                continue
+            seq = new_seq
+            if bus is None:   # frame shape is only known once the source is open
+                bus = FrameBusWriter(JUNCTION_ID, frame.shape)
+            bus.write(frame)
+            now = time.monotonic()
+            if now >= next_health:
+                bus.update(fps=cap.fps, reconnects=cap.reconnects, connected=True)
+                next_health = now + HEALTH_EVERY
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.stop()
+        if bus is not None:
+            bus.close()
+
+
+if __name__ == "__main__":
+    run()
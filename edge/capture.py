@@ -0,0 +1,168 @@
+# edge/capture.py
+"""Camera/video ingest on a dedicated reader thread.
+
+The reader decodes continuously and keeps only the newest frame, so a slow
+inference step never lets a backlog build up in the decoder. Frames land in a
+small ring of preallocated NumPy buffers (resize / colour conversion write
+straight into them via `dst=`), and the consumer gets the newest slot without
+a copy: the slot it currently holds is never written until it asks for the
+next one (triple buffering).
+
+When the source ends or stalls the reader reopens it with exponential backoff
+instead of exiting - RTSP streams reconnect, files start over.
+"""
+import threading, time
+import cv2
+import numpy as np
+
+RING_SLOTS = 3              # 1 held by the consumer, 1 newest, 1 being written
+STALL_TIMEOUT = 5.0         # no frame for this long -> reconnect
+BACKOFF_START = 0.5
+BACKOFF_MAX = 10.0
+FPS_ALPHA = 0.1             # EWMA weight for decode FPS
+
+
+class FrameCapture:
+    def __init__(self, source, width: int = None, height: int = None, convert: int = None,
+                 slots: int = RING_SLOTS, realtime: bool = None):
+        """
+        source   : file path, RTSP/HTTP URL or camera index
+        width/height : output size; None keeps the source size
+        convert  : optional cv2.COLOR_* code applied once in the reader
+        realtime : pace file sources at their native FPS (default: True for files)
+        """
+        self.source, self.size, self.convert = source, (width, height), convert
+        self.is_file = isinstance(source, str) and "://" not in source
+        self.realtime = self.is_file if realtime is None else realtime
+        self.slots = max(3, slots)
+        self._ring = None            # allocated on the first frame, once the shape is known
+        self._scratch = None         # decoder output, reused by cap.read()
+        self._resized = None         # intermediate when both resize and convert apply
+        self._latest = -1            # slot index of the newest frame
+        self._held = -1              # slot index handed to the consumer
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.reconnects = 0
+        self.fps = 0.0               # decode FPS (EWMA)
+        self.frames = 0
+
+    # --- reader thread ---
+    def _open(self):
+        if self.is_file or not hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+            cap = cv2.VideoCapture(self.source)
+        else:   # bound blocking reads so a stalled stream is noticed and reopened
+            ms = int(STALL_TIMEOUT * 1000)
+            cap = cv2.VideoCapture(self.source, cv2.CAP_ANY,
+                                   [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, ms])
+        if self.size[0] and not self.is_file:   # only cameras honour a capture size
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+        if not cap.isOpened():
+            cap.release()
+            return None, 0.0
+        src_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        return cap, (1.0 / src_fps if self.realtime and src_fps > 0 else 0.0)
+
+    def _alloc(self, raw):
+        h, w = raw.shape[:2]
+        out_w, out_h = self.size[0] or w, self.size[1] or h
+        channels = raw.shape[2] if raw.ndim == 3 else 1
+        if self.convert is not None:
+            probe = cv2.cvtColor(raw[:1, :1], self.convert)
+            channels = probe.shape[2] if probe.ndim == 3 else 1
+        shape = (out_h, out_w, channels) if channels > 1 else (out_h, out_w)
+        self._ring = [np.empty(shape, np.uint8) for _ in range(self.slots)]
+
+    def _store(self, raw):
+        with self._cond:
+            slot = next(i for i in range(self.slots) if i not in (self._latest, self._held))
+        dst = self._ring[slot]
+        if self.size[0] and raw.shape[:2] != dst.shape[:2]:
+            if self.convert is None:
+                cv2.resize(raw, (dst.shape[1], dst.shape[0]), dst=dst, interpolation=cv2.INTER_AREA)
+            else:
+                self._resized = cv2.resize(raw, (dst.shape[1], dst.shape[0]),
+                                           dst=self._resized, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(self._resized, self.convert, dst=dst)
+        elif self.convert is not None:
+            cv2.cvtColor(raw, self.convert, dst=dst)
+        else:
+            np.copyto(dst, raw)
+        with self._cond:
+            self._latest = slot
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        backoff = BACKOFF_START
+        while not self._stop.is_set():
+            cap, interval = self._open()
+            if cap is None:
+                print(f"[CAPTURE] cannot open {self.source}, retrying in {backoff:.1f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+                continue
+            self.connected = True
+            last, next_due = None, time.perf_counter()
+            while not self._stop.is_set():
+                ok, raw = cap.read(self._scratch)
+                if not ok:
+                    break
+                self._scratch = raw          # the decoder reuses this buffer next time
+                if self._ring is None:
+                    self._alloc(raw)
+                self._store(raw)
+                now = time.perf_counter()
+                if last is not None:   # the first frame after (re)opening has no interval
+                    inst = 1.0 / max(now - last, 1e-6)
+                    self.fps = inst if self.fps == 0 else self.fps + FPS_ALPHA * (inst - self.fps)
+                last = now
+                self.frames += 1
+                backoff = BACKOFF_START      # a good frame resets the backoff
+                if interval:
+                    next_due += interval
+                    delay = next_due - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    else:
+                        next_due = time.perf_counter()
+            cap.release()
+            self.connected = False
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            print(f"[CAPTURE] {'end of file' if self.is_file else 'stream lost'}, "
+                  f"reopening in {backoff:.1f}s")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, BACKOFF_MAX)
+
+    # --- consumer side ---
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def read(self, after_seq: int = 0, timeout: float = STALL_TIMEOUT):
+        """Newest frame with seq > after_seq, as (seq, frame); (None, None) on timeout.
+
+        The returned array is a ring slot: valid until the next read() call.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > after_seq, timeout):
+                return None, None
+            self._held = self._latest
+            return self._seq, self._ring[self._held]
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    release = stop   # cv2.VideoCapture-compatible name
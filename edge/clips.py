@@ -0,0 +1,157 @@
+# edge/clips.py
+"""Pre/post-event clips from a bounded in-memory ring of JPEG frames.
+
+The inference loop offers every frame; at most `fps` of them per second are
+copied and handed to an encoder thread that downsizes and JPEG-encodes them
+into a ring holding the last `seconds` of footage, capped at `budget_bytes`
+(oldest frames go first). Steady state is one rate check per frame on the
+loop plus a few small JPEG encodes per second off it.
+
+`trigger(reason)` marks the moment: the ring's frames become the pre-event
+part, frames keep being collected for `post_seconds`, then the clip is
+written (MJPG .avi under `clip_dir`) and `on_saved(info)` is called, which
+the edge uses to register it with the backend (POST /clips). A trigger
+while a clip is still collecting is ignored.
+"""
+import os, threading, time
+from collections import deque
+from queue import Queue, Full, Empty
+
+import numpy as np
+
+CLIP_SECONDS = 10.0       # pre-event footage kept
+POST_SECONDS = 5.0
+CLIP_FPS = 5.0
+BUDGET_BYTES = 32 << 20
+JPEG_QUALITY = 70
+MAX_WIDTH = 640           # frames are downsized to this width before encoding
+
+
+class ClipRecorder:
+    def __init__(self, junction_id: str, clip_dir: str = "clips", seconds: float = CLIP_SECONDS,
+                 post_seconds: float = POST_SECONDS, fps: float = CLIP_FPS, budget_bytes: int = BUDGET_BYTES,
+                 quality: int = JPEG_QUALITY, on_saved=None):
+        self.junction_id, self.clip_dir = junction_id, clip_dir
+        self.seconds, self.post_seconds, self.fps = seconds, post_seconds, fps
+        self.budget_bytes, self.quality, self.on_saved = budget_bytes, quality, on_saved
+        self._interval = 1.0 / fps
+        self._next = 0.0
+        self._ring = deque()          # (ts, jpeg bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inbox: Queue = Queue(maxsize=2)   # frames waiting for the encoder; full -> skip one
+        self._pending = None          # (reason, trigger ts, pre frames, post frames)
+        self.saved = 0
+        self._thread = threading.Thread(target=self._encode_loop, name="clip-encoder", daemon=True)
+        self._thread.start()
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._bytes
+
+    # --- inference loop side ---
+    def offer(self, frame, ts: float = None):
+        """Called for every frame; cheap unless this one is due for the ring."""
+        now = time.monotonic()
+        if now < self._next:
+            return
+        self._next = now + self._interval
+        try:
+            self._inbox.put_nowait((ts or time.time(), frame.copy()))   # callers reuse their buffer
+        except Full:
+            pass
+
+    def trigger(self, reason: str = "manual") -> bool:
+        """Start a clip around now; False if one is already being collected."""
+        with self._lock:
+            if self._pending is not None:
+                return False
+            self._pending = (reason, time.time(), list(self._ring), [])
+        print(f"[CLIP] {reason}: collecting {self.post_seconds:.0f}s after the trigger")
+        return True
+
+    # --- encoder thread ---
+    def _encode_loop(self):
+        while True:
+            try:
+                item = self._inbox.get(timeout=0.5)
+            except Empty:
+                item = None
+            if item is not None:
+                ts, frame = item
+                if frame is None:
+                    break
+                self._add(ts, self._encode(frame))
+            self._maybe_finish()
+
+    def _encode(self, frame) -> bytes:
+        import cv2   # not at module level: the edge process imports this before the model loads
+        h, w = frame.shape[:2]
+        if w > MAX_WIDTH:
+            frame = cv2.resize(frame, (MAX_WIDTH, int(h * MAX_WIDTH / w)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else b""
+
+    def _add(self, ts, jpeg):
+        with self._lock:
+            self._ring.append((ts, jpeg))
+            self._bytes += len(jpeg)
+            while self._ring and (self._ring[0][0] < ts - self.seconds or self._bytes > self.budget_bytes):
+                self._bytes -= len(self._ring.popleft()[1])
+            if self._pending is not None:
+                self._pending[3].append((ts, jpeg))
+
+    def _maybe_finish(self, force: bool = False):
+        with self._lock:
+            if self._pending is None:
+                return
+            if not force and time.time() < self._pending[1] + self.post_seconds:
+                return
+            reason, t_trigger, pre, post = self._pending
+            self._pending = None
+        try:
+            info = self._write(reason, t_trigger, pre + post)
+        except Exception as e:
+            print(f"[CLIP] writing the {reason} clip failed: {e}")
+            return
+        self.saved += 1
+        print(f"[CLIP] saved {info['path']} ({info['frames']} frames, {info['bytes'] / 1e6:.1f} MB)")
+        if self.on_saved is not None:
+            try:
+                self.on_saved(info)
+            except Exception as e:
+                print("[CLIP] on_saved failed:", e)
+
+    def _write(self, reason, t_trigger, frames) -> dict:
+        if not frames:
+            raise ValueError("no frames buffered")
+        os.makedirs(self.clip_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(t_trigger))
+        safe = "".join(c if c.isalnum() else "_" for c in reason)[:40]
+        path = os.path.join(self.clip_dir, f"{self.junction_id}_{stamp}_{safe}.avi")
+        import cv2
+        first = cv2.imdecode(np.frombuffer(frames[0][1], np.uint8), cv2.IMREAD_COLOR)
+        h, w = first.shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), self.fps, (w, h))
+        try:
+            for _, jpeg in frames:
+                img = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if img is not None and img.shape[:2] == (h, w):
+                    writer.write(img)
+        finally:
+            writer.release()
+        return {"junction_id": self.junction_id, "reason": reason, "ts": t_trigger,
+                "start": frames[0][0], "end": frames[-1][0], "frames": len(frames),
+                "pre_frames": sum(1 for ts, _ in frames if ts <= t_trigger),
+                "path": os.path.abspath(path), "bytes": os.path.getsize(path)}
+
+    def close(self):
+        """Stop the encoder; a clip still collecting is written with what it has."""
+        while True:
+            try:
+                self._inbox.put((None, None), timeout=1)
+                break
+            except Full:
+                continue
+        self._thread.join(timeout=10)
+        self._maybe_finish(force=True)
@@ -0,0 +1,192 @@
+# edge/framebus.py
+"""Frame ring in shared memory: one camera process writes, any number of readers.
+
+Layout of the `smartflow_frames_{junction}` segment:
+
+    header   magic, version, writer pid, slots, height, width, channels
+    live     head seq, decode fps, reconnects, connected   (updated per frame)
+    slot i   seq, ts, frame bytes                          (64-byte aligned)
+
+Frame n goes to slot n % slots. The writer zeroes the slot's seq, copies the
+pixels, then stores seq = n and finally advances head; a reader copies slot
+head % slots and accepts it only if the slot's seq equals head both before and
+after the copy, otherwise it retries on the new head. No locks, so a crashed
+or restarted reader can never block the camera, and the camera process keeps
+its stream open while inference is restarted.
+"""
+import os, struct, time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from edge.stats import _pid_alive
+
+MAGIC, VERSION = b"SFFB", 1
+DEFAULT_SLOTS = 8
+POLL_START = 0.0005         # reader sleep while waiting for a new frame, doubled up to POLL_MAX
+POLL_MAX = 0.005
+ALIGN = 64
+
+_HEADER = struct.Struct("<4sIqIIII")
+_LIVE = struct.Struct("<Qdqq")       # head, fps, reconnects, connected
+_SLOT = struct.Struct("<Qd")         # seq, ts
+_LIVE_OFF = _HEADER.size
+_SLOTS_OFF = -(-(_LIVE_OFF + _LIVE.size) // ALIGN) * ALIGN
+
+
+def segment_name(junction_id: str) -> str:
+    return f"smartflow_frames_{junction_id}"
+
+
+def _slot_stride(frame_bytes: int) -> int:
+    return -(-(ALIGN + frame_bytes) // ALIGN) * ALIGN   # slot header padded to ALIGN
+
+
+def _frame_view(buf, shape, slot, stride):
+    off = _SLOTS_OFF + slot * stride + ALIGN
+    return np.ndarray(shape, np.uint8, buf, off)
+
+
+class FrameBusWriter:
+    """Single producer, owned by the camera process."""
+
+    def __init__(self, junction_id: str, shape, slots: int = DEFAULT_SLOTS):
+        name = segment_name(junction_id)
+        try:   # stale segment left by a crashed run
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+        h, w = shape[:2]
+        c = shape[2] if len(shape) == 3 else 1
+        self.shape, self.slots = tuple(shape), slots
+        self.stride = _slot_stride(h * w * c)
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                              size=_SLOTS_OFF + slots * self.stride)
+        buf = self.shm.buf
+        _HEADER.pack_into(buf, 0, MAGIC, VERSION, os.getpid(), slots, h, w, c)
+        _LIVE.pack_into(buf, _LIVE_OFF, 0, 0.0, 0, 1)
+        self._views = [_frame_view(buf, self.shape, i, self.stride) for i in range(slots)]
+        self.head = 0
+        self.fps, self.reconnects, self.connected = 0.0, 0, True
+
+    def write(self, frame, ts: float = None) -> int:
+        n = self.head + 1
+        slot = n % self.slots
+        off = _SLOTS_OFF + slot * self.stride
+        buf = self.shm.buf
+        _SLOT.pack_into(buf, off, 0, 0.0)                    # invalidate
+        np.copyto(self._views[slot], frame)
+        _SLOT.pack_into(buf, off, n, ts or time.time())      # publish slot
+        self.head = n
+        _LIVE.pack_into(buf, _LIVE_OFF, n, self.fps, self.reconnects, int(self.connected))
+        return n
+
+    def update(self, fps: float = None, reconnects: int = None, connected: bool = None):
+        """Source health, read by consumers and the supervisor's readiness check."""
+        if fps is not None:
+            self.fps = fps
+        if reconnects is not None:
+            self.reconnects = reconnects
+        if connected is not None:
+            self.connected = connected
+        _LIVE.pack_into(self.shm.buf, _LIVE_OFF, self.head, self.fps, self.reconnects, int(self.connected))
+
+    def close(self):
+        self._views = []
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FrameBusReader:
+    """One per consumer; keeps its own cursor, never blocks the writer."""
+
+    def __init__(self, junction_id: str):
+        self.name = segment_name(junction_id)
+        self.shm = None
+        self.shape = None
+        self.missed = 0   # frames that were overwritten before this reader got to them
+
+    def _attach(self) -> bool:
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        try:   # readers must not unlink the writer's segment on exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        magic, version, pid, slots, h, w, c = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            return False
+        self.shm, self.pid, self.slots = shm, pid, slots
+        self.shape = (h, w, c) if c > 1 else (h, w)
+        self.stride = _slot_stride(h * w * c)
+        self._views = [_frame_view(shm.buf, self.shape, i, self.stride) for i in range(slots)]
+        return True
+
+    def info(self):
+        """Writer pid, head seq and source health, or None if no live writer."""
+        if self.shm is None and not self._attach():
+            return None
+        if not _pid_alive(self.pid):
+            self.close()
+            return None
+        head, fps, reconnects, connected = _LIVE.unpack_from(self.shm.buf, _LIVE_OFF)
+        return {"pid": self.pid, "head": head, "fps": fps, "reconnects": reconnects,
+                "connected": bool(connected), "shape": self.shape}
+
+    def _try_read(self, out):
+        buf = self.shm.buf
+        for _ in range(self.slots):
+            head = _LIVE.unpack_from(buf, _LIVE_OFF)[0]
+            off = _SLOTS_OFF + (head % self.slots) * self.stride
+            s1, ts = _SLOT.unpack_from(buf, off)
+            if s1 != head:
+                continue            # writer is on this slot right now
+            np.copyto(out, self._views[head % self.slots])
+            if _SLOT.unpack_from(buf, off)[0] == head:
+                return head, ts
+        return None, None
+
+    def read(self, after_seq: int = 0, timeout: float = 1.0, out=None):
+        """Newest frame with seq > after_seq, copied into `out` (allocated if None).
+
+        Returns (seq, ts, frame) or (None, None, None) on timeout / no writer.
+        Reuse `out` across calls to avoid a per-frame allocation.
+        """
+        deadline = time.monotonic() + timeout
+        poll = POLL_START
+        while True:
+            if self.shm is None and not self._attach():
+                if time.monotonic() >= deadline:
+                    return None, None, None
+                time.sleep(POLL_MAX)
+                continue
+            if out is None or out.shape != self.shape:
+                out = np.empty(self.shape, np.uint8)
+            head = _LIVE.unpack_from(self.shm.buf, _LIVE_OFF)[0]
+            if head < after_seq:      # a new writer restarted the sequence
+                after_seq = 0
+            if head > after_seq:
+                seq, ts = self._try_read(out)
+                if seq is not None:
+                    if after_seq and seq - after_seq > 1:
+                        self.missed += seq - after_seq - 1
+                    return seq, ts, out
+            if time.monotonic() >= deadline:
+                if not _pid_alive(self.pid):
+                    self.close()      # writer died; attach to its replacement next time
+                return None, None, None
+            time.sleep(poll)
+            poll = min(poll * 2, POLL_MAX)
+
+    def close(self):
+        if self.shm is not None:
+            self._views = []
+            self.shm.close()
+            self.shm = None
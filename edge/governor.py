@@ -0,0 +1,91 @@
+# edge/governor.py
+"""Picks the inference imgsz per frame from a few pre-warmed sizes.
+
+    edge.imgsz_sizes     [384, 480, 640]   candidates ([] = fixed edge.imgsz)
+    edge.target_fps      8                 processed-frame budget: 1000 / target_fps ms
+    edge.sparse_objects  0.5               below this many objects per frame, step down
+
+Per processed frame the loop reports its inference+post latency and object
+count; both are smoothed (EWMA). The governor steps down one size when the
+current size's latency is over budget, steps up when the next size's
+estimated latency (measured latency scaled by the pixel ratio) fits in
+UP_HEADROOM of the budget and the scene is not near-empty, and steps down in
+a near-empty scene where a larger input has nothing to resolve.
+
+Hysteresis: the down/up thresholds are apart (budget vs UP_HEADROOM x
+budget), every switch is followed by `hold_frames` without another one, and
+an upshift that has to be undone within 2 x hold doubles the wait before the
+next upshift (up to MAX_BACKOFF x), so a borderline size is not retried
+every second.
+"""
+from typing import List, Optional
+
+HOLD_FRAMES = 30
+UP_HEADROOM = 0.75
+MAX_BACKOFF = 16
+EWMA_ALPHA = 0.1
+
+
+class ResolutionGovernor:
+    def __init__(self, sizes: List[int], start: Optional[int] = None, hold_frames: int = HOLD_FRAMES,
+                 up_headroom: float = UP_HEADROOM):
+        self.sizes = sorted(set(sizes))
+        if not self.sizes:
+            raise ValueError("no candidate sizes")
+        self.index = self.sizes.index(start) if start in self.sizes else 0
+        self.hold_frames, self.up_headroom = hold_frames, up_headroom
+        self.latency_ms = None       # EWMA at the current size
+        self.objects = None          # EWMA objects per frame
+        self.switches = 0
+        self._since_switch = 0
+        self._up_wait = hold_frames
+        self._last_up = None         # frames since the last upshift, for backoff
+
+    @property
+    def imgsz(self) -> int:
+        return self.sizes[self.index]
+
+    def _switch(self, step: int, why: str):
+        old = self.imgsz
+        self.index += step
+        if step > 0:
+            self._last_up = 0
+        elif self._last_up is not None and self._last_up < 2 * self.hold_frames:
+            self._up_wait = min(self._up_wait * 2, self.hold_frames * MAX_BACKOFF)   # flapped
+        # the new size's latency is unknown: start from the pixel-ratio estimate
+        self.latency_ms *= (self.imgsz / old) ** 2
+        self._since_switch = 0
+        self.switches += 1
+        print(f"[GOVERNOR] imgsz {old} -> {self.imgsz}: {why}")
+
+    def observe(self, latency_ms: float, objects: int, target_fps: float, sparse_objects: float = 0.0) -> int:
+        """Fold in one processed frame; returns the imgsz for the next one."""
+        if self.latency_ms is None:
+            self.latency_ms, self.objects = latency_ms, float(objects)
+        else:
+            self.latency_ms += EWMA_ALPHA * (latency_ms - self.latency_ms)
+            self.objects += EWMA_ALPHA * (objects - self.objects)
+        self._since_switch += 1
+        if self._last_up is not None:
+            self._last_up += 1
+            if self._last_up > 2 * self.hold_frames:
+                self._last_up = None
+                self._up_wait = max(self.hold_frames, self._up_wait // 2)   # stable again: relax
+        if self._since_switch < self.hold_frames or target_fps <= 0:
+            return self.imgsz
+
+        budget = 1000.0 / target_fps
+        sparse = self.objects < sparse_objects
+        if self.index > 0 and self.latency_ms > budget:
+            self._switch(-1, f"{self.latency_ms:.0f} ms over the {budget:.0f} ms budget")
+        elif self.index > 0 and sparse:
+            self._switch(-1, f"near-empty scene ({self.objects:.1f} objects/frame)")
+        elif self.index + 1 < len(self.sizes) and not sparse and self._since_switch >= self._up_wait:
+            estimate = self.latency_ms * (self.sizes[self.index + 1] / self.imgsz) ** 2
+            if estimate < self.up_headroom * budget:
+                self._switch(1, f"~{estimate:.0f} ms fits the {budget:.0f} ms budget")
+        return self.imgsz
+
+    def state(self) -> dict:
+        return {"imgsz": self.imgsz, "sizes": self.sizes, "latency_ms": round(self.latency_ms or 0.0, 2),
+                "objects": round(self.objects or 0.0, 2), "switches": self.switches}
@@ -1,18 +1,42 @@
 # edge/heartbeat.py
 import time, requests, psutil
-JUNCTION = "J1"
-BACKEND = "http://127.0.0.1:8000/heartbeat"   # adjust if backend host differs
+import sys, os
 
-def send_heartbeat(fps=0.0, avg_conf=0.0, camera_ok=True):
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edge.stats import StatsReader, STAGES
+from common import config
+
+CFG = config.get().edge
+JUNCTION = CFG.junction_id
+BACKEND = f"{CFG.backend_url}/heartbeat"   # edge.backend_url in config.json
+INTERVAL = CFG.heartbeat_interval
+STATS_MAX_AGE = 5.0   # inference stats older than this mean the loop is stalled
+
+stats_reader = StatsReader(JUNCTION)
+psutil.cpu_percent(interval=None)   # prime: later calls return usage since the previous call
+
+def send_heartbeat():
+    stats = stats_reader.read(max_age=STATS_MAX_AGE)
     payload = {
         "junction_id": JUNCTION,
         "ts": time.time(),
-        "cpu": psutil.cpu_percent(interval=0.5),
+        "cpu": psutil.cpu_percent(interval=None),
         "mem": psutil.virtual_memory().percent,
-        "fps": fps,
-        "avg_conf": avg_conf,
-        "camera_ok": camera_ok
+        "fps": 0.0,
+        "avg_conf": 0.0,
+        "camera_ok": False
     }
+    if stats is not None and not stats["stale"]:   # stale: the loop stalled, report it as down
+        payload.update({
+            "fps": round(stats["fps"], 2),
+            "avg_conf": round(stats["avg_conf"], 3),
+            "camera_ok": stats["camera_ok"],
+            "queue_depth": stats["queue_depth"],
+            "frames": stats["frames"],
+            "capture_fps": round(stats["capture_fps"], 2),
+            "imgsz": stats["imgsz"],
+            "latency_ms": {s: round(stats[f"{s}_ms"], 2) for s in STAGES}
+        })
     try:
         requests.post(BACKEND, json=payload, timeout=2.0)
     except Exception as e:
@@ -21,4 +45,4 @@ def send_heartbeat(fps=0.0, avg_conf=0.0, camera_ok=True):
 if __name__ == "__main__":
     while True:
         send_heartbeat()
-        time.sleep(10)
+        time.sleep(INTERVAL)
@@ -1,46 +1,165 @@
-import cv2
-import requests
+# ultralytics/torch, cv2, psutil and requests are imported where first used (edge/model_cache.py,
+# startmodel, backend_worker) so stats and the metrics port are up before the model loads
 import threading
 import time
-from collections import Counter
-from ultralytics import YOLO
-from queue import Queue
-import psutil
-import sys
+from queue import Queue, Full
+import sys, os, json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edge.stats import StatsWriter, STAGES
+from edge.framebus import FrameBusReader
+from edge.annotate import AnnotatePool, split_cpus, encode_jpeg, draw_detections
+from edge.model_cache import load_model, load_models
+from edge.governor import ResolutionGovernor
+from edge.clips import ClipRecorder
+from edge.tiling import TiledPredictor
+from common.postprocess import postprocess, extract_boxes, count_classes, build_detections
+from common import config
+from common.metrics import REGISTRY, start_http_server
+from common.profiler import SpanRing, start_capture, install_signal_toggle, DEFAULT_SECONDS
+from common.windowstats import WindowedStats
+from common.lanes import QueueEstimator
+
+CFG = config.get().edge
+METRICS_PORT = CFG.metrics_port        # Prometheus scrape port on the edge box
+SEND_QUEUE_MAX = CFG.send_queue_max    # payloads beyond this are dropped instead of piling up in RAM
+CAMERA_TIMEOUT = 5.0  # no frame on the bus for this long -> camera_ok=False
+ANNOTATE_WORKERS = CFG.annotate_workers  # >0: annotation, JPEG and payload JSON run in this many processes (CPU-only boxes)
+CLIP_COOLDOWN = 60.0  # seconds between automatic (object count) clip triggers
+
+STAGE_LATENCY = REGISTRY.histogram("smartflow_edge_stage_seconds", "Per-frame stage latency", ["stage"])
+FRAMES = REGISTRY.counter("smartflow_edge_frames", "Frames read from the source by outcome", ["outcome"])
+FPS = REGISTRY.gauge("smartflow_edge_fps", "Processed frames per second (EWMA)")
+# resolve label children once so the hot path is a plain method call
+STAGE = {s: STAGE_LATENCY.labels(s) for s in STAGES}
+STARTUP = REGISTRY.gauge("smartflow_edge_startup_seconds",
+                         "Startup cost by phase; first_detection is process start -> first processed frame",
+                         ["phase"])
+PROCESSED, SKIPPED, DROPPED, MISSED = (FRAMES.labels(o) for o in ("processed", "skipped", "dropped", "missed"))
+IMGSZ_GAUGE = REGISTRY.gauge("smartflow_edge_imgsz", "Inference input size in use (edge/governor.py)")
+SPANS = SpanRing()   # per-frame timing spans, newest ~4k kept
+OBJECTS = WindowedStats(minutes=60)   # objects per processed frame, per-minute max/mean over the last hour
+
+PREVIEW = {"jpeg": None, "frame": None}   # latest annotated frame, see /preview.jpg
+CLIPS = {"recorder": None}   # edge/clips.py ring, see /clip
+GOVERNOR = {"governor": None}   # edge/governor.py, see /debug/governor
+
+def _preview_route(query):
+    jpeg = PREVIEW["jpeg"]
+    if jpeg is None:
+        if PREVIEW["frame"] is None:
+            raise LookupError("no frame yet")
+        jpeg = encode_jpeg(PREVIEW["frame"])
+    return "image/jpeg", jpeg
+
+def _clip_route(query):
+    recorder = CLIPS["recorder"]
+    if recorder is None:
+        raise LookupError("clip recording is off (edge.clip_seconds = 0)")
+    started = recorder.trigger(query.get("reason", "manual"))
+    return "application/json", json.dumps({"started": started}).encode()
+
+def _governor_route(query):
+    governor = GOVERNOR["governor"]
+    if governor is None:
+        raise LookupError("fixed imgsz (edge.imgsz_sizes is empty)")
+    return "application/json", json.dumps(governor.state()).encode()
+
+def _profile_route(query):
+    path = start_capture(float(query.get("seconds", DEFAULT_SECONDS)))
+    return "application/json", json.dumps({"started": path is not None, "file": path}).encode()
+
+# extra routes on the metrics port: on-demand flame-graph capture + span dumps
+DEBUG_ROUTES = {
+    "/debug/profile": _profile_route,
+    "/debug/spans": lambda q: ("application/json", SPANS.to_trace_json().encode()),
+    "/debug/spans/summary": lambda q: ("application/json", json.dumps(SPANS.summary()).encode()),
+    "/debug/governor": _governor_route,
+    "/debug/objects": lambda q: ("application/json", json.dumps(OBJECTS.report(last=int(q.get("minutes", 60)))).encode()),
+    "/preview.jpg": _preview_route,   # headless boxes: view the annotated stream without imshow
+    "/clip": _clip_route,             # /clip?reason=... saves the last clip_seconds + clip_post_seconds
+}
 
 def startmodel():
-    MODEL_PATH = "ai/runs/detect/train15/weights/best.pt"   # Change path if needed
-    VIDEO_PATH = "data/sample2.mp4"                         # Change path if needed
-    BACKEND_URL = "http://127.0.0.1:8000/detections"
-    JUNCTION_ID = "J1"
+    MODEL_PATH = CFG.model_path
+    BACKEND_URL = f"{CFG.backend_url}/detections"
+    JUNCTION_ID = CFG.junction_id
+    IMGSZ, DEVICE = CFG.imgsz, CFG.device
 
-    # Load YOLO model
-    print("[INFO] Loading YOLO model...")
-    model = YOLO(MODEL_PATH)
+    # Live stats for the heartbeat agent (shared memory, see edge/stats.py)
+    stats = StatsWriter(JUNCTION_ID)
+    send_ms = [0.0]   # written by the backend thread, published by the main loop
+
+    start_http_server(METRICS_PORT, routes=DEBUG_ROUTES, token=CFG.debug_token)   # debug routes off without a token
+    install_signal_toggle()   # kill -USR1 <pid> -> profiles/profile-*.folded
+    config.start_reloader()   # frame_skip / conf follow config.json edits
 
-    # Video source
-    cap = cv2.VideoCapture(VIDEO_PATH)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 270)
+    # Load YOLO model: cached export + warm-up, so the first real frame is not the slow one
+    print("[INFO] Loading YOLO model...")
+    governor = None
+    if CFG.imgsz_sizes:   # every candidate size pre-warmed, the governor switches between them
+        models, phases = load_models(MODEL_PATH, list(CFG.imgsz_sizes) + [IMGSZ], DEVICE, CFG.export_format,
+                                     conf=CFG.conf)
+        governor = GOVERNOR["governor"] = ResolutionGovernor(list(models), start=IMGSZ)
+        model = models[IMGSZ]
+    else:
+        model, phases = load_model(MODEL_PATH, IMGSZ, DEVICE, CFG.export_format, conf=CFG.conf)
+    import cv2, psutil   # cv2 is already loaded by ultralytics at this point
+    imgsz = IMGSZ
+    stats.values["imgsz"] = imgsz
+    IMGSZ_GAUGE.set(imgsz)
+    for phase, seconds in phases.items():
+        STARTUP.labels(phase).set(seconds)
+    first_detection = True
+    lanes = None
+    if CFG.lanes:   # queue length / occupancy per approach, sent next to counts
+        lanes = QueueEstimator(CFG.lanes, model.names, CFG.queue_gap_m)
+    tiler = None
+    if CFG.tile_size > 0:   # far-field tiles next to the full frame, see edge/tiling.py
+        tiler = TiledPredictor(model, CFG.tile_size, CFG.tile_overlap, CFG.tile_region)
 
-    if not cap.isOpened():
-        print("[ERROR] Failed to open video source.")
-        sys.exit(1)
+    # Frames come from edge/camera.py over shared memory (edge/framebus.py), so
+    # restarting this process does not drop the camera connection
+    bus = FrameBusReader(JUNCTION_ID)
+    frame_buf = None   # reused copy target for bus reads
 
-    FRAME_SKIP = 2   # process every 2nd frame (reduce load)
     frame_id = 0
+    last_seq = 0
 
     # Queue for backend sending
-    send_queue = Queue()
+    send_queue = Queue(maxsize=SEND_QUEUE_MAX)
+
+    def register_clip(info):
+        """Runs on the clip encoder thread once a clip is on disk."""
+        import requests
+        try:
+            requests.post(f"{CFG.backend_url}/clips", json=info, timeout=2)
+        except Exception as e:
+            print("[ERROR] Clip registration failed:", e)
+
+    clips = None
+    if CFG.clip_seconds > 0:
+        clips = CLIPS["recorder"] = ClipRecorder(
+            JUNCTION_ID, CFG.clip_dir, CFG.clip_seconds, CFG.clip_post_seconds, CFG.clip_fps,
+            CFG.clip_budget_mb << 20, on_saved=register_clip)
+    last_auto_clip = 0.0
 
     def backend_worker():
         """Thread worker that sends data to backend."""
+        import requests
         while True:
             payload = send_queue.get()
             if payload is None:
                 break
             try:
-                r = requests.post(BACKEND_URL, json=payload, timeout=1)
+                t0 = time.perf_counter()
+                if isinstance(payload, bytes):   # already serialised by the annotate pool
+                    r = requests.post(BACKEND_URL, data=payload, timeout=1,
+                                      headers={"Content-Type": "application/json"})
+                else:
+                    r = requests.post(BACKEND_URL, json=payload, timeout=1)
+                send_ms[0] = (time.perf_counter() - t0) * 1000
+                STAGE["send"].observe(send_ms[0] / 1000)
                 print(f"[BACKEND RESPONSE] {r.status_code}: {r.text[:80]}")
             except Exception as e:
                 print("[ERROR] Backend POST failed:", e)
@@ -49,58 +168,158 @@ def startmodel():
     # Start backend thread
     threading.Thread(target=backend_worker, daemon=True).start()
 
+    def deliver(frame_no, annotated, payload, jpeg):
+        """Annotate-pool results, in frame order: ship the payload, show the frame."""
+        try:
+            send_queue.put_nowait(payload)
+        except Full:
+            DROPPED.inc()
+        PREVIEW["jpeg"] = jpeg
+        cv2.imshow("Fast Detections", annotated)
+
+    pool = None
+    if ANNOTATE_WORKERS > 0:
+        # inference keeps its own cores, the pool gets the rest
+        infer_cpus, pool_cpus = split_cpus(ANNOTATE_WORKERS)
+        if infer_cpus:
+            os.sched_setaffinity(0, infer_cpus)
+            import torch
+            torch.set_num_threads(len(infer_cpus))
+        pool = AnnotatePool(ANNOTATE_WORKERS, model.names, on_ready=deliver, cpus=pool_cpus)
+
     print("[INFO] Model started. Press 'q' to stop.")
 
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("[INFO] End of video or camera disconnected.")
-                break
+            t_decode = time.perf_counter()
+            seq, _, frame = bus.read(last_seq, timeout=CAMERA_TIMEOUT, out=frame_buf)
+            if frame is None:
+                print("[WARN] No frame on the bus, is edge/camera.py running?")
+                stats.publish(camera_ok=False, capture_fps=0.0)
+                continue
+            frame_buf = frame
+            if last_seq and seq - last_seq > 1:
+                MISSED.inc(seq - last_seq - 1)   # decoded while we were busy, never seen
+            last_seq = seq
+            if clips is not None:
+                clips.offer(frame)   # rate-limited copy into the pre-event ring
 
             frame_id += 1
-            if frame_id % FRAME_SKIP != 0:
+            live = config.get().edge   # hot-reloaded tunables, one lookup per frame
+            if frame_id % live.frame_skip != 0:
+                SKIPPED.inc()
                 continue
 
             start_time = time.time()
-            results = model.predict(frame, imgsz=480, conf=0.25, device=0, verbose=False)
-
-            detections = []
-            class_names = model.names
-            vehicle_labels = []
-
-            for r in results:
-                for box in r.boxes:
-                    cls_id = int(box.cls)
-                    conf = float(box.conf)
-                    xyxy = [float(x) for x in box.xyxy[0]]
-                    detections.append({"cls": cls_id, "conf": conf, "xyxy": xyxy})
-                    vehicle_labels.append(class_names[cls_id])
-
-            counts = dict(Counter(vehicle_labels))
-            payload = {
-                "junction_id": JUNCTION_ID,
-                "ts": time.time(),
-                "detections": detections,
-                "counts": counts
-            }
+            t_infer = time.perf_counter()
+            if tiler is not None:
+                results = None
+                cls_ids, confs, boxes_xyxy = tiler(frame, imgsz, live.conf, DEVICE)
+            else:
+                results = model.predict(frame, imgsz=imgsz, conf=live.conf, device=DEVICE, verbose=False)
+            t_post = time.perf_counter()
+
+            # one host copy + NumPy instead of per-box tensor access
+            if results is None:   # tiled: boxes are merged arrays already
+                counts = count_classes(cls_ids, model.names)
+                if pool is None:
+                    detections = build_detections(cls_ids, confs, boxes_xyxy)
+            elif pool is None:
+                detections, counts, (cls_ids, confs, boxes_xyxy) = postprocess(results, model.names)
+            else:   # the pool builds and serialises the payload
+                cls_ids, confs, boxes_xyxy = extract_boxes(results)
+                counts = count_classes(cls_ids, model.names)
+            queues = lanes(cls_ids, boxes_xyxy, frame.shape) if lanes is not None else None
+            t_extract = time.perf_counter()
 
             # Send to backend asynchronously
-            send_queue.put(payload)
+            if pool is None:
+                payload = {
+                    "junction_id": JUNCTION_ID,
+                    "ts": time.time(),
+                    "detections": detections,
+                    "counts": counts
+                }
+                if queues:
+                    payload["queues"] = queues
+                try:
+                    send_queue.put_nowait(payload)
+                except Full:
+                    DROPPED.inc()
+            if (clips is not None and live.clip_trigger_count > 0 and len(cls_ids) >= live.clip_trigger_count
+                    and time.time() - last_auto_clip > CLIP_COOLDOWN):
+                last_auto_clip = time.time()
+                clips.trigger(f"count_{len(cls_ids)}")
+            OBJECTS.add(len(cls_ids))
+            t_done = time.perf_counter()
+            if governor is not None:
+                size = governor.observe((t_done - t_infer) * 1000, len(cls_ids), live.target_fps, live.sparse_objects)
+                if size != imgsz:
+                    imgsz, model = size, models[size]
+                    if tiler is not None:
+                        tiler.model = model
+                    stats.values["imgsz"] = imgsz
+                    IMGSZ_GAUGE.set(imgsz)
+            PROCESSED.inc()
+            STAGE["decode"].observe(t_infer - t_decode)
+            STAGE["infer"].observe(t_post - t_infer)
+            STAGE["post"].observe(t_done - t_post)
 
-            # Annotate frame
-            annotated_frame = results[0].plot()
+            health = bus.info() or {}
+            stats.values.update(camera_ok=health.get("connected", False),
+                                capture_fps=health.get("fps", 0.0), reconnects=health.get("reconnects", 0))
+            stats.frame({"decode": (t_infer - t_decode) * 1000,
+                         "infer": (t_post - t_infer) * 1000,
+                         "post": (t_done - t_post) * 1000,
+                         "send": send_ms[0]},
+                        confs=confs,
+                        queue_depth=send_queue.qsize())
+            FPS.set(stats.values["fps"])
+            if first_detection:
+                # covers imports, model load and warm-up; the watchdog adds its restart delay
+                startup = time.time() - psutil.Process().create_time()
+                STARTUP.labels("first_detection").set(startup)
+                stats.publish(startup_ms=startup * 1000)
+                print(f"[INFO] First detection {startup:.2f}s after process start")
+                first_detection = False
 
-            # Show FPS
+            # Annotate frame
+            t_plot = time.perf_counter()
             fps = 1 / (time.time() - start_time)
-            cv2.putText(annotated_frame, f"FPS: {fps:.2f}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            if pool is not None:
+                overlays = [(f"FPS: {fps:.2f}", (10, 30), 1, (0, 255, 0)),
+                            (f"Counts: {counts}", (10, 60), 0.7, (255, 255, 255))]
+                if not pool.submit(frame_id, frame, cls_ids, confs, boxes_xyxy, counts, overlays,
+                                   JUNCTION_ID, time.time(), {"queues": queues} if queues else None):
+                    DROPPED.inc()
+                t_show = time.perf_counter()
+                pool.poll()   # deliver() payloads + imshow for frames that are done, in order
+            else:
+                if results is None:
+                    annotated_frame = draw_detections(frame.copy(), cls_ids, confs, boxes_xyxy, model.names)
+                else:
+                    annotated_frame = results[0].plot()
+
+                # Show FPS
+                cv2.putText(annotated_frame, f"FPS: {fps:.2f}", (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+                # Show counts
+                cv2.putText(annotated_frame, f"Counts: {counts}", (10, 60),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
 
-            # Show counts
-            cv2.putText(annotated_frame, f"Counts: {counts}", (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                t_show = time.perf_counter()
+                PREVIEW["frame"] = annotated_frame
+                cv2.imshow("Fast Detections", annotated_frame)
+            key = cv2.waitKey(1) & 0xFF
+            t_end = time.perf_counter()
 
-            cv2.imshow("Fast Detections", annotated_frame)
+            SPANS.add(frame_id, "decode", t_decode, t_infer)
+            SPANS.add(frame_id, "predict", t_infer, t_post)
+            SPANS.add(frame_id, "extract", t_post, t_extract)
+            SPANS.add(frame_id, "queue", t_extract, t_done)
+            SPANS.add(frame_id, "plot", t_plot, t_show)
+            SPANS.add(frame_id, "display", t_show, t_end)
 
             # Optional resource monitor
             if frame_id % 50 == 0:
@@ -108,7 +327,7 @@ def startmodel():
                 ram = psutil.virtual_memory().percent
                 print(f"[INFO] CPU: {cpu}% | RAM: {ram}% | FPS: {fps:.2f}")
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key == ord('q'):
                 print("[INFO] Exiting...")
                 break
 
@@ -116,9 +335,14 @@ def startmodel():
         print("[INFO] Interrupted by user.")
 
     finally:
-        cap.release()
+        bus.close()
+        if clips is not None:
+            clips.close()   # writes a clip that is still collecting
+        if pool is not None:
+            pool.close()   # flushes in-flight frames through deliver()
         cv2.destroyAllWindows()
         send_queue.put(None)  # Stop backend thread
+        stats.close()
         print("[INFO] Resources released. Program ended.")
 
 if __name__ == "__main__":
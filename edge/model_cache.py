@@ -0,0 +1,142 @@
+# edge/model_cache.py
+"""Model loading for fast (re)starts: exported-model cache + warm-up.
+
+The first start after new weights exports them once to the fastest format
+this box supports (TensorRT engine on CUDA with tensorrt, else ONNX Runtime /
+OpenVINO when installed, else TorchScript). The result is kept under
+CACHE_DIR, keyed by the weights' content hash, imgsz and device, so every
+later start, including each watchdog restart, loads the exported graph
+directly. warm_up() then runs a few dummy frames at the target size, so graph
+setup, allocator growth and cuDNN autotuning happen before the process
+reports ready instead of on the first real frames.
+
+    python edge/model_cache.py ai/runs/detect/train15/weights/best.pt --imgsz 480
+
+pre-builds the cache (e.g. at deploy time).
+"""
+import argparse, hashlib, importlib.util, os, shutil, time
+
+CACHE_DIR = "models/cache"
+EXPORT_FORMAT = "auto"      # auto | engine | onnx | openvino | torchscript | none (config: edge.export_format)
+WARMUP_RUNS = 2
+
+SUFFIX = {"engine": ".engine", "onnx": ".onnx", "torchscript": ".torchscript", "openvino": "_openvino_model"}
+
+
+def _has(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def pick_format(device) -> str:
+    cuda = device not in ("cpu", None)
+    if cuda and _has("tensorrt"):
+        return "engine"
+    if not cuda and _has("onnxruntime"):
+        return "onnx"
+    if not cuda and _has("openvino"):
+        return "openvino"
+    return "torchscript"
+
+
+def weights_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def cache_path(weights: str, fmt: str, imgsz: int, device, cache_dir: str = CACHE_DIR) -> str:
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    dev = "cpu" if device in ("cpu", None) else f"cuda{device}"
+    return os.path.join(cache_dir, f"{stem}-{weights_digest(weights)}-{imgsz}-{dev}{SUFFIX[fmt]}")
+
+
+def export_cached(weights: str, imgsz: int, device, fmt: str = EXPORT_FORMAT, cache_dir: str = CACHE_DIR):
+    """Path of the exported model, exporting on a cache miss; the .pt path if export is off/fails."""
+    if fmt == "none":
+        return weights
+    if fmt == "auto":
+        fmt = pick_format(device)
+    target = cache_path(weights, fmt, imgsz, device, cache_dir)
+    if os.path.exists(target):
+        return target
+    from ultralytics import YOLO
+    print(f"[MODEL] no cached {fmt} export for {weights}, exporting (one-off)...")
+    try:
+        out = YOLO(weights).export(format=fmt, imgsz=imgsz, device=device, half=(fmt == "engine"))
+    except Exception as e:
+        print(f"[MODEL] export to {fmt} failed, using {weights}: {e}")
+        return weights
+    os.makedirs(cache_dir, exist_ok=True)
+    shutil.move(str(out), target + ".tmp")
+    os.replace(target + ".tmp", target)   # readers never see a half-written cache entry
+    return target
+
+
+def warm_up(model, imgsz: int, device, runs: int = WARMUP_RUNS, conf: float = 0.25):
+    import numpy as np
+    frame = np.zeros((imgsz, imgsz, 3), np.uint8)
+    for _ in range(runs):
+        model.predict(frame, imgsz=imgsz, conf=conf, device=device, verbose=False)
+
+
+def load_model(weights: str, imgsz: int, device, fmt: str = EXPORT_FORMAT, conf: float = 0.25):
+    """(model, {phase: seconds}) with imports deferred to here and warm-up done."""
+    phases = {}
+    t0 = time.perf_counter()
+    from ultralytics import YOLO
+    phases["import"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    path = export_cached(weights, imgsz, device, fmt)
+    model = YOLO(path, task="detect")
+    phases["load"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    warm_up(model, imgsz, device, conf=conf)
+    phases["warmup"] = time.perf_counter() - t0
+    print(f"[MODEL] {path} ready: " + ", ".join(f"{k} {v:.2f}s" for k, v in phases.items()))
+    return model, phases
+
+
+def load_models(weights: str, sizes, device, fmt: str = EXPORT_FORMAT, conf: float = 0.25):
+    """({imgsz: model}, {phase: seconds}) for edge/governor.py, every size warmed up.
+
+    Exports are per imgsz, so each size gets its own cached export; when
+    export is off or fails, the .pt model takes any size and is loaded once.
+    """
+    phases = {"import": 0.0, "load": 0.0, "warmup": 0.0}
+    t0 = time.perf_counter()
+    from ultralytics import YOLO
+    phases["import"] = time.perf_counter() - t0
+
+    loaded, models = {}, {}
+    for size in sorted(set(sizes)):
+        t0 = time.perf_counter()
+        path = export_cached(weights, size, device, fmt)
+        if path not in loaded:
+            loaded[path] = YOLO(path, task="detect")
+        phases["load"] += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        warm_up(loaded[path], size, device, conf=conf)
+        phases["warmup"] += time.perf_counter() - t0
+        models[size] = loaded[path]
+    print(f"[MODEL] sizes {sorted(models)} ready ({len(loaded)} model(s)): "
+          + ", ".join(f"{k} {v:.2f}s" for k, v in phases.items()))
+    return models, phases
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("weights")
+    ap.add_argument("--imgsz", type=int, default=480)
+    ap.add_argument("--device", default="0")
+    ap.add_argument("--format", default=EXPORT_FORMAT)
+    args = ap.parse_args()
+    device = int(args.device) if args.device.isdigit() else args.device
+    print(export_cached(args.weights, args.imgsz, device, args.format))
+
+
+if __name__ == "__main__":
+    main()
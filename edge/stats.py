@@ -0,0 +1,159 @@
+# edge/stats.py
+"""Live pipeline stats shared between the inference loop and the heartbeat agent.
+
+The inference process owns a small shared-memory segment and overwrites it
+after every processed frame; readers (heartbeat, watchdog) attach by name and
+copy it out without locks or sampling delays. A sequence counter around each
+write (seqlock) lets readers detect and retry a torn read.
+"""
+import os, struct, time
+from multiprocessing import shared_memory, resource_tracker
+
+STAGES = ("decode", "infer", "post", "send")
+
+# (name, struct format) - append new fields at the end
+FIELDS = (
+    ("pid", "q"),
+    ("ts", "d"),
+    ("camera_ok", "?"),
+    ("fps", "d"),
+    ("avg_conf", "d"),
+    ("queue_depth", "q"),
+    ("frames", "q"),
+) + tuple((f"{s}_ms", "d") for s in STAGES) + (
+    ("capture_fps", "d"),
+    ("reconnects", "q"),
+    ("startup_ms", "d"),
+    ("imgsz", "q"),
+)
+
+_SEQ = struct.Struct("<Q")
+_BODY = struct.Struct("<" + "".join(fmt for _, fmt in FIELDS))
+SIZE = _SEQ.size + _BODY.size
+EWMA_ALPHA = 0.2
+
+
+def segment_name(junction_id: str) -> str:
+    return f"smartflow_stats_{junction_id}"
+
+
+class StatsWriter:
+    """Single writer, owned by the inference process."""
+
+    def __init__(self, junction_id: str):
+        name = segment_name(junction_id)
+        try:   # stale segment left by a crashed run
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        self.seq = 0
+        self.values = {name: 0 for name, _ in FIELDS}
+        self.values.update(pid=os.getpid(), camera_ok=True)
+        self._last_frame = None
+
+    def frame(self, stage_ms: dict, confs=(), queue_depth: int = 0):
+        """Fold one processed frame into the EWMAs and publish."""
+        v, now = self.values, time.time()
+        if self._last_frame is not None:
+            inst = 1.0 / max(now - self._last_frame, 1e-6)
+            v["fps"] = inst if v["frames"] == 0 else v["fps"] + EWMA_ALPHA * (inst - v["fps"])
+        self._last_frame = now
+        for stage, ms in stage_ms.items():
+            key = f"{stage}_ms"
+            v[key] = ms if v["frames"] == 0 else v[key] + EWMA_ALPHA * (ms - v[key])
+        if len(confs):
+            mean = float(confs.mean()) if hasattr(confs, "mean") else float(sum(confs)) / len(confs)
+            v["avg_conf"] = mean if v["avg_conf"] == 0 else v["avg_conf"] + EWMA_ALPHA * (mean - v["avg_conf"])
+        v["frames"] += 1
+        v["queue_depth"] = queue_depth
+        self.publish()
+
+    def publish(self, **fields):
+        self.values.update(fields)
+        self.values["ts"] = time.time()
+        buf = self.shm.buf
+        self.seq += 1   # odd: write in progress
+        _SEQ.pack_into(buf, 0, self.seq)
+        _BODY.pack_into(buf, _SEQ.size, *(self.values[name] for name, _ in FIELDS))
+        self.seq += 1
+        _SEQ.pack_into(buf, 0, self.seq)
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class StatsReader:
+    """Non-blocking reader; returns None until the writer exists."""
+
+    def __init__(self, junction_id: str, retries: int = 50):
+        self.name = segment_name(junction_id)
+        self.retries = retries
+        self.shm = None
+
+    def _attach(self):
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return None
+        try:   # readers must not unlink the writer's segment on exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+    def _snapshot(self):
+        """(stats, consistent); on a torn read the body is still returned for its pid."""
+        buf = self.shm.buf
+        for _ in range(self.retries):
+            s1 = _SEQ.unpack_from(buf, 0)[0]
+            if s1 & 1:
+                continue
+            body = _BODY.unpack_from(buf, _SEQ.size)
+            if _SEQ.unpack_from(buf, 0)[0] == s1:
+                return (dict(zip((name for name, _ in FIELDS), body)) if s1 else None), True
+        # still odd: a publish in progress, or a writer killed mid-publish (pid is never rewritten)
+        return dict(zip((name for name, _ in FIELDS), _BODY.unpack_from(buf, _SEQ.size))), False
+
+    def read(self, max_age: float = None):
+        """Latest stats, or None while there is no live writer.
+
+        Stats older than max_age come back with stale=True: the writer is
+        alive but its loop stopped publishing.
+        """
+        for _ in range(2):   # second pass: reattached to a restarted writer's segment
+            if self.shm is None:
+                self.shm = self._attach()
+                if self.shm is None:
+                    return None
+            stats, consistent = self._snapshot()
+            if stats is not None and stats["pid"] and not _pid_alive(stats["pid"]):
+                # writer died (maybe mid-publish); drop the mapping so a restarted writer is picked up
+                self.close()
+                continue
+            if stats is None or not consistent:
+                return None
+            stats["stale"] = max_age is not None and time.time() - stats["ts"] > max_age
+            return stats
+        return None
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -1,44 +1,303 @@
 # edge/watchdog.py
-import time, subprocess, requests, psutil
+"""Edge supervisor: owns the inference/heartbeat processes and restarts them on exit.
+
+Children are started without a shell and kept as Popen handles. SIGCHLD wakes
+the loop immediately (signal.set_wakeup_fd), the dead child is reaped with
+waitpid (Popen.poll) and restarted after an exponential backoff, so a crash is
+recovered in well under a second instead of on the next 10 s poll.
+
+Readiness comes from the inference stats segment (edge/stats.py): a child is
+"ready" once it publishes frames, and is killed if its stats stop moving.
+Backend reports, alerts and the backend health probe run on a sender thread
+so HTTP never delays a restart.
+
+With watchdog.pin_cpus, children are pinned so inference has cores of its
+own: camera and heartbeat share the last core (the camera gets its own when
+there are 4+), inference gets the rest and splits them with its annotate
+workers (edge/annotate.py split_cpus). On a single core nothing is pinned.
+"""
+import time, subprocess, requests, select, signal, socket, threading
 import sys, os
+from queue import Queue
+import psutil
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
 
 # Ensure backend utils available
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
 from backend.sms_utils import send_alert_sms   # ✅ SMS fallback
+from edge.stats import StatsReader
+from edge.framebus import FrameBusReader
+from common import config
+
+_EDGE, _CFG = config.get().edge, config.get().watchdog
+JUNCTION_ID = _EDGE.junction_id
+BACKEND_ALERT = f"{_EDGE.backend_url}/alert"
+BACKEND_HEALTH = f"{_EDGE.backend_url}/"
+BACKEND_PROCESS = f"{_EDGE.backend_url}/process_status"
+CLIP_TRIGGER = f"http://127.0.0.1:{_EDGE.metrics_port}/clip"   # inference3's clip ring, see edge/clips.py
+
+MAX_RESTARTS = _CFG.max_restarts        # consecutive crashes before a child is marked CRITICAL
+BACKOFF_START = _CFG.backoff_start      # first restart delay (s), doubled per consecutive crash
+BACKOFF_MAX = _CFG.backoff_max
+STABLE_AFTER = _CFG.stable_after        # uptime that resets the backoff and crash count
+TICK = 1.0                              # readiness / memory checks
+REPORT_INTERVAL = _CFG.report_interval  # alive reports to the backend registry + backend health probe
+READY_TIMEOUT = _CFG.ready_timeout      # model load + warm-up budget before a start counts as failed
+HUNG_AFTER = _CFG.hung_after            # a ready child whose stats stop updating this long is killed
+STATS_MAX_AGE = 5.0
+
+
+def plan_cpus(pin: bool = _CFG.pin_cpus):
+    """{child name: cpu set} out of the cores this supervisor may use; {} = no pinning."""
+    if not pin or not hasattr(os, "sched_getaffinity"):
+        return {}
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        return {}
+    if len(cpus) >= 4:
+        return {"inference3.py": set(cpus[:-2]), "camera.py": {cpus[-2]}, "heartbeat.py": {cpus[-1]}}
+    return {"inference3.py": set(cpus[:-1]), "camera.py": {cpus[-1]}, "heartbeat.py": {cpus[-1]}}
+
+
+CPUS = plan_cpus()
 
-JUNCTION_ID = "J1"
-BACKEND_ALERT = "http://127.0.0.1:8000/alert"
-BACKEND_HEALTH = "http://127.0.0.1:8000/"
+stats_reader = StatsReader(JUNCTION_ID)
+frame_bus = FrameBusReader(JUNCTION_ID)
 
-# Processes to monitor
-PROCS = {
-    "inference3.py": "python ai/inference3.py",
-    "heartbeat.py": "python edge/heartbeat.py",
-    "backend": None  # backend is checked via HTTP, not psutil
-}
 
-MAX_RESTARTS = 5
-restart_counts = {name: 0 for name in PROCS}
-critical_flags = {name: False for name in PROCS}  # stop retrying after 5 fails
+def camera_ready(child) -> bool:
+    """Ready = this very process owns the frame bus and has published a frame.
 
+    Source outages are handled inside camera.py (reconnect with backoff), so a
+    disconnected camera is not a reason to restart the process.
+    """
+    info = frame_bus.info()
+    return info is not None and info["pid"] == child.proc.pid and info["head"] > 0
 
-def is_running(name: str) -> bool:
-    """Check if a process with 'name' in its cmdline is running"""
-    if name == "backend":
+
+def inference_ready(child) -> bool:
+    """Ready = this very process is publishing fresh frame stats."""
+    stats = stats_reader.read(max_age=STATS_MAX_AGE)
+    return stats is not None and not stats["stale"] and stats["pid"] == child.proc.pid and stats["frames"] > 0
+
+
+class Child:
+    def __init__(self, name, cmd, ready_check=None, max_rss_mb=None, max_vm_mb=None,
+                 cpus=None, nice=0):
+        self.name, self.cmd, self.ready_check = name, cmd, ready_check
+        self.max_rss_mb, self.max_vm_mb, self.cpus, self.nice = max_rss_mb, max_vm_mb, cpus, nice
+        self.proc = None
+        self.restarts = 0            # consecutive crashes
+        self.backoff = BACKOFF_START
+        self.next_start = 0.0        # monotonic time of the next (re)start
+        self.started_at = None
+        self.exited_at = None        # set on a crash; ready - exited_at = restart-to-ready time
+        self.ready = False
+        self.last_ready = None
+        self.critical = False
+
+    def apply_limits(self):
+        """CPU affinity, niceness and address-space cap, set from the parent after spawn."""
+        pid = self.proc.pid
         try:
-            r = requests.get(BACKEND_HEALTH, timeout=2)
-            return r.status_code == 200
-        except:
-            return False
+            if self.cpus and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(pid, self.cpus)
+            if self.nice:
+                psutil.Process(pid).nice(self.nice)
+            if self.max_vm_mb and hasattr(resource, "prlimit"):
+                lim = self.max_vm_mb * 1024 * 1024
+                resource.prlimit(pid, resource.RLIMIT_AS, (lim, lim))
+        except (OSError, psutil.Error) as e:
+            print(f"[Watchdog] could not apply limits to {self.name}: {e}")
 
-    for p in psutil.process_iter(['cmdline']):
+    def rss_mb(self) -> float:
         try:
-            cmd = p.info.get('cmdline') or []
-            if any(name in str(x) for x in cmd):
-                return True
+            return psutil.Process(self.proc.pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+
+# Processes to supervise (the backend is probed over HTTP, it is not our child).
+# The camera runs on its own so inference can be restarted without reopening the stream.
+# max_vm_mb stays unset for inference: CUDA reserves far more address space than it uses.
+CHILDREN = [
+    Child("camera.py", [sys.executable, "edge/camera.py"],
+          ready_check=camera_ready, max_rss_mb=512, cpus=CPUS.get("camera.py")),
+    Child("inference3.py", [sys.executable, "edge/inference3.py"],
+          ready_check=inference_ready, max_rss_mb=4096, cpus=CPUS.get("inference3.py")),
+    Child("heartbeat.py", [sys.executable, "edge/heartbeat.py"],
+          max_rss_mb=256, max_vm_mb=1024, nice=10, cpus=CPUS.get("heartbeat.py")),
+]
+
+
+class Supervisor:
+    def __init__(self, children):
+        self.children = children
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._outbox = Queue()   # (fn, args) run in order on the sender thread
+        self._next_tick = 0.0
+        self._next_report = 0.0
+        self.backend_ok = True
+
+    # --- backend I/O (sender thread) ---
+    def _sender(self):
+        while True:
+            fn, args = self._outbox.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                print("[Watchdog] backend call failed:", e)
+
+    def report(self, child, status, event, **extra):
+        payload = {"junction_id": JUNCTION_ID, "process": child.name, "status": status,
+                   "event": event, "pid": child.proc.pid if child.proc else None,
+                   "ts": time.time(), "restarts": child.restarts}
+        payload.update(extra)
+        self._outbox.put((post_process_status, (payload,)))
+
+    def alert(self, issue):
+        self._outbox.put((send_backend_alert, (issue,)))
+        self._outbox.put((request_clip, ("alert",)))
+
+    def _probe_backend(self):
+        try:
+            ok = requests.get(BACKEND_HEALTH, timeout=2).status_code == 200
         except Exception:
-            continue
-    return False
+            ok = False
+        if ok != self.backend_ok:
+            print(f"[Watchdog] backend {'is back ✅' if ok else 'is unreachable'}")
+            if not ok:
+                send_backend_alert(f"backend unreachable from Junction {JUNCTION_ID}")
+        self.backend_ok = ok
+
+    # --- child lifecycle (main thread) ---
+    def spawn(self, child, now):
+        child.proc = subprocess.Popen(child.cmd, cwd=ROOT)
+        child.apply_limits()
+        child.started_at, child.ready, child.last_ready = now, False, None
+        event = "restarted" if child.restarts else "started"
+        print(f"[Watchdog] {event} {child.name} (pid {child.proc.pid})")
+        self.report(child, "running", event)
+        if child.restarts:
+            self.alert(f"{child.name} restarted at Junction {JUNCTION_ID}")
+
+    def handle_exit(self, child, code, now):
+        uptime = now - child.started_at
+        print(f"[Watchdog] {child.name} exited with {code} after {uptime:.1f}s")
+        self.report(child, "stopped", "exited", exit_code=code)
+        child.proc, child.ready, child.exited_at = None, False, now
+        if uptime >= STABLE_AFTER:
+            child.restarts, child.backoff = 0, BACKOFF_START
+        if child.restarts >= MAX_RESTARTS:
+            child.critical = True
+            msg = f"{child.name} in CRITICAL condition at Junction {JUNCTION_ID}"
+            print(f"[Watchdog] {msg}")
+            self.report(child, "critical", "critical")
+            self.alert(msg)
+            return
+        child.restarts += 1
+        child.next_start = now + child.backoff
+        child.backoff = min(child.backoff * 2, BACKOFF_MAX)
+
+    def reap(self, now):
+        for child in self.children:
+            if child.proc is not None:
+                code = child.proc.poll()   # waitpid(pid, WNOHANG)
+                if code is not None:
+                    self.handle_exit(child, code, now)
+
+    def tick(self, now):
+        report = now >= self._next_report
+        for child in self.children:
+            if child.proc is None:
+                continue
+            if child.ready_check is None or child.ready_check(child):
+                if not child.ready:
+                    timing = {"startup_s": round(now - child.started_at, 2)}
+                    if child.exited_at is not None:
+                        timing["downtime_s"] = round(now - child.exited_at, 2)
+                    print(f"[Watchdog] {child.name} is ready ✅ ({timing})")
+                    self.report(child, "running", "ready", **timing)
+                    child.exited_at = None
+                child.ready, child.last_ready = True, now
+            elif not child.ready and now - child.started_at > READY_TIMEOUT:
+                print(f"[Watchdog] {child.name} not ready after {READY_TIMEOUT:.0f}s, killing")
+                child.proc.kill()
+            elif child.ready and now - child.last_ready > HUNG_AFTER:
+                print(f"[Watchdog] {child.name} stopped publishing stats, killing")
+                child.proc.kill()
+            if child.max_rss_mb and child.rss_mb() > child.max_rss_mb:
+                print(f"[Watchdog] {child.name} over {child.max_rss_mb} MB RSS, killing")
+                self.alert(f"{child.name} exceeded memory limit at Junction {JUNCTION_ID}")
+                child.proc.kill()
+            if report and child.ready:
+                self.report(child, "running", "alive")
+        if report:
+            self._outbox.put((self._probe_backend, ()))
+            self._next_report = now + REPORT_INTERVAL
+        self._next_tick = now + TICK
+
+    def _next_deadline(self):
+        due = [c.next_start for c in self.children if c.proc is None and not c.critical]
+        return min([self._next_tick] + due)
+
+    def run(self):
+        threading.Thread(target=self._sender, name="watchdog-sender", daemon=True).start()
+        if hasattr(signal, "SIGCHLD"):
+            signal.set_wakeup_fd(self._wake_w.fileno())
+            signal.signal(signal.SIGCHLD, lambda *a: None)   # wakes select via the fd
+        wake_timeout = None if hasattr(signal, "SIGCHLD") else 0.5   # no SIGCHLD: poll
+        signal.signal(signal.SIGTERM, lambda *a: sys.exit(0))
+        try:
+            while True:
+                now = time.monotonic()
+                self.reap(now)
+                for child in self.children:
+                    if child.proc is None and not child.critical and now >= child.next_start:
+                        self.spawn(child, now)
+                if now >= self._next_tick:
+                    self.tick(now)
+                timeout = max(0.0, self._next_deadline() - time.monotonic())
+                if wake_timeout is not None:
+                    timeout = min(timeout, wake_timeout)
+                select.select([self._wake_r], [], [], timeout)
+                try:
+                    while self._wake_r.recv(512):
+                        pass
+                except (BlockingIOError, InterruptedError):
+                    pass
+        finally:
+            self.stop_all()
+
+    def stop_all(self):
+        for child in self.children:
+            if child.proc is not None and child.proc.poll() is None:
+                child.proc.terminate()
+        for child in self.children:
+            if child.proc is not None:
+                try:
+                    child.proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    child.proc.kill()
+
+
+def post_process_status(payload: dict):
+    """Push a process lifecycle event to the backend registry (GET /process_status reads it)"""
+    requests.post(BACKEND_PROCESS, json=payload, timeout=2)
+
+
+def request_clip(reason: str):
+    """Ask the inference process to save its pre/post clip; it may be the one that is down."""
+    try:
+        requests.get(CLIP_TRIGGER, params={"reason": reason}, timeout=1)
+    except Exception:
+        pass
 
 
 def send_backend_alert(issue: str):
@@ -51,29 +310,5 @@ def send_backend_alert(issue: str):
         send_alert_sms(f"🚨 {issue} (backend unreachable)")
 
 
-while True:
-    for name, cmd in PROCS.items():
-        running = is_running(name)
-
-        if not running and not critical_flags[name]:
-            print(f"[Watchdog] {name} is not running")
-
-            if restart_counts[name] < MAX_RESTARTS:
-                if cmd:  # only restart if it's a local process
-                    print(f"[Watchdog] Restarting {name} (attempt {restart_counts[name]+1})...")
-                    subprocess.Popen(cmd, shell=True)
-                restart_counts[name] += 1
-                send_backend_alert(f"{name} restarted at Junction {JUNCTION_ID}")
-            else:
-                msg = f"{name} in CRITICAL condition at Junction {JUNCTION_ID}"
-                print(f"[Watchdog] {msg}")
-                send_backend_alert(msg)
-                critical_flags[name] = True  # stop retrying further
-
-        elif running:
-            # Reset restart count if stable
-            if restart_counts[name] > 0:
-                print(f"[Watchdog] {name} is now stable ✅")
-            restart_counts[name] = 0
-
-    time.sleep(10)
+if __name__ == "__main__":
+    Supervisor(CHILDREN).run()
@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os, sys
+
+# the scripts put the repo root on sys.path themselves; do the same for the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# defaults only: a developer's config.json or SMARTFLOW_* variables must not leak into the tests
+os.environ["SMARTFLOW_CONFIG"] = ""
+for key in [k for k in os.environ if k.startswith("SMARTFLOW_") and k != "SMARTFLOW_CONFIG"]:
+    del os.environ[key]
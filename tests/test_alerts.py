@@ -0,0 +1,107 @@
+# tests/test_alerts.py
+import pytest
+
+from backend import alerts
+from backend.alerts import AlertDispatcher, TokenBucket
+
+
+class Clock:
+    def __init__(self, t=1_000_000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(alerts.time, "time", c)
+    monkeypatch.setattr(alerts.time, "monotonic", c)
+    return c
+
+
+def dispatcher(**kw):
+    kw = {"dedup_window": 60, "escalate_window": 300, "tiers": (1, 3, 10), **kw}
+    return AlertDispatcher(transports=[], **kw)
+
+
+def test_repeats_inside_dedup_window_are_folded(clock):
+    d = dispatcher()
+    first = d.submit("J1", "CONGESTION")
+    assert first is not None and first.tier == 0
+    clock.t += 10
+    assert d.submit("J1", "CONGESTION") is None
+    assert d.submit("J2", "CONGESTION") is not None          # other junction, other key
+    clock.t += 61
+    again = d.submit("J1", "CONGESTION")
+    assert again is not None and again.suppressed == 1 and again.occurrences == 3
+
+
+def test_tier_increase_goes_out_inside_dedup_window(clock):
+    d = dispatcher()
+    tiers = []
+    for _ in range(10):
+        a = d.submit("J1", "OFFLINE")
+        tiers.append(a.tier if a else None)
+        clock.t += 1
+    assert tiers == [0, None, 1, None, None, None, None, None, None, 2]
+
+
+def test_occurrences_expire_after_escalate_window(clock):
+    d = dispatcher(dedup_window=0)
+    for _ in range(3):
+        d.submit("J1", "OFFLINE")
+    clock.t += 301
+    assert d.submit("J1", "OFFLINE").tier == 0
+
+
+def test_stale_keys_are_swept(clock):
+    d = dispatcher()
+    for i in range(100):
+        d.submit("J1", f"free text {i}")
+    assert len(d._keys) == 100
+    clock.t += 301
+    d.submit("J1", "CONGESTION")
+    assert list(d._keys) == [("J1", "CONGESTION")]
+
+
+def test_recent_keys_survive_a_sweep(clock):
+    d = dispatcher()
+    d.submit("J1", "OFFLINE")
+    clock.t += 301
+    d.submit("J2", "OFFLINE")                                 # sweeps J1
+    clock.t += 10
+    d.submit("J3", "OFFLINE")                                 # no sweep due yet
+    assert ("J2", "OFFLINE") in d._keys and ("J1", "OFFLINE") not in d._keys
+
+
+def test_token_bucket_burst_then_refill(clock):
+    bucket = TokenBucket(rate_per_s=0.5, burst=2)
+    assert bucket.wait_time() == 0.0
+    assert bucket.wait_time() == 0.0
+    assert bucket.wait_time() == pytest.approx(2.0)
+    clock.t += 1
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock.t += 1
+    assert bucket.wait_time() == 0.0
+    clock.t += 100                                            # refill is capped at burst
+    assert [bucket.wait_time() > 0 for _ in range(3)] == [False, False, True]
+
+
+def test_workers_deliver_to_every_transport(clock, monkeypatch):
+    monkeypatch.setattr(alerts.time, "monotonic", __import__("time").monotonic)
+
+    class Sink:
+        def __init__(self, name):
+            self.name, self.got = name, []
+
+        def send(self, alert):
+            self.got.append(alert)
+
+    a, b = Sink("a"), Sink("b")
+    d = AlertDispatcher(transports=[a, b], workers=1, rate_per_min=6000, burst=10)
+    d.start()
+    d.submit("J1", "OFFLINE", "down")
+    d.stop()
+    assert [x.message for x in a.got] == ["down"] == [x.message for x in b.got]
@@ -0,0 +1,77 @@
+# tests/test_config.py
+import json
+
+import pytest
+
+from common import config
+
+
+def write(tmp_path, data):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_defaults_without_a_file():
+    cfg = config.load("")
+    assert cfg.edge.frame_skip == 2 and cfg.backend.storage == "mongo"
+    assert cfg.alerts.twilio_auth == "" and cfg.alerts.escalation_phones == []
+
+
+def test_file_overrides_defaults(tmp_path):
+    cfg = config.load(write(tmp_path, {"edge": {"conf": 0.4, "imgsz_sizes": [384, 640]}}))
+    assert cfg.edge.conf == 0.4 and cfg.edge.imgsz_sizes == [384, 640]
+    assert cfg.edge.frame_skip == 2
+
+
+def test_env_overrides_file_and_is_coerced(tmp_path, monkeypatch):
+    path = write(tmp_path, {"edge": {"frame_skip": 5}})
+    monkeypatch.setenv("SMARTFLOW_EDGE_FRAME_SKIP", "3")
+    monkeypatch.setenv("SMARTFLOW_EDGE_TILE_REGION", "[0, 0, 1, 0.4]")
+    monkeypatch.setenv("SMARTFLOW_WATCHDOG_PIN_CPUS", "off")
+    cfg = config.load(path)
+    assert cfg.edge.frame_skip == 3
+    assert cfg.edge.tile_region == [0.0, 0.0, 1.0, 0.4]
+    assert cfg.watchdog.pin_cpus is False
+
+
+def test_bad_value_names_the_variable(monkeypatch):
+    monkeypatch.setenv("SMARTFLOW_EDGE_FRAME_SKIP", "often")
+    with pytest.raises(ValueError, match="SMARTFLOW_EDGE_FRAME_SKIP"):
+        config.load("")
+
+
+@pytest.mark.parametrize("name, old, attr", [
+    ("SMARTFLOW_ALERTS_TRANSPORT", "SMARTFLOW_ALERT_TRANSPORT", ("alerts", "transport")),
+    ("SMARTFLOW_ALERTS_LOG_PATH", "SMARTFLOW_ALERT_LOG", ("alerts", "log_path")),
+    ("SMARTFLOW_EDGE_EXPORT_FORMAT", "SMARTFLOW_EXPORT_FORMAT", ("edge", "export_format")),
+])
+def test_env_aliases(monkeypatch, name, old, attr):
+    assert config.ENV_ALIASES[name] == old
+    monkeypatch.setenv(old, "from-old-name")
+    assert getattr(getattr(config.load(""), attr[0]), attr[1]) == "from-old-name"
+    monkeypatch.setenv(name, "from-new-name")   # the generic name wins when both are set
+    assert getattr(getattr(config.load(""), attr[0]), attr[1]) == "from-new-name"
+
+
+def test_secrets_are_redacted(monkeypatch):
+    monkeypatch.setenv("SMARTFLOW_ALERTS_TWILIO_AUTH", "hunter2")
+    shown = config.redacted(config.load(""))
+    assert shown["alerts"]["twilio_auth"] == config.REDACTED
+    assert shown["alerts"]["twilio_sid"] == ""                 # unset secrets stay visibly empty
+    assert "hunter2" not in json.dumps(shown)
+
+
+def test_reload_swaps_live_fields_only(tmp_path, monkeypatch):
+    path = write(tmp_path, {"edge": {"conf": 0.25, "imgsz": 480}})
+    monkeypatch.setattr(config, "CONFIG_PATH", path)
+    monkeypatch.setattr(config, "_current", None)
+    monkeypatch.setattr(config, "_subscribers", [])
+    seen = []
+    config.subscribe(lambda old, new: seen.append((old.edge.conf, new.edge.conf)))
+    assert config.get().edge.conf == 0.25
+    write(tmp_path, {"edge": {"conf": 0.5, "imgsz": 640}})
+    monkeypatch.setattr(config, "_mtime", None)                # mtime granularity: force a re-read
+    assert config.reload() is True
+    assert config.get().edge.conf == 0.5 and config.get().edge.imgsz == 480   # imgsz needs a restart
+    assert seen == [(0.25, 0.5)]
@@ -0,0 +1,165 @@
+# tests/test_eventlog.py
+import glob, os, threading, time
+
+import pytest
+
+from backend.eventlog import EventLog, read_offset, _HEADER
+
+
+@pytest.fixture
+def logdir(tmp_path):
+    return str(tmp_path / "eventlog")
+
+
+def open_log(path, **kw):
+    return EventLog(path, fsync_interval=0.001, **kw)
+
+
+def payloads(log, offset=0):
+    reader = log.reader(offset)
+    try:
+        return [bytes(p) for _, p in reader.read(10_000)]
+    finally:
+        reader.close()
+
+
+def only_segment(path):
+    (seg,) = glob.glob(os.path.join(path, "*.log"))
+    return seg
+
+
+def until(cond, timeout=3.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.005)
+
+
+def test_append_then_read_back_with_offsets(logdir):
+    log = open_log(logdir)
+    try:
+        offsets = [log.append(f"rec{i}".encode()) for i in range(5)]
+        assert offsets[0] == 0 and offsets == sorted(offsets)
+        reader = log.reader()
+        got = reader.read()
+        reader.close()
+        assert [o for o, _ in got] == offsets
+        assert payloads(log, offsets[3]) == [b"rec3", b"rec4"]
+    finally:
+        log.close()
+
+
+def test_torn_tail_is_cut_off_on_open(logdir):
+    log = open_log(logdir)
+    for i in range(3):
+        log.append(f"rec{i}".encode())
+    end = log.end
+    log.close()
+    with open(only_segment(logdir), "ab") as f:
+        f.write(_HEADER.pack(100, 0) + b"half a rec")           # crash in the middle of a write
+    log = open_log(logdir)
+    try:
+        assert log.end == end and os.path.getsize(only_segment(logdir)) == end
+        assert payloads(log) == [b"rec0", b"rec1", b"rec2"]
+        assert log.append(b"after") == end
+        assert payloads(log)[-1] == b"after"
+    finally:
+        log.close()
+
+
+def test_replay_stops_at_a_corrupt_record(logdir):
+    log = open_log(logdir)
+    offsets = [log.append(f"record-{i}".encode()) for i in range(4)]
+    log.close()
+    with open(only_segment(logdir), "r+b") as f:
+        f.seek(offsets[2] + _HEADER.size + 1)
+        f.write(b"X")                                           # crc of record 2 no longer matches
+    log = open_log(logdir)
+    try:
+        assert payloads(log) == [b"record-0", b"record-1"]
+        assert log.end == offsets[2]
+    finally:
+        log.close()
+
+
+def test_reads_across_segments_and_reopens(logdir):
+    log = open_log(logdir, segment_bytes=64)
+    try:
+        for i in range(20):
+            log.append(f"payload-{i:02d}".encode())
+        assert len(log.bases) > 3
+        assert payloads(log) == [f"payload-{i:02d}".encode() for i in range(20)]
+    finally:
+        log.close()
+    log = open_log(logdir, segment_bytes=64)
+    try:
+        assert payloads(log)[-1] == b"payload-19"
+    finally:
+        log.close()
+
+
+def test_consumer_resumes_from_its_committed_offset(logdir):
+    log = open_log(logdir)
+    seen, lock = [], threading.Lock()
+
+    def handler(batch):
+        with lock:
+            seen.extend(bytes(p) for _, p in batch)
+
+    for i in range(3):
+        log.append(f"a{i}".encode())
+    c = log.consumer("storage", handler)
+    c.start()
+    until(lambda: len(seen) == 3)
+    log.close()
+    committed = read_offset(logdir, "storage")
+    assert committed == log.end
+
+    log = open_log(logdir)
+    try:
+        for i in range(2):
+            log.append(f"b{i}".encode())
+        c = log.consumer("storage", handler)
+        assert c.offset == committed
+        c.start()
+        until(lambda: len(seen) == 5)
+        time.sleep(0.05)
+        assert seen == [b"a0", b"a1", b"a2", b"b0", b"b1"]      # nothing replayed twice
+    finally:
+        log.close()
+
+
+def test_failed_batch_is_retried_and_not_committed(logdir, monkeypatch):
+    log = open_log(logdir)
+    calls = []
+
+    def flaky(batch):
+        calls.append([bytes(p) for _, p in batch])
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+
+    try:
+        log.append(b"x")
+        c = log.consumer("flaky", flaky)
+        monkeypatch.setattr(c._stop, "wait", lambda timeout=None: c._stop.is_set())   # no 1 s back-off
+        c.start()
+        until(lambda: len(calls) >= 2)
+        until(lambda: read_offset(logdir, "flaky") == log.end)
+        assert calls[0] == calls[1] == [b"x"]
+    finally:
+        log.close()
+
+
+def test_independent_consumers(logdir):
+    log = open_log(logdir)
+    try:
+        log.append(b"one")
+        fast, slow = [], []
+        log.consumer("fast", lambda b: fast.extend(b)).start()
+        until(lambda: len(fast) == 1)
+        assert read_offset(logdir, "slow") == 0
+        c = log.consumer("slow", lambda b: slow.extend(b))
+        c.start()
+        until(lambda: len(slow) == 1)
+    finally:
+        log.close()
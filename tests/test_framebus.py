@@ -0,0 +1,91 @@
+# tests/test_framebus.py
+import os, uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from edge import framebus
+from edge.framebus import FrameBusReader, FrameBusWriter, _SLOT, _SLOTS_OFF
+
+SHAPE = (4, 6, 3)
+
+
+def frame(value):
+    return np.full(SHAPE, value, np.uint8)
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    # reader and writer share this process: the reader's unregister would drop the writer's registration
+    monkeypatch.setattr(framebus, "resource_tracker", SimpleNamespace(unregister=lambda *a: None))
+    jid = f"test{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    writer = FrameBusWriter(jid, SHAPE, slots=4)
+    reader = FrameBusReader(jid)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def test_reads_the_newest_frame_and_counts_missed(bus):
+    writer, reader = bus
+    writer.write(frame(1), ts=10.0)
+    seq, ts, out = reader.read(timeout=0.1)
+    assert (seq, ts) == (1, 10.0) and (out == 1).all()
+    for v in range(2, 7):
+        writer.write(frame(v))
+    seq, _, out = reader.read(after_seq=1, timeout=0.1, out=out)
+    assert seq == 6 and (out == 6).all()
+    assert reader.missed == 4
+
+
+def test_times_out_without_a_newer_frame(bus):
+    writer, reader = bus
+    writer.write(frame(1))
+    assert reader.read(after_seq=1, timeout=0.02) == (None, None, None)
+
+
+def test_rejects_a_slot_the_writer_is_filling(bus):
+    writer, reader = bus
+    writer.write(frame(1))
+    writer.write(frame(2))
+    # writer has invalidated slot 2 and is copying pixels into it
+    _SLOT.pack_into(writer.shm.buf, _SLOTS_OFF + 2 * writer.stride, 0, 0.0)
+    writer._views[2][:] = 99
+    assert reader.read(after_seq=1, timeout=0.02) == (None, None, None)
+
+
+def test_rejects_a_slot_overwritten_during_the_copy(bus, monkeypatch):
+    writer, reader = bus
+    writer.write(frame(1))
+    real_copyto = np.copyto
+    lapped = []
+
+    def copy_then_lap(dst, src, *a, **kw):
+        real_copyto(dst, src, *a, **kw)
+        if dst is not writer._views[0] and not lapped:   # the reader's copy: lap the ring under it
+            lapped.append(True)
+            for v in range(2, 2 + writer.slots):
+                writer.write(frame(v))
+
+    monkeypatch.setattr(framebus.np, "copyto", copy_then_lap)
+    seq, _, out = reader.read(timeout=0.1)
+    assert lapped and seq == 1 + writer.slots
+    assert (out == 1 + writer.slots).all()
+
+
+def test_restarted_writer_resets_the_cursor(bus):
+    writer, reader = bus
+    for v in range(1, 4):
+        writer.write(frame(v))
+    assert reader.read(timeout=0.1)[0] == 3
+    reader.close()
+    writer.close()
+    fresh = FrameBusWriter(reader.name[len("smartflow_frames_"):], SHAPE, slots=4)
+    try:
+        fresh.write(frame(7))
+        seq, _, out = reader.read(after_seq=3, timeout=0.1)
+        assert seq == 1 and (out == 7).all()
+    finally:
+        reader.close()
+        fresh.close()
@@ -0,0 +1,100 @@
+# tests/test_lanes.py
+import numpy as np
+import pytest
+
+from common.lanes import Lane, QueueEstimator, assign_lanes, lane_queue, points_in_polygon
+
+
+def ray_cast(pt, poly):
+    x, y = pt
+    inside = False
+    for (x1, y1), (x2, y2) in zip(poly, np.roll(poly, -1, axis=0)):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+SQUARE = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], float)
+CONCAVE = np.array([[0, 0], [4, 0], [4, 4], [2, 1.5], [0, 4]], float)   # notch from the top
+
+
+def test_points_in_square():
+    pts = np.array([[0.5, 0.5], [1.5, 0.5], [-0.1, 0.2], [0.99, 0.01]])
+    assert points_in_polygon(pts, SQUARE).tolist() == [True, False, False, True]
+
+
+def test_concave_notch_is_outside():
+    pts = np.array([[2, 3], [2, 1], [0.5, 3], [3.5, 3]])
+    assert points_in_polygon(pts, CONCAVE).tolist() == [False, True, True, True]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_points_in_polygon_matches_ray_cast(seed):
+    rng = np.random.default_rng(seed)
+    poly = np.cumsum(rng.uniform(-1, 1, (7, 2)), axis=0)
+    pts = rng.uniform(poly.min(0) - 0.5, poly.max(0) + 0.5, (300, 2))
+    assert points_in_polygon(pts, poly).tolist() == [ray_cast(p, poly) for p in pts]
+
+
+def test_no_points():
+    assert points_in_polygon(np.zeros((0, 2)), SQUARE).shape == (0,)
+
+
+def test_assign_lanes_first_polygon_wins():
+    right = SQUARE + [0.5, 0]
+    pts = np.array([[0.25, 0.5], [0.75, 0.5], [1.25, 0.5], [3, 3]])
+    assert assign_lanes(pts, [SQUARE, right]).tolist() == [0, 0, 1, -1]
+
+
+def test_queue_runs_from_the_stop_line_to_the_first_big_gap():
+    near = np.array([20.0, 0.5, 6.0, 40.0])
+    far = np.array([24.5, 5.0, 10.5, 45.0])
+    queue, occupied = lane_queue(near, far, length_m=60, gap_m=8)
+    assert queue == pytest.approx(10.5)          # gaps 1, 9.5, 15.5: the queue stops before 20
+    assert occupied == pytest.approx(18.5)
+
+
+def test_overlapping_footprints_count_once():
+    queue, occupied = lane_queue(np.array([0.0, 2.0, 3.0]), np.array([5.0, 4.0, 9.0]), length_m=50)
+    assert (queue, occupied) == (pytest.approx(9.0), pytest.approx(9.0))
+
+
+def test_nobody_at_the_stop_line_means_no_queue():
+    queue, occupied = lane_queue(np.array([12.0, 15.0]), np.array([14.0, 19.0]), length_m=50, gap_m=8)
+    assert queue == 0.0 and occupied == pytest.approx(6.0)
+
+
+def test_footprints_are_clipped_to_the_lane():
+    queue, occupied = lane_queue(np.array([0.0]), np.array([80.0]), length_m=30)
+    assert (queue, occupied) == (30.0, 30.0)
+
+
+def test_empty_lane():
+    assert lane_queue(np.zeros(0), np.zeros(0), 30) == (0.0, 0.0)
+
+
+def test_lane_metres_follow_the_marks():
+    lane = Lane({"approach": "north", "polygon": SQUARE.tolist(),
+                 "axis": [[0.5, 1.0], [0.5, 0.5], [0.5, 0.0]], "marks_m": [0, 10, 50]})
+    got = lane.metres(np.array([[0.5, 1.0], [0.5, 0.75], [0.6, 0.5], [0.5, 0.25], [0.5, -1]]))
+    assert got.tolist() == pytest.approx([0, 5, 10, 30, 50])
+
+
+def test_lane_rejects_mismatched_marks():
+    with pytest.raises(ValueError):
+        Lane({"approach": "n", "polygon": SQUARE.tolist(), "axis": [[0, 0], [0, 1]], "marks_m": [0, 5, 9]})
+
+
+def test_estimator_per_approach():
+    # one north lane over the left half of the frame, stop line at the bottom, 40 m long
+    lanes = [{"approach": "north", "polygon": [[0, 0], [0.5, 0], [0.5, 1.05], [0, 1.05]],
+              "axis": [[0.25, 1.0], [0.25, 0.0]], "length_m": 40}]
+    est = QueueEstimator(lanes, {0: "car", 1: "person"}, gap_m=8)
+    # frame 100x100: cars at the stop line and right behind it, a person, and a car in the other half
+    xyxy = np.array([[10, 90, 40, 100], [10, 78, 40, 88], [10, 60, 20, 70], [60, 90, 90, 100]], float)
+    cls = np.array([0, 0, 1, 0])
+    out = est(cls, xyxy, (100, 100, 3))
+    assert list(out) == ["north"]
+    assert out["north"]["vehicles"] == 2
+    assert out["north"]["queue_m"] == pytest.approx(6.8)   # second car's centre: 17 px from the line = 6.8 m
+    assert 0 < out["north"]["occupancy"] < 1
@@ -0,0 +1,93 @@
+# tests/test_liveness.py
+import threading, time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.liveness import LivenessMonitor, OK, DEGRADED, OFFLINE
+
+
+class Recorder:
+    def __init__(self):
+        self.events, self._cond = [], threading.Condition()
+
+    def __call__(self, event):
+        with self._cond:
+            self.events.append((event["junction_id"], event["from"], event["to"]))
+            self._cond.notify_all()
+
+    def wait_for(self, n, timeout=2.0):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.events) >= n, timeout), self.events
+        return self.events
+
+
+@pytest.fixture
+def monitor():
+    m = LivenessMonitor(degraded_after=0.05, offline_after=0.15)
+    rec = Recorder()
+    m.subscribe(rec)
+    m.start()
+    yield m, rec
+    m.stop()
+
+
+def test_ok_degraded_offline(monitor):
+    m, rec = monitor
+    m.beat("J1", {"fps": 10})
+    assert m.status("J1")["status"] == OK
+    assert rec.wait_for(3) == [("J1", None, OK), ("J1", OK, DEGRADED), ("J1", DEGRADED, OFFLINE)]
+    status = m.status("J1")
+    assert status["status"] == OFFLINE and status["metrics"] == {"fps": 10} and status["last_seen"]
+
+
+def test_beat_recovers_and_each_transition_is_published_once(monitor):
+    m, rec = monitor
+    m.beat("J1", {})
+    rec.wait_for(3)
+    m.beat("J1", {})
+    rec.wait_for(4)
+    assert rec.events[3] == ("J1", OFFLINE, OK)
+    time.sleep(0.02)
+    assert len(rec.events) == 4
+    assert list(m.events)[-1]["to"] == OK
+
+
+def test_heartbeats_keep_a_junction_ok(monitor):
+    m, rec = monitor
+    for _ in range(10):
+        m.beat("J1", {})
+        time.sleep(0.01)
+    assert rec.events == [("J1", None, OK)]
+    assert m.all_states() == {"J1": OK}
+
+
+def test_unknown_junction_reads_offline(monitor):
+    m, _ = monitor
+    assert m.status("nope") == {"junction_id": "nope", "status": OFFLINE, "last_seen": None, "metrics": {}}
+
+
+def test_seed_restores_state_silently():
+    m = LivenessMonitor(degraded_after=15, offline_after=45)
+    rec = Recorder()
+    m.subscribe(rec)
+    now = datetime.utcnow()
+    m.seed("fresh", now - timedelta(seconds=1), {"fps": 8})
+    m.seed("late", now - timedelta(seconds=20), {})
+    m.seed("gone", now - timedelta(hours=3), {})
+    assert m.all_states() == {"fresh": OK, "late": DEGRADED, "gone": OFFLINE}
+    assert m.status("fresh")["metrics"] == {"fps": 8}
+    assert rec.events == [] and list(m.events) == []
+
+
+def test_seeded_junction_continues_from_its_age():
+    m = LivenessMonitor(degraded_after=0.2, offline_after=0.3)
+    rec = Recorder()
+    m.subscribe(rec)
+    m.seed("J1", datetime.utcnow() - timedelta(seconds=0.25), {})
+    assert m.all_states() == {"J1": DEGRADED}
+    m.start()
+    try:
+        assert rec.wait_for(1, timeout=1.0) == [("J1", DEGRADED, OFFLINE)]
+    finally:
+        m.stop()
@@ -0,0 +1,46 @@
+# tests/test_metrics.py
+import urllib.error, urllib.request
+
+import pytest
+
+from common.metrics import TOKEN_HEADER, start_http_server
+
+ROUTES = {"/debug/echo": lambda q: ("application/json", repr(sorted(q.items())).encode())}
+
+
+def get(server, path, headers=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as r:
+            return r.status, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(token):
+        servers.append(start_http_server(0, routes=ROUTES, host="127.0.0.1", token=token))
+        return servers[-1]
+
+    yield start
+    for s in servers:
+        s.shutdown()
+        s.server_close()
+
+
+def test_debug_routes_off_without_a_token(serve):
+    server = serve("")
+    assert get(server, "/debug/echo")[0] == 403
+    assert get(server, "/debug/echo?token=")[0] == 403
+    assert get(server, "/metrics")[0] == 200
+
+
+def test_debug_routes_need_the_token(serve):
+    server = serve("s3cret")
+    assert get(server, "/debug/echo?token=wrong")[0] == 403
+    assert get(server, "/debug/echo", {TOKEN_HEADER: "s3cret"}) == (200, b"[]")
+    assert get(server, "/debug/echo?token=s3cret&minutes=5") == (200, b"[('minutes', '5')]")   # token not passed on
+    assert get(server, "/metrics")[0] == 200
@@ -0,0 +1,62 @@
+# tests/test_shard.py
+from collections import Counter
+
+import pytest
+
+from backend.shard import HashRing, ShardRouter
+
+NODES = [f"http://10.0.0.{i}:8000" for i in range(1, 5)]
+JUNCTIONS = [f"J{i}" for i in range(2000)]
+
+
+def owners(ring):
+    return {j: ring.owner(j) for j in JUNCTIONS}
+
+
+def test_owner_is_deterministic_and_spread():
+    ring = HashRing(NODES)
+    assert owners(ring) == owners(HashRing(list(reversed(NODES))))
+    share = Counter(owners(ring).values())
+    assert set(share) == set(NODES)
+    assert max(share.values()) < 2 * len(JUNCTIONS) / len(NODES)
+
+
+def test_adding_a_node_only_moves_junctions_to_it():
+    before = owners(HashRing(NODES))
+    new = "http://10.0.0.9:8000"
+    after = owners(HashRing(NODES + [new]))
+    moved = [j for j in JUNCTIONS if before[j] != after[j]]
+    assert all(after[j] == new for j in moved)
+    assert 0.5 / 5 < len(moved) / len(JUNCTIONS) < 2 / 5      # ~1/N, not a reshuffle
+
+
+def test_removing_a_node_only_moves_its_junctions():
+    before = owners(HashRing(NODES))
+    after = owners(HashRing(NODES[1:]))
+    assert all(before[j] == NODES[0] for j in JUNCTIONS if before[j] != after[j])
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing([]).owner("J1") is None
+
+
+def test_router_routes_to_the_owner():
+    a = ShardRouter(NODES[:2], NODES[0])
+    b = ShardRouter(NODES[:2], NODES[1])
+    for jid in JUNCTIONS[:50]:
+        assert a.owns(jid) != b.owns(jid)
+        owner = a.ring.owner(jid)
+        assert a.route(f"/latest/{jid}") == (None if owner == NODES[0] else owner)
+        body = f'{{"junction_id": "{jid}", "counts": {{}}}}'.encode()
+        assert b.route("/detections", body) == (None if owner == NODES[1] else owner)
+    assert a.route("/metrics") is None
+
+
+def test_single_node_serves_everything():
+    r = ShardRouter([], "")
+    assert not r.enabled and r.owns("J1") and r.route("/latest/J1") is None
+
+
+def test_self_url_must_be_a_worker():
+    with pytest.raises(ValueError):
+        ShardRouter(NODES, "http://elsewhere:8000")
@@ -0,0 +1,112 @@
+# tests/test_storage.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.storage import MemoryStore, SQLiteStore, Store
+
+T0 = datetime(2024, 5, 1, 8, 0, 0)
+
+
+def open_engine(kind, tmp_path):
+    if kind == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "smartflow.db"), flush_interval=0.001)
+
+
+def sync(store):
+    if isinstance(store, SQLiteStore):
+        store.flush()
+
+
+def fill(store):
+    for i in range(30):
+        jid = "J1" if i % 3 else "J2"
+        store.insert_detection({"junction_id": jid, "ts": T0 + timedelta(seconds=i),
+                                "counts": {"car": i}, "detections": [],
+                                "queues": {"north": {"queue_m": float(i)}} if jid == "J1" else None})
+    for jid, ages in (("J1", (40, 5, 20)), ("J2", (3, 60))):
+        for age in ages:
+            store.insert_heartbeat({"junction_id": jid, "ts": T0 - timedelta(seconds=age), "fps": 100 - age})
+    for i, issue in enumerate(("CONGESTION", "OFFLINE", "CONGESTION", "RECOVERED")):
+        store.insert_alert({"junction_id": "J1", "ts": T0 + timedelta(minutes=i), "issue": issue})
+    store.insert_alert({"junction_id": "J2", "ts": T0, "issue": "OFFLINE"})
+    sync(store)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    s = open_engine(request.param, tmp_path)
+    fill(s)
+    yield s
+    s.close()
+
+
+def test_latest_detection(store):
+    latest = store.latest_detection("J1")
+    assert latest["ts"] == T0 + timedelta(seconds=29) and latest["counts"] == {"car": 29}
+    assert latest["queues"] == {"north": {"queue_m": 29.0}}
+    assert store.latest_detection("nope") is None
+
+
+def test_detection_history_is_oldest_first_and_limited(store):
+    hist = store.detection_history("J1", None, 5)
+    assert [p["counts"]["car"] for p in hist] == [23, 25, 26, 28, 29]
+    since = store.detection_history("J2", T0 + timedelta(seconds=20), 100)
+    assert [p["counts"]["car"] for p in since] == [21, 24, 27]
+    assert set(hist[0]) == {"ts", "counts"}
+
+
+def test_latest_heartbeats(store):
+    beats = sorted(store.latest_heartbeats(), key=lambda d: d["junction_id"])
+    assert [(b["junction_id"], b["ts"], b["fps"]) for b in beats] == [
+        ("J1", T0 - timedelta(seconds=5), 95), ("J2", T0 - timedelta(seconds=3), 97)]
+
+
+def test_recent_alerts_newest_first(store):
+    assert [a["issue"] for a in store.recent_alerts("J1", 3)] == ["RECOVERED", "CONGESTION", "OFFLINE"]
+    assert [a["issue"] for a in store.recent_alerts("J2")] == ["OFFLINE"]
+    assert store.recent_alerts("nope") == []
+
+
+def test_processes_merge_like_set(store):
+    store.upsert_process("J1", "inference", {"status": "running", "pid": 10})
+    store.upsert_process("J1", "inference", {"status": "stopped"})
+    sync(store)
+    (proc,) = list(store.processes())
+    assert proc == {"junction_id": "J1", "process": "inference", "status": "stopped", "pid": 10}
+
+
+def test_engines_agree(tmp_path):
+    mem, lite = MemoryStore(), open_engine("sqlite", tmp_path)
+    try:
+        fill(mem)
+        fill(lite)
+        strip = lambda rows: sorted((r["junction_id"], r["ts"], r.get("fps"), r.get("issue")) for r in rows)
+        for jid in ("J1", "J2"):
+            assert mem.detection_history(jid, None, 1000) == lite.detection_history(jid, None, 1000)
+            assert strip(mem.recent_alerts(jid)) == strip(lite.recent_alerts(jid))
+        assert strip(mem.latest_heartbeats()) == strip(lite.latest_heartbeats())
+    finally:
+        lite.close()
+
+
+def test_sqlite_reopen_reads_from_disk(tmp_path):
+    s = open_engine("sqlite", tmp_path)
+    fill(s)
+    s.close()
+    s = open_engine("sqlite", tmp_path)
+    try:
+        assert s.latest_detection("J1")["queues"] == {"north": {"queue_m": 29.0}}
+        assert len(s.detection_history("J1", None, 1000)) == 20
+    finally:
+        s.close()
+
+
+def test_incomplete_engine_cannot_be_built():
+    class Partial(Store):
+        def insert_detection(self, doc):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
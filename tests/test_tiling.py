@@ -0,0 +1,63 @@
+# tests/test_tiling.py
+import numpy as np
+import pytest
+
+from edge.tiling import nms, tile_windows
+
+
+def iou(a, b):
+    w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def brute_nms(xyxy, conf, cls, thr):
+    keep = []
+    for i in sorted(range(len(conf)), key=lambda i: -conf[i]):
+        if all(cls[i] != cls[k] or iou(xyxy[i], xyxy[k]) <= thr for k in keep):
+            keep.append(i)
+    return keep
+
+
+def random_boxes(rng, n, classes=3):
+    xy = rng.uniform(0, 200, (n, 2))
+    wh = rng.uniform(5, 60, (n, 2))
+    xyxy = np.concatenate([xy, xy + wh], axis=1).astype(np.float32)
+    conf = rng.permutation(n).astype(np.float32) / n + 0.01      # distinct: same order as the reference
+    return xyxy, conf, rng.integers(0, classes, n)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("thr", [0.3, 0.5, 0.7])
+def test_nms_matches_brute_force(seed, thr):
+    xyxy, conf, cls = random_boxes(np.random.default_rng(seed), 80)
+    assert nms(xyxy, conf, cls, thr).tolist() == brute_nms(xyxy, conf, cls, thr)
+
+
+def test_nms_is_class_aware():
+    xyxy = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [0, 0, 10, 10]], np.float32)
+    conf = np.array([0.9, 0.8, 0.7], np.float32)
+    assert sorted(nms(xyxy, conf, np.array([0, 0, 1])).tolist()) == [0, 2]
+
+
+def test_nms_empty():
+    assert len(nms(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64))) == 0
+
+
+@pytest.mark.parametrize("region", [(0, 0, 1, 0.5), (0.2, 0.1, 0.9, 0.6), (0, 0, 1, 1)])
+def test_tiles_cover_the_region_inside_the_frame(region):
+    h, w, tile = 270, 480, 120
+    wins = tile_windows(h, w, region, tile, 0.25)
+    assert ((wins[:, 2] - wins[:, 0]) == tile).all() and ((wins[:, 3] - wins[:, 1]) == tile).all()
+    assert (wins[:, :2] >= 0).all() and (wins[:, 2] <= w).all() and (wins[:, 3] <= h).all()
+    covered = np.zeros((h, w), bool)
+    for x0, y0, x1, y1 in wins:
+        covered[y0:y1, x0:x1] = True
+    rx0, ry0, rx1, ry1 = (int(round(v * s)) for v, s in zip(region, (w, h, w, h)))
+    assert covered[ry0:ry1, rx0:rx1].all()
+
+
+def test_tile_larger_than_frame_is_clipped():
+    wins = tile_windows(100, 150, (0, 0, 1, 1), 400, 0.25)
+    assert wins.tolist() == [[0, 0, 100, 100], [50, 0, 150, 100]]